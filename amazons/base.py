@@ -3,15 +3,27 @@ import numpy as np
 from typing import List, Set, Dict, Tuple, Optional
 from dataclasses import dataclass
 from amazons.constants import *
+from amazons.tables import ray_tables
+from amazons.zobrist import zobrist_keys
 from pathlib import Path
 
 
-@dataclass
+# the values a square can hold
+SQUARE_VALUES: Tuple[int, ...] = (EMPTY, BURNT, WHITE_AMAZON, BLACK_AMAZON)
+
+
+@dataclass(frozen=True, init=False)
 class Coordinate:
-    """ Class for keeping track of coordinates on a board"""
+    """ Class for keeping track of coordinates on a board, immutable and hashable"""
+    __slots__ = ("x", "y")
     x: int
     y: int
 
+    def __init__(self, x: int, y: int) -> None:
+        # frozen dataclasses assign through object.__setattr__, the slot descriptors are about twice as fast
+        _set_coordinate_x(self, x)
+        _set_coordinate_y(self, y)
+
     def is_on_board(self, board: Board) -> bool:
         """Checks if a given coordinate is on a board
         :param board: board to compare to
@@ -26,6 +38,23 @@ class Coordinate:
         """
         return Distance(self.x - other.x, self.y - other.y)
 
+    def index(self, width: int) -> int:
+        """Find the flat square index of the coordinate, as used by legal_moves and the index API of Board
+        :param width: width of the board
+        :return: y * width + x
+        """
+        return self.y * width + self.x
+
+    @classmethod
+    def from_index(cls, index: int, width: int) -> Coordinate:
+        """Create the coordinate of a flat square index
+        :param index: y * width + x
+        :param width: width of the board
+        :return: the coordinate
+        """
+        y, x = divmod(index, width)
+        return cls(x, y)
+
     def __add__(self, other: Distance) -> Coordinate:
         """Add a distance to a coordinate to get the new coordinate
         :param other: the distance to add
@@ -40,19 +69,26 @@ class Coordinate:
         return f"({self.x}, {self.y})"
 
 
-@dataclass
+@dataclass(frozen=True, init=False)
 class Distance:
-    """ Class to represent the distance between two coordinates in a board"""
+    """ Class to represent the distance between two coordinates in a board, immutable and hashable"""
+    __slots__ = ("x", "y")
     x: int
     y: int
 
+    def __init__(self, x: int, y: int) -> None:
+        _set_distance_x(self, x)
+        _set_distance_y(self, y)
+
     @property
     def unit_step(self) -> Distance:
         """Gets the unit step of a distance
         :return: a Distance that moves by one square in the direction of the distance
         """
-        if self.is_horizontal() or self.is_vertical() or self.is_diagonal():
-            return Distance(np.sign(self.x), np.sign(self.y))
+        x, y = self.x, self.y
+        # horizontal, vertical or diagonal, with the three checks inlined
+        if (x == 0) != (y == 0) or (x != 0 and abs(x) == abs(y)):
+            return Distance(int(x > 0) - int(x < 0), int(y > 0) - int(y < 0))
         else:
             raise RuntimeError("Cannot compute unit step for a move that isn't horizontal, vertical, or diagonal.")
 
@@ -72,7 +108,7 @@ class Distance:
         """Determines if a distance is purely diagonal (like a bishop moves in chess)
         :return: True if diagonal, otherwise false
         """
-        return (self.x != 0) and (self.y != 0) and np.abs(self.x) == np.abs(self.y)
+        return (self.x != 0) and (self.y != 0) and abs(self.x) == abs(self.y)
 
     def __str__(self) -> str:
         """Represent as a string
@@ -81,12 +117,59 @@ class Distance:
         return f"({self.x}, {self.y})"
 
 
+_set_coordinate_x = Coordinate.__dict__["x"].__set__
+_set_coordinate_y = Coordinate.__dict__["y"].__set__
+_set_distance_x = Distance.__dict__["x"].__set__
+_set_distance_y = Distance.__dict__["y"].__set__
+
+
 class Board:
     """ Class for representing a generic Game of the Amazons Board"""
     def __init__(self, width: int, height: int) -> None:
         self.width: int = width
         self.height: int = height
         self._state: np.ndarray = np.zeros((self.height, self.width), dtype=np.uint8)
+        # False while _state may be shared with a copy, the next write then copies it first
+        self._owns_state: bool = True
+        # True when _state is a buffer owned by the caller, such as a game of a BoardBatch, that writes must reach
+        self._is_view: bool = False
+        # (start, end, burn, start value, end value, burn value) for every pushed move, most recent last
+        self._history: List[Tuple[int, int, int, int, int, int]] = []
+        # Zobrist keys per square and value, and the hash of the current state kept up to date by _write
+        self._keys: List[List[int]] = zobrist_keys(width, height).squares
+        self._hash: int = zobrist_keys(width, height).empty_hash
+
+    @classmethod
+    def from_state(cls, state: np.ndarray, copy: bool = True) -> Board:
+        """Create a board from an array of square values
+        :param state: a (height, width) uint8 array of EMPTY, BURNT, WHITE_AMAZON and BLACK_AMAZON
+        :param copy: if False the board is a view that reads and writes state directly
+        :return: the new board
+        """
+        assert state.ndim == 2 and state.dtype == np.uint8
+        height, width = state.shape
+        board = cls.__new__(cls)
+        board.width = width
+        board.height = height
+        board._state = state.copy() if copy else state
+        board._owns_state = True
+        board._is_view = not copy
+        board._history = []
+        board._keys = zobrist_keys(width, height).squares
+        board._hash = zobrist_keys(width, height).hash_state(state)
+        return board
+
+    @classmethod
+    def starting_position(cls, size: int = 10) -> Board:
+        """Create a square board with the amazons in their starting squares
+        :param size: width and height of the board, must be a key of STARTING_POSITIONS
+        :return: a new board ready for the first move
+        """
+        board = cls(size, size)
+        for value, squares in STARTING_POSITIONS[size].items():
+            for x, y in squares:
+                board.set_square_value(Coordinate(x, y), value)
+        return board
 
     def __str__(self) -> str:
         """A simple string representation of a board
@@ -99,22 +182,101 @@ class Board:
             out += "\n"
         return out
 
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, Board):
+            return NotImplemented
+        return self.width == other.width and self.height == other.height and \
+            self._hash == other._hash and np.array_equal(self._state, other._state)
+
+    def __hash__(self) -> int:
+        """Hash by position, so a board must not be changed while it is a key of a dict or set
+        :return: the Zobrist hash of the board
+        """
+        return self._hash
+
+    @property
+    def zobrist_hash(self) -> int:
+        """The 64 bit Zobrist hash of the squares, updated incrementally on every change"""
+        return self._hash
+
     def square_is_empty(self, coordinate: Coordinate) -> bool:
         """Check if a square is empty
         :param coordinate: which square to check
         :return: True if square is empty, false otherwise
         """
         assert coordinate.is_on_board(self)
-        return self._state[coordinate.y, coordinate.x] == EMPTY
+        return self._state.item(coordinate.y * self.width + coordinate.x) == EMPTY
 
     def set_square_value(self, coordinate: Coordinate, value: int) -> None:
         """Update the value of a square
         :param coordinate: the coordinate of a square to update
         :param value: the value to update
         """
-        assert value in [EMPTY, BURNT, WHITE_AMAZON, BLACK_AMAZON]
+        assert value in SQUARE_VALUES
         assert coordinate.is_on_board(self)
-        self._state[coordinate.y, coordinate.x] = value
+        self._write(coordinate.y * self.width + coordinate.x, value)
+
+    def get_square(self, index: int) -> int:
+        """Gets the value of a square by its flat index, without building or checking a Coordinate
+        :param index: square index y * width + x
+        :return: 0 if empty, 1 if burnt, 2 if white amazon, 3 if black amazon
+        """
+        return self._state.item(index)
+
+    def set_square(self, index: int, value: int) -> None:
+        """Update the value of a square by its flat index, neither the index nor the value is checked
+        :param index: square index y * width + x
+        :param value: the value to update
+        """
+        self._write(index, value)
+
+    def move_square(self, start: int, end: int) -> None:
+        """Move an amazon by flat square indices, requires calling burn_square afterwards to finish a move
+        :param start: square index to start moving the Amazon from
+        :param end: square index to end moving the Amazon to
+        """
+        value = self._state.item(start)
+        self._write(start, EMPTY)
+        self._write(end, value)
+
+    def burn_square(self, index: int) -> None:
+        """Burn a square by its flat index
+        :param index: square index to burn
+        """
+        self._write(index, BURNT)
+
+    def empty_between(self, start: int, end: int, include_start: bool = False, include_end: bool = False) -> bool:
+        """Determine if the path between two squares given by flat index is empty, see empty_between_squares
+        :param start: square index to start checking from
+        :param end: square index to stop checking at
+        :param include_start: if True, include the start point in check, i.e. make sure it's empty too
+        :param include_end: if True, include the end point in check, i.e. make sure it's empty too
+        :return: True if the two squares share a queen line and the path between them is empty, otherwise False
+        """
+        path = ray_tables(self.width, self.height).between_paths[start][end]
+        if path is None:
+            return False
+        item = self._state.item
+        if include_start and item(start) != EMPTY:
+            return False
+        if include_end and item(end) != EMPTY:
+            return False
+        for square in path:
+            if item(square) != EMPTY:
+                return False
+        return True
+
+    def _write(self, index: int, value: int) -> None:
+        """Write a value to a square, copying the state first if a copy still shares it
+        :param index: flat square index
+        :param value: the value to write
+        """
+        if not self._owns_state:
+            self._state = self._state.copy()
+            self._owns_state = True
+        keys = self._keys[index]
+        self._hash ^= keys[self._state.item(index)] ^ keys[value]
+        self._state.flat[index] = value
 
     def get_square_value(self, coordinate: Coordinate) -> int:
         """Gets the value of a square
@@ -122,7 +284,7 @@ class Board:
         :return: 0 if empty, 1 if burnt, 2 if white amazon, 3 if black amazon
         """
         assert coordinate.is_on_board(self)
-        return self._state[coordinate.y, coordinate.x]
+        return self._state.item(coordinate.y * self.width + coordinate.x)
 
     # def is_valid_move(self, start: Coordinate, end: Coordinate, burn: Coordinate) -> bool:
     #     """
@@ -165,21 +327,9 @@ class Board:
         :param include_end: if True, include the end point in check, i.e. make sure it's empty too
         :return: True if the path between two squares is empty, otherwise False
         """
-        is_empty = True
-        current_square = start
-        try:
-            unit_step: Distance = (end - start).unit_step
-        except RuntimeError:
-            return False
-        while current_square != end:
-            current_square += unit_step
-            is_empty &= self.square_is_empty(current_square)
-
-        if include_start:
-            is_empty &= self.square_is_empty(start)
-        if include_end:
-            is_empty &= self.square_is_empty(end)
-        return is_empty
+        assert start.is_on_board(self) and end.is_on_board(self)
+        return self.empty_between(start.y * self.width + start.x, end.y * self.width + end.x,
+                                  include_start, include_end)
 
     def move_and_burn(self, start: Coordinate, end: Coordinate, burn: Coordinate) -> None:
         """Moves an Amazon and burns a square as well
@@ -188,26 +338,67 @@ class Board:
         :param burn: square to fire Amazon arrow and burn for the rest of the game
         """
         # assert self.is_valid_move(start, end, burn)
-        value = self.get_square_value(start)
-        self.set_square_value(start, EMPTY)
-        self.set_square_value(end, value)
-        self.set_square_value(burn, BURNT)
+        assert start.is_on_board(self) and end.is_on_board(self) and burn.is_on_board(self)
+        self.move_square(start.y * self.width + start.x, end.y * self.width + end.x)
+        self._write(burn.y * self.width + burn.x, BURNT)
 
     def move(self, start: Coordinate, end: Coordinate) -> None:
         """Moves and Amazon but requires calling burn aftwerwards to finish a move
         :param start: square to start moving the Amazon from
         :param end: square to end moving the Amazon to
         """
-        value = self.get_square_value(start)
-        self.set_square_value(start, EMPTY)
-        self.set_square_value(end, value)
+        assert start.is_on_board(self) and end.is_on_board(self)
+        self.move_square(start.y * self.width + start.x, end.y * self.width + end.x)
 
     def burn(self, square: Coordinate) -> None:
         """
         Burn a square so that a piece can no longer move there
         :param square: coordinate fot which square to burn
         """
-        self.set_square_value(square, BURNT)
+        assert square.is_on_board(self)
+        self._write(square.y * self.width + square.x, BURNT)
+
+    def push(self, move: Tuple[int, int, int]) -> None:
+        """Play a move and remember how to undo it, the move is not checked for legality
+        :param move: (start, end, burn) square indices, such as a row of legal_moves
+        """
+        start, end, burn = int(move[0]), int(move[1]), int(move[2])
+        start_value = self._state.item(start)
+        self._write(start, EMPTY)
+        end_value = self._state.item(end)
+        self._write(end, start_value)
+        # the burn may land on the square just vacated, so only read it once the amazon has moved
+        burn_value = self._state.item(burn)
+        self._write(burn, BURNT)
+        self._history.append((start, end, burn, start_value, end_value, burn_value))
+
+    def pop(self) -> Tuple[int, int, int]:
+        """Undo the most recently pushed move
+        :return: the (start, end, burn) square indices of the move that was undone
+        """
+        start, end, burn, start_value, end_value, burn_value = self._history.pop()
+        self._write(burn, burn_value)
+        self._write(end, end_value)
+        self._write(start, start_value)
+        return start, end, burn
+
+    def copy(self) -> Board:
+        """Make an independent board in O(1) by sharing the state until either board writes to it
+        A view made with from_state(copy=False) must keep writing to its buffer, so its squares are copied at once.
+        :return: a board with the same squares and an empty move history
+        """
+        other = type(self).__new__(type(self))
+        other.width = self.width
+        other.height = self.height
+        other._state = self._state.copy() if self._is_view else self._state
+        other._owns_state = self._is_view
+        other._is_view = False
+        other._history = []
+        other._keys = self._keys
+        other._hash = self._hash
+        if not self._is_view:
+            self._owns_state = False
+        return other
 
     def get_white_amazon_positions(self):
         """Determines where the white Amazons are
@@ -220,3 +411,56 @@ class Board:
         :return: two ndarray where the first is the x positions and the second is the y positions
         """
         return np.where(self._state == BLACK_AMAZON)
+
+    def _padded_state(self) -> np.ndarray:
+        """Flatten the state with one extra burnt square at the end that every padded ray entry points to
+        :return: a new 1D array of length width * height + 1
+        """
+        return np.append(self._state.reshape(-1), np.uint8(BURNT))
+
+    def _open_rays(self, squares: np.ndarray, padded: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Slide along all eight queen rays from each of the given squares at once
+        :param squares: square indices to slide from
+        :param padded: state from _padded_state
+        :return: the ray table rows for the squares and a mask of which ray entries are reachable
+        """
+        rays = ray_tables(self.width, self.height).rays[squares]
+        # a square is reachable when it and every square before it on the ray are empty
+        return rays, np.logical_and.accumulate(padded[rays] == EMPTY, axis=-1)
+
+    def legal_moves(self, color: int) -> np.ndarray:
+        """Generate every legal move for one side
+        :param color: WHITE_AMAZON or BLACK_AMAZON
+        :return: an (N, 3) integer array of (start, end, burn) square indices, where square (x, y) is y * width + x
+        """
+        padded = self._padded_state()
+        dtype = np.int16 if padded.size <= np.iinfo(np.int16).max else np.int32
+        moves = [np.empty((0, 3), dtype=dtype)]
+        for start in np.flatnonzero(padded == color):
+            rays, reachable = self._open_rays(start, padded)
+            ends = rays[reachable]
+            # burns are fired from the end square after the amazon has left its start square
+            padded[start] = EMPTY
+            burn_rays, burn_reachable = self._open_rays(ends, padded)
+            padded[start] = color
+            end_positions = np.nonzero(burn_reachable)[0]
+            block = np.empty((end_positions.size, 3), dtype=dtype)
+            block[:, 0] = start
+            block[:, 1] = ends[end_positions]
+            block[:, 2] = burn_rays[burn_reachable]
+            moves.append(block)
+        return np.concatenate(moves)
+
+    def count_legal_moves(self, color: int) -> int:
+        """Count the legal moves for one side without building them
+        :param color: WHITE_AMAZON or BLACK_AMAZON
+        :return: the number of legal (start, end, burn) moves
+        """
+        padded = self._padded_state()
+        count = 0
+        for start in np.flatnonzero(padded == color):
+            rays, reachable = self._open_rays(start, padded)
+            padded[start] = EMPTY
+            count += int(self._open_rays(rays[reachable], padded)[1].sum())
+            padded[start] = color
+        return count
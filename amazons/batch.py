@@ -0,0 +1,175 @@
+from __future__ import annotations
+import numpy as np
+from typing import List, Set, Dict, Tuple, Optional, Union
+from amazons.base import Board
+from amazons.constants import *
+from amazons.tables import ray_tables
+from amazons.zobrist import zobrist_keys
+
+# games whose legal moves are counted together, which bounds the memory of the intermediate arrays
+COUNT_CHUNK: int = 256
+
+
+class _GameView(Board):
+    """ Class for the Board view of one game of a BoardBatch, which rehashes after batched changes to its game"""
+    # a copy of a view is created without these and behaves as a plain Board
+    _batch: Optional[BoardBatch] = None
+    _game: int = 0
+    _generation: int = 0
+
+    @property
+    def _hash(self) -> int:
+        batch = self._batch
+        if batch is not None and batch._generations.item(self._game) != self._generation:
+            self._generation = batch._generations.item(self._game)
+            self._stored_hash = zobrist_keys(self.width, self.height).hash_state(self._state)
+        return self._stored_hash
+
+    @_hash.setter
+    def _hash(self, value: int) -> None:
+        self._stored_hash = value
+
+
+class BoardBatch:
+    """ Class for holding many games of the same board size in one contiguous (N, height, width) array
+
+    Games are addressed by their index in the batch and moves are (start, end, burn) square indices as returned
+    by Board.legal_moves. Batched operations write the array directly and count every change to a game in a
+    generation number, which a Board view made before the change checks to rehash itself. Writes made straight
+    into states are not counted, so make fresh views after them.
+    """
+    def __init__(self, size: int, width: int, height: int, template: Optional[Board] = None) -> None:
+        """Create a batch of games all set to the template
+        :param size: number of games
+        :param width: board width
+        :param height: board height
+        :param template: position that new and reset games start from, by default the starting position if
+            STARTING_POSITIONS has one for this size, otherwise an empty board
+        """
+        if template is None:
+            template = Board.starting_position(width) if width == height and width in STARTING_POSITIONS \
+                else Board(width, height)
+        assert (template.width, template.height) == (width, height)
+        self.width: int = width
+        self.height: int = height
+        self._template: np.ndarray = template._state.copy()
+        self._states: np.ndarray = np.repeat(self._template[None], size, axis=0)
+        # bumped whenever a batched operation changes a game, so views know when their hash is stale
+        self._generations: np.ndarray = np.zeros(size, dtype=np.int64)
+
+    @classmethod
+    def from_boards(cls, boards: List[Board]) -> BoardBatch:
+        """Gather separate boards of one size into a batch
+        :param boards: the boards to copy
+        :return: a batch whose game i is a copy of boards[i]
+        """
+        batch = cls(len(boards), boards[0].width, boards[0].height)
+        for game, board in enumerate(boards):
+            batch._states[game] = board._state
+        return batch
+
+    def __len__(self) -> int:
+        return len(self._states)
+
+    def __getitem__(self, game: int) -> Board:
+        """Get a zero-copy Board view of one game, writes through the view change the batch
+        :param game: index of the game
+        :return: a Board sharing the game's squares
+        """
+        view = _GameView.from_state(self._states[game], copy=False)
+        view._batch = self
+        view._game = game
+        view._generation = self._generations.item(game)
+        return view
+
+    @property
+    def states(self) -> np.ndarray:
+        """The (N, height, width) array of every game's squares"""
+        return self._states
+
+    def _games(self, games: Optional[Union[int, np.ndarray]]) -> np.ndarray:
+        return np.arange(len(self)) if games is None else np.atleast_1d(np.asarray(games, dtype=np.intp))
+
+    def reset(self, games: Optional[Union[int, np.ndarray]] = None) -> None:
+        """Put games back to the template position
+        :param games: game indices to reset, or None for every game
+        """
+        games = self._games(games)
+        self._states[games] = self._template
+        self._generations[games] += 1
+
+    def move_and_burn(self, moves: np.ndarray, games: Optional[Union[int, np.ndarray]] = None) -> None:
+        """Play one move in each of several games, the moves are not checked for legality
+        :param moves: (G, 3) array of (start, end, burn) square indices, one row per game
+        :param games: indices of the G games to play in, or None to play moves[i] in game i for every game
+        """
+        games = self._games(games)
+        moves = np.asarray(moves).reshape(-1, 3)
+        flat = self._states.reshape(len(self), -1)
+        amazons = flat[games, moves[:, 0]]
+        flat[games, moves[:, 0]] = EMPTY
+        flat[games, moves[:, 1]] = amazons
+        flat[games, moves[:, 2]] = BURNT
+        self._generations[games] += 1
+
+    @staticmethod
+    def _colors(colors: Union[int, np.ndarray], games: np.ndarray) -> np.ndarray:
+        return np.broadcast_to(np.asarray(colors, dtype=np.uint8), games.shape)
+
+    def legal_move_counts(self, colors: Union[int, np.ndarray],
+                          games: Optional[Union[int, np.ndarray]] = None) -> np.ndarray:
+        """Count the legal moves of several games at once
+        :param colors: side to move, either one value for every game or one per requested game
+        :param games: game indices to count, or None for every game
+        :return: number of legal moves of each requested game
+        """
+        games = self._games(games)
+        colors = self._colors(colors, games)
+        counts = np.zeros(len(games), dtype=np.int64)
+        for chunk in range(0, len(games), COUNT_CHUNK):
+            counts[chunk:chunk + COUNT_CHUNK] = self._count_chunk(games[chunk:chunk + COUNT_CHUNK],
+                                                                  colors[chunk:chunk + COUNT_CHUNK])
+        return counts
+
+    def _count_chunk(self, games: np.ndarray, colors: np.ndarray) -> np.ndarray:
+        """Count legal moves for a chunk of games with a few gathers over the ray tables"""
+        squares = self.width * self.height
+        stride = squares + 1
+        rays = ray_tables(self.width, self.height).rays
+        # every game gets one extra blocked square that padded ray entries point to
+        empty = np.zeros((len(games), stride), dtype=bool)
+        empty[:, :-1] = self._states[games].reshape(len(games), -1) == EMPTY
+        empty = empty.reshape(-1)
+
+        owner, start = np.nonzero(self._states[games].reshape(len(games), -1) == colors[:, None])
+        offsets = (owner * stride)[:, None, None]
+        ends = rays[start] + offsets
+        reachable = np.logical_and.accumulate(empty[ends], axis=-1)
+        amazon, _, _ = np.nonzero(reachable)
+        ends = ends[reachable]
+
+        # burns are fired from each end square once the amazon has left its start square
+        burns = rays[ends % stride] + offsets[amazon]
+        vacated = burns == (start[amazon] + owner[amazon] * stride)[:, None, None]
+        burnable = np.logical_and.accumulate(empty[burns] | vacated, axis=-1)
+        counts = np.bincount(owner[amazon], weights=burnable.sum(axis=(1, 2)), minlength=len(games))
+        return counts.astype(np.int64)
+
+    def is_terminal(self, colors: Union[int, np.ndarray],
+                    games: Optional[Union[int, np.ndarray]] = None) -> np.ndarray:
+        """Find the games where the side to move has no legal move and so has lost
+        An amazon that can move can always burn the square it left, so a side has a move exactly when one of
+        its amazons has an empty neighbouring square.
+        :param colors: side to move, either one value for every game or one per requested game
+        :param games: game indices to check, or None for every game
+        :return: boolean array, True for each requested game that is over
+        """
+        games = self._games(games)
+        colors = self._colors(colors, games)
+        stride = self.width * self.height + 1
+        empty = np.zeros((len(games), stride), dtype=bool)
+        empty[:, :-1] = self._states[games].reshape(len(games), -1) == EMPTY
+        owner, start = np.nonzero(self._states[games].reshape(len(games), -1) == colors[:, None])
+        neighbours = ray_tables(self.width, self.height).rays[start, :, 0]
+        can_move = empty[owner[:, None], neighbours].any(axis=1)
+        return np.bincount(owner, weights=can_move, minlength=len(games)) == 0
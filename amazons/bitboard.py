@@ -0,0 +1,262 @@
+from __future__ import annotations
+import numpy as np
+from functools import lru_cache
+from typing import List, Set, Dict, Tuple, Optional
+from amazons.constants import *
+from amazons.base import Board, Coordinate
+
+
+@lru_cache(maxsize=None)
+def _masks(width: int, height: int) -> Tuple[int, int, int]:
+    """Build the edge masks used to stop shifted bits from wrapping around the board
+    :param width: board width
+    :param height: board height
+    :return: a mask of every square, a mask without the first column, and a mask without the last column
+    """
+    full = (1 << (width * height)) - 1
+    first_column = 0
+    last_column = 0
+    for y in range(height):
+        first_column |= 1 << (y * width)
+        last_column |= 1 << (y * width + width - 1)
+    return full, full & ~first_column, full & ~last_column
+
+
+class BitBoard:
+    """ Class for representing a Game of the Amazons Board as one integer bit mask per square value
+
+    Square (x, y) is bit y * width + x of each mask, the same order as a flattened Board state.
+    """
+    def __init__(self, width: int, height: int) -> None:
+        self.width: int = width
+        self.height: int = height
+        self.burnt: int = 0
+        self.white: int = 0
+        self.black: int = 0
+        self._full, self._not_first_column, self._not_last_column = _masks(width, height)
+        # (dx, dy) -> function shifting every bit in a mask one square in that direction
+        self._shifts = {(1, 0): self._shift_east, (-1, 0): self._shift_west,
+                        (0, 1): self._shift_south, (0, -1): self._shift_north,
+                        (1, 1): self._shift_south_east, (-1, 1): self._shift_south_west,
+                        (1, -1): self._shift_north_east, (-1, -1): self._shift_north_west}
+
+    @classmethod
+    def from_board(cls, board: Board) -> BitBoard:
+        """Convert a NumPy board into a bitboard
+        :param board: the board to convert
+        :return: an equivalent bitboard
+        """
+        bitboard = cls(board.width, board.height)
+        flat = board._state.reshape(-1)
+        for value, name in ((BURNT, "burnt"), (WHITE_AMAZON, "white"), (BLACK_AMAZON, "black")):
+            mask = 0
+            for index in np.flatnonzero(flat == value):
+                mask |= 1 << int(index)
+            setattr(bitboard, name, mask)
+        return bitboard
+
+    def to_board(self) -> Board:
+        """Convert back to a NumPy board
+        :return: an equivalent Board
+        """
+        board = Board(self.width, self.height)
+        flat = board._state.reshape(-1)
+        for value, mask in ((BURNT, self.burnt), (WHITE_AMAZON, self.white), (BLACK_AMAZON, self.black)):
+            flat[list(self._indices(mask))] = value
+        return board
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, BitBoard):
+            return NotImplemented
+        return (self.width, self.height, self.burnt, self.white, self.black) == \
+               (other.width, other.height, other.burnt, other.white, other.black)
+
+    def __str__(self) -> str:
+        """A simple string representation of a board, identical to Board.__str__
+        :return: string representation of a board
+        """
+        out: str = ""
+        for y in range(self.height):
+            for x in range(self.width):
+                out += SYMBOLS[self.get_square_value(Coordinate(x, y))]
+            out += "\n"
+        return out
+
+    @property
+    def occupied(self) -> int:
+        """Mask of every square that is not empty"""
+        return self.burnt | self.white | self.black
+
+    @property
+    def empty(self) -> int:
+        """Mask of every empty square"""
+        return self._full & ~(self.burnt | self.white | self.black)
+
+    def _bit(self, coordinate: Coordinate) -> int:
+        assert coordinate.is_on_board(self)
+        return 1 << (coordinate.y * self.width + coordinate.x)
+
+    @staticmethod
+    def _indices(mask: int):
+        """Iterate over the indices of the set bits in a mask, lowest first"""
+        while mask:
+            low = mask & -mask
+            yield low.bit_length() - 1
+            mask ^= low
+
+    def _shift_east(self, mask: int) -> int:
+        return (mask << 1) & self._not_first_column
+
+    def _shift_west(self, mask: int) -> int:
+        return (mask >> 1) & self._not_last_column
+
+    def _shift_south(self, mask: int) -> int:
+        return (mask << self.width) & self._full
+
+    def _shift_north(self, mask: int) -> int:
+        return mask >> self.width
+
+    def _shift_south_east(self, mask: int) -> int:
+        return (mask << (self.width + 1)) & self._not_first_column
+
+    def _shift_south_west(self, mask: int) -> int:
+        return (mask << (self.width - 1)) & self._not_last_column
+
+    def _shift_north_east(self, mask: int) -> int:
+        return (mask >> (self.width - 1)) & self._not_first_column
+
+    def _shift_north_west(self, mask: int) -> int:
+        return (mask >> (self.width + 1)) & self._not_last_column
+
+    def queen_attacks(self, origins: int, empty: int) -> int:
+        """Compute every square reachable by a queen move from any of the origin squares
+        :param origins: mask of the squares to slide from
+        :param empty: mask of the squares a queen may pass through
+        :return: mask of the reachable squares, never including the origins themselves
+        """
+        attacks = 0
+        for shift in self._shifts.values():
+            ray = shift(origins) & empty
+            while ray:
+                attacks |= ray
+                ray = shift(ray) & empty
+        return attacks
+
+    def square_is_empty(self, coordinate: Coordinate) -> bool:
+        """Check if a square is empty
+        :param coordinate: which square to check
+        :return: True if square is empty, false otherwise
+        """
+        return not (self.occupied & self._bit(coordinate))
+
+    def set_square_value(self, coordinate: Coordinate, value: int) -> None:
+        """Update the value of a square
+        :param coordinate: the coordinate of a square to update
+        :param value: the value to update
+        """
+        assert value in [EMPTY, BURNT, WHITE_AMAZON, BLACK_AMAZON]
+        bit = self._bit(coordinate)
+        self.burnt &= ~bit
+        self.white &= ~bit
+        self.black &= ~bit
+        if value == BURNT:
+            self.burnt |= bit
+        elif value == WHITE_AMAZON:
+            self.white |= bit
+        elif value == BLACK_AMAZON:
+            self.black |= bit
+
+    def get_square_value(self, coordinate: Coordinate) -> int:
+        """Gets the value of a square
+        :param coordinate: which square to get value of
+        :return: 0 if empty, 1 if burnt, 2 if white amazon, 3 if black amazon
+        """
+        bit = self._bit(coordinate)
+        if self.burnt & bit:
+            return BURNT
+        if self.white & bit:
+            return WHITE_AMAZON
+        if self.black & bit:
+            return BLACK_AMAZON
+        return EMPTY
+
+    def empty_between_squares(self, start: Coordinate, end: Coordinate,
+                              include_start: bool = False, include_end: bool = False) -> bool:
+        """Determine if the path between two squares is empty
+        :param start: where to start checking
+        :param end: where to stop checking
+        :param include_start: if True, include the start point in check, i.e. make sure it's empty too
+        :param include_end: if True, include the end point in check, i.e. make sure it's empty too
+        :return: True if the path between two squares is empty, otherwise False
+        """
+        start_bit, end_bit = self._bit(start), self._bit(end)
+        try:
+            step = (end - start).unit_step
+        except RuntimeError:
+            return False
+        shift = self._shifts[(int(step.x), int(step.y))]
+        path = 0
+        square = shift(start_bit)
+        while square != end_bit:
+            path |= square
+            square = shift(square)
+        if include_start:
+            path |= start_bit
+        if include_end:
+            path |= end_bit
+        return not (path & self.occupied)
+
+    def move_and_burn(self, start: Coordinate, end: Coordinate, burn: Coordinate) -> None:
+        """Moves an Amazon and burns a square as well
+        :param start: square to start moving the Amazon from
+        :param end: square to end moving the Amazon to
+        :param burn: square to fire Amazon arrow and burn for the rest of the game
+        """
+        self.move(start, end)
+        self.burn(burn)
+
+    def move(self, start: Coordinate, end: Coordinate) -> None:
+        """Moves and Amazon but requires calling burn aftwerwards to finish a move
+        :param start: square to start moving the Amazon from
+        :param end: square to end moving the Amazon to
+        """
+        value = self.get_square_value(start)
+        self.set_square_value(start, EMPTY)
+        self.set_square_value(end, value)
+
+    def burn(self, square: Coordinate) -> None:
+        """
+        Burn a square so that a piece can no longer move there
+        :param square: coordinate fot which square to burn
+        """
+        self.set_square_value(square, BURNT)
+
+    def legal_moves(self, color: int) -> List[Tuple[int, int, int]]:
+        """Generate every legal move for one side
+        :param color: WHITE_AMAZON or BLACK_AMAZON
+        :return: a list of (start, end, burn) square indices
+        """
+        moves = []
+        empty = self.empty
+        for start in self._indices(self.white if color == WHITE_AMAZON else self.black):
+            start_bit = 1 << start
+            for end in self._indices(self.queen_attacks(start_bit, empty)):
+                # the amazon has left its start square and now blocks its end square
+                after_move = (empty | start_bit) & ~(1 << end)
+                for burn in self._indices(self.queen_attacks(1 << end, after_move)):
+                    moves.append((start, end, burn))
+        return moves
+
+    def count_legal_moves(self, color: int) -> int:
+        """Count the legal moves for one side without building them
+        :param color: WHITE_AMAZON or BLACK_AMAZON
+        :return: the number of legal (start, end, burn) moves
+        """
+        count = 0
+        empty = self.empty
+        for start in self._indices(self.white if color == WHITE_AMAZON else self.black):
+            start_bit = 1 << start
+            for end in self._indices(self.queen_attacks(start_bit, empty)):
+                after_move = (empty | start_bit) & ~(1 << end)
+                count += bin(self.queen_attacks(1 << end, after_move)).count("1")
+        return count
@@ -0,0 +1,175 @@
+"""Opening book built from game records
+
+A book file is a 16 byte BOOK_HEADER followed by BOOK_ENTRY records sorted by key and then move. The key of a
+position is its canonical Zobrist hash (see amazons.symmetry), with the side key XORed in when black is to move,
+and moves are stored on the canonical variant, so the up to 8 symmetric variants of a position share entries.
+Lookups binary search the keys through a memory map, so opening a book loads nothing and a lookup only touches
+the few pages it needs.
+"""
+from __future__ import annotations
+import argparse
+import numpy as np
+from dataclasses import dataclass
+from typing import List, Set, Dict, Tuple, Optional
+from amazons.base import Board
+from amazons.constants import *
+from amazons.records import GameReader
+from amazons.symmetry import variant_hashes, transform_move
+from amazons.zobrist import zobrist_keys
+
+MAGIC: bytes = b"AB"
+VERSION: int = 1
+BOOK_HEADER: np.dtype = np.dtype([("magic", "S2"),
+                                  ("version", "u1"),
+                                  ("width", "u1"),
+                                  ("height", "u1"),
+                                  ("reserved", "u1", (3,)),
+                                  ("entries", "<u8")])
+BOOK_ENTRY: np.dtype = np.dtype([("key", "<u8"),
+                                 ("start", "<u2"),
+                                 ("end", "<u2"),
+                                 ("burn", "<u2"),
+                                 ("reserved", "<u2"),
+                                 ("visits", "<u4"),
+                                 ("wins", "<f4")])
+# plies from the start of each game that go into a book
+BOOK_PLIES: int = 12
+# a move must have been played this often before best_move trusts its win rate
+BOOK_MIN_VISITS: int = 4
+
+
+@dataclass
+class BookMove:
+    """ Class for the statistics of one move from one book position"""
+    move: Tuple[int, int, int]
+    visits: int
+    wins: float
+
+    @property
+    def win_rate(self) -> float:
+        """Share of the games through this move that the side playing it won"""
+        return self.wins / self.visits if self.visits else 0.0
+
+
+def position_key(board: Board, color: int) -> Tuple[int, int]:
+    """Compute the book key of a position
+    :param board: the position
+    :param color: side to move
+    :return: the key and the transform that maps the board onto the canonical variant the key belongs to
+    """
+    hashes = variant_hashes(board)
+    transform = int(np.argmin(hashes))
+    key = int(hashes[transform])
+    if color == BLACK_AMAZON:
+        key ^= zobrist_keys(board.width, board.height).side
+    return key, transform
+
+
+def build_book(paths: List[str], output: str, plies: int = BOOK_PLIES) -> int:
+    """Collect the opening moves of stored games into a book file
+    :param paths: game record files whose games all share one board size, unfinished games count as lost by both
+        sides
+    :param output: path of the book file to write
+    :param plies: how many moves from the start of each game to include
+    :return: the number of entries written
+    """
+    keys, moves, wins = [], [], []
+    size = None
+    for path in paths:
+        reader = GameReader(path)
+        for game in range(len(reader)):
+            record = reader.game(game)
+            board = record.initial.copy()
+            size = (board.width, board.height)
+            color = WHITE_AMAZON
+            for move in record.moves[:plies].tolist():
+                key, transform = position_key(board, color)
+                keys.append(key)
+                moves.append(transform_move(move, transform, board.width, board.height))
+                wins.append(record.winner == color)
+                board.push(move)
+                color = OPPONENT[color]
+        del reader
+
+    entries = np.zeros(len(keys), dtype=BOOK_ENTRY)
+    entries["key"] = np.array(keys, dtype=np.uint64)
+    entries["start"], entries["end"], entries["burn"] = np.array(moves, dtype=np.uint16).reshape(-1, 3).T
+    entries["visits"] = 1
+    unique, inverse = np.unique(entries[["key", "start", "end", "burn"]], return_inverse=True)
+    inverse = inverse.reshape(-1)
+    book = np.zeros(len(unique), dtype=BOOK_ENTRY)
+    for field in ["key", "start", "end", "burn"]:
+        book[field] = unique[field]
+    book["visits"] = np.bincount(inverse, minlength=len(unique))
+    book["wins"] = np.bincount(inverse, weights=np.array(wins, dtype=np.float64), minlength=len(unique))
+
+    width, height = size if size is not None else (0, 0)
+    header = np.array([(MAGIC, VERSION, width, height, 0, len(book))], dtype=BOOK_HEADER)
+    with open(output, "wb") as file:
+        file.write(header.tobytes() + book.tobytes())
+    return len(book)
+
+
+class OpeningBook:
+    """ Class for looking up moves in a book file through a memory map"""
+    def __init__(self, path: str) -> None:
+        self.path: str = path
+        header = np.fromfile(path, dtype=BOOK_HEADER, count=1)[0]
+        assert header["magic"] == MAGIC
+        self.width: int = int(header["width"])
+        self.height: int = int(header["height"])
+        if header["entries"]:
+            self._entries: np.ndarray = np.memmap(path, dtype=BOOK_ENTRY, mode="r", offset=BOOK_HEADER.itemsize,
+                                                  shape=(int(header["entries"]),))
+        else:
+            self._entries = np.zeros(0, dtype=BOOK_ENTRY)
+        self._keys: np.ndarray = self._entries["key"]
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def lookup(self, board: Board, color: int) -> List[BookMove]:
+        """Find the book moves of a position
+        :param board: the position
+        :param color: side to move
+        :return: the moves played from this position or any of its symmetric variants, mapped onto board, most
+            played first
+        """
+        if (board.width, board.height) != (self.width, self.height):
+            return []
+        key, transform = position_key(board, color)
+        first = int(np.searchsorted(self._keys, np.uint64(key), side="left"))
+        last = int(np.searchsorted(self._keys, np.uint64(key), side="right"))
+        moves = [BookMove(transform_move((int(entry["start"]), int(entry["end"]), int(entry["burn"])), transform,
+                                         board.width, board.height, inverse=True),
+                          int(entry["visits"]), float(entry["wins"]))
+                 for entry in self._entries[first:last]]
+        return sorted(moves, key=lambda book_move: -book_move.visits)
+
+    def best_move(self, board: Board, color: int,
+                  min_visits: int = BOOK_MIN_VISITS) -> Optional[Tuple[int, int, int]]:
+        """Pick the book move with the best win rate among those played often enough
+        :param board: the position
+        :param color: side to move
+        :param min_visits: fewest games a move needs to be considered
+        :return: the move, or None if the position is not in the book or no move was played often enough
+        """
+        candidates = [book_move for book_move in self.lookup(board, color) if book_move.visits >= min_visits]
+        if not candidates:
+            return None
+        return max(candidates, key=lambda book_move: (book_move.win_rate, book_move.visits)).move
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Build a Game of the Amazons opening book from game records")
+    parser.add_argument("records", nargs="+", help="game record files, as written by amazons.selfplay")
+    parser.add_argument("--output", default="book.amb", help="file to write the book to")
+    parser.add_argument("--plies", type=int, default=BOOK_PLIES, help="moves from the start of each game to use")
+    args = parser.parse_args()
+
+    entries = build_book(args.records, args.output, args.plies)
+    print(f"{entries} book entries written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -17,4 +17,20 @@ BLACK_AMAZON: int = 3
 SYMBOLS: Dict[int, str] = {EMPTY: "□",
                            BURNT: "■",
                            WHITE_AMAZON: "W",
-                           BLACK_AMAZON: "B"}
\ No newline at end of file
+                           BLACK_AMAZON: "B"}
+OPPONENT: Dict[int, int] = {WHITE_AMAZON: BLACK_AMAZON,
+                            BLACK_AMAZON: WHITE_AMAZON}
+
+# The eight queen directions as (dx, dy) steps
+DIRECTIONS: List[Tuple[int, int]] = [(1, 0), (-1, 0), (0, 1), (0, -1), (1, 1), (-1, 1), (1, -1), (-1, -1)]
+
+# Starting amazon placements keyed by board size, as (x, y) squares with y = 0 at the top of the board
+# the smaller boards scale the 10x10 placement, keeping its four amazons a side and its symmetry
+STARTING_POSITIONS: Dict[int, Dict[int, List[Tuple[int, int]]]] = {
+    6: {WHITE_AMAZON: [(0, 3), (2, 5), (3, 5), (5, 3)],
+        BLACK_AMAZON: [(0, 2), (2, 0), (3, 0), (5, 2)]},
+    8: {WHITE_AMAZON: [(0, 5), (2, 7), (5, 7), (7, 5)],
+        BLACK_AMAZON: [(0, 2), (2, 0), (5, 0), (7, 2)]},
+    10: {WHITE_AMAZON: [(0, 6), (3, 9), (6, 9), (9, 6)],
+         BLACK_AMAZON: [(0, 3), (3, 0), (6, 0), (9, 3)]},
+}
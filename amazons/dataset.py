@@ -0,0 +1,190 @@
+"""Shuffled training batches from game records
+
+training_batches streams every position of one or more record files as (B, C, H, W) planes from
+amazons.features together with the move played from it and the game's result for the side to move. Games are
+read in a random order and their positions pass through a shuffle buffer of a fixed number of positions, so
+memory stays bounded however many games the files hold while consecutive positions of a game still land in
+different batches. Reading and encoding run in a background thread a few batches ahead of the consumer, and
+most of the work is numpy code that releases the interpreter lock, so the next batches are ready while a
+training step runs.
+
+    for batch in training_batches(["games.amz"], 256, mobility=True, seed=0):
+        loss = train_step(batch.planes, batch.moves, batch.values)
+"""
+from __future__ import annotations
+import queue
+import threading
+import numpy as np
+from dataclasses import dataclass
+from typing import List, Set, Dict, Tuple, Optional, Iterator
+from amazons.constants import *
+from amazons.features import encode
+from amazons.records import GameReader
+
+# positions held by the shuffle buffer, about 100 bytes each on 10x10
+SHUFFLE_POSITIONS: int = 65536
+# encoded batches the background thread may keep ready
+PREFETCH_BATCHES: int = 4
+# seconds the background thread waits on a full queue before checking whether the consumer has gone
+PUT_SECONDS: float = 0.1
+
+_DONE = object()
+
+
+@dataclass
+class TrainingBatch:
+    """ Class for one batch of training positions"""
+    # (B, C, H, W) float32 planes from the side to move
+    planes: np.ndarray
+    # (B, 3) int16 (start, end, burn) square indices of the move played
+    moves: np.ndarray
+    # (B,) float32 result for the side to move, 1 for a win, -1 for a loss and 0 for an unfinished game
+    values: np.ndarray
+
+
+def game_positions(reader: GameReader, game: int) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """Replay a recorded game, white moving first
+    :param reader: the record file
+    :param game: game number in the file
+    :return: the (N, H, W) uint8 state before every move, the (N,) side to move, the (N, 3) int16 moves and the
+        (N,) float32 result for the side to move
+    """
+    state = reader.initial_board(game)._state
+    moves = reader.moves(game)
+    winner = int(reader.header(game)["winner"])
+    states = np.empty((len(moves),) + state.shape, dtype=np.uint8)
+    flat = state.reshape(-1).copy()
+    for ply, (start, end, burn) in enumerate(moves.tolist()):
+        states[ply] = flat.reshape(state.shape)
+        flat[end] = flat[start]
+        flat[start] = EMPTY
+        flat[burn] = BURNT
+    colors = np.where(np.arange(len(moves)) % 2 == 0, WHITE_AMAZON, BLACK_AMAZON).astype(np.uint8)
+    values = np.zeros(len(moves), dtype=np.float32) if winner == EMPTY else \
+        np.where(colors == winner, 1, -1).astype(np.float32)
+    return states, colors, moves, values
+
+
+class _ShuffleBuffer:
+    """ Class for a fixed number of positions that are drawn from at random"""
+    def __init__(self, capacity: int, shape: Tuple[int, int]) -> None:
+        self.capacity: int = capacity
+        self.count: int = 0
+        self.states: np.ndarray = np.empty((capacity,) + shape, dtype=np.uint8)
+        self.colors: np.ndarray = np.empty(capacity, dtype=np.uint8)
+        self.moves: np.ndarray = np.empty((capacity, 3), dtype=np.int16)
+        self.values: np.ndarray = np.empty(capacity, dtype=np.float32)
+
+    def add(self, states: np.ndarray, colors: np.ndarray, moves: np.ndarray, values: np.ndarray) -> None:
+        """Append positions, there must be room for them"""
+        end = self.count + len(states)
+        self.states[self.count:end] = states
+        self.colors[self.count:end] = colors
+        self.moves[self.count:end] = moves
+        self.values[self.count:end] = values
+        self.count = end
+
+    def draw(self, size: int, rng: np.random.Generator) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        """Remove positions picked uniformly at random
+        :param size: number of positions, at most count
+        :param rng: source of randomness
+        :return: copies of the states, colors, moves and values drawn
+        """
+        picks = rng.choice(self.count, size, replace=False)
+        drawn = self.states[picks], self.colors[picks], self.moves[picks], self.values[picks]
+        # the kept positions of the last size slots fill the holes the picks left before them
+        tail = np.ones(size, dtype=bool)
+        tail[picks[picks >= self.count - size] - (self.count - size)] = False
+        holes = picks[picks < self.count - size]
+        kept = np.flatnonzero(tail) + self.count - size
+        for array in [self.states, self.colors, self.moves, self.values]:
+            array[holes] = array[kept]
+        self.count -= size
+        return drawn
+
+
+def _shuffled_batches(paths: List[str], batch_size: int, mobility: bool, territory: bool, shuffle_positions: int,
+                      rng: np.random.Generator) -> Iterator[TrainingBatch]:
+    """Read, shuffle and encode the positions of the record files in the calling thread"""
+    readers = [GameReader(path) for path in paths]
+    games = np.concatenate([np.stack([np.full(len(reader), number), np.arange(len(reader))], axis=1)
+                            for number, reader in enumerate(readers)] + [np.zeros((0, 2), dtype=np.int64)])
+    games = games[rng.permutation(len(games))]
+    buffer: Optional[_ShuffleBuffer] = None
+
+    def emit(size: int) -> TrainingBatch:
+        states, colors, moves, values = buffer.draw(size, rng)
+        return TrainingBatch(encode(states, colors, mobility, territory), moves, values)
+
+    for number, game in games.tolist():
+        states, colors, moves, values = game_positions(readers[number], game)
+        if buffer is None:
+            buffer = _ShuffleBuffer(shuffle_positions, states.shape[1:])
+        elif states.shape[1:] != buffer.states.shape[1:]:
+            raise ValueError(f"game {game} of {paths[number]} is {states.shape[2]}x{states.shape[1]}, not "
+                             f"{buffer.states.shape[2]}x{buffer.states.shape[1]} like the games before it")
+        added = 0
+        while added < len(states):
+            if buffer.count == buffer.capacity:
+                yield emit(batch_size)
+            taken = min(len(states) - added, buffer.capacity - buffer.count)
+            buffer.add(*(array[added:added + taken] for array in [states, colors, moves, values]))
+            added += taken
+    # the last positions too few for a whole batch are left out so every batch has the same size
+    while buffer is not None and buffer.count >= batch_size:
+        yield emit(batch_size)
+
+
+def training_batches(paths: List[str], batch_size: int, mobility: bool = False, territory: bool = False,
+                     shuffle_positions: int = SHUFFLE_POSITIONS, prefetch: int = PREFETCH_BATCHES,
+                     seed: Optional[int] = None) -> Iterator[TrainingBatch]:
+    """Stream one pass over every position of the record files in shuffled, equally sized batches
+    :param paths: record files, all their games must be played on boards of the same size
+    :param batch_size: positions per batch, the positions left over at the end are dropped
+    :param mobility: add the mobility planes of amazons.features
+    :param territory: add the territory plane of amazons.features
+    :param shuffle_positions: positions held in the shuffle buffer, a larger buffer mixes games better
+    :param prefetch: batches the background thread may encode ahead of the consumer
+    :param seed: seed for the game order and the shuffle, equal seeds give equal batches
+    :return: generator of TrainingBatch, closing it stops the background thread
+    """
+    if not 0 < batch_size <= shuffle_positions:
+        raise ValueError(f"batch size {batch_size} must be positive and at most the {shuffle_positions} "
+                         f"positions of the shuffle buffer")
+    ready: queue.Queue = queue.Queue(maxsize=prefetch)
+    stop = threading.Event()
+
+    def put(item: object) -> bool:
+        # give up once the consumer has stopped listening, instead of blocking on a full queue for good
+        while not stop.is_set():
+            try:
+                ready.put(item, timeout=PUT_SECONDS)
+                return True
+            except queue.Full:
+                pass
+        return False
+
+    def produce() -> None:
+        try:
+            for batch in _shuffled_batches(paths, batch_size, mobility, territory, shuffle_positions,
+                                           np.random.default_rng(seed)):
+                if not put(batch):
+                    return
+        except Exception as error:
+            put(error)
+            return
+        put(_DONE)
+
+    thread = threading.Thread(target=produce, daemon=True)
+    thread.start()
+    try:
+        while True:
+            item = ready.get()
+            if item is _DONE:
+                return
+            if isinstance(item, Exception):
+                raise item
+            yield item
+    finally:
+        stop.set()
+        thread.join()
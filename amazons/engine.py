@@ -0,0 +1,277 @@
+from __future__ import annotations
+import time
+import numpy as np
+from dataclasses import dataclass, field
+from typing import List, Set, Dict, Tuple, Optional, Callable
+from amazons.base import Board
+from amazons.book import OpeningBook
+from amazons.constants import *
+from amazons.evaluation import evaluate, evaluate_states
+from amazons.regions import solved_score
+from amazons.transposition import TranspositionTable, EXACT, LOWER_BOUND, UPPER_BOUND
+from amazons.zobrist import zobrist_keys
+
+# score of a side to move that has no legal move; losses further from the root score slightly higher
+WIN_SCORE: float = 100000.0
+NO_MOVE: Tuple[int, int, int] = (-1, -1, -1)
+# children scored in the first batch one ply above the leaves, each later batch is twice as large
+FIRST_LEAF_BATCH: int = 32
+# interior nodes at least two plies above the leaves try the region solver once at most this many squares are empty
+SOLVE_MAX_EMPTY: int = 30
+
+
+@dataclass
+class SearchResult:
+    """ Class for reporting what a search found"""
+    move: Optional[Tuple[int, int, int]]
+    score: float
+    principal_variation: List[Tuple[int, int, int]] = field(default_factory=list)
+    depth: int = 0
+    nodes: int = 0
+    elapsed: float = 0.0
+    from_book: bool = False
+
+    @property
+    def nodes_per_second(self) -> float:
+        """Search speed over the whole search"""
+        return self.nodes / self.elapsed if self.elapsed > 0 else 0.0
+
+
+class _OutOfBudget(Exception):
+    """Raised inside a search to unwind it once the time or node budget is spent"""
+
+
+class Engine:
+    """ Negamax alpha-beta searcher with iterative deepening
+
+    Moves are (start, end, burn) square indices as returned by Board.legal_moves. The transposition table and
+    the history heuristic persist between searches, so consecutive searches of a game reuse earlier work.
+    When evaluate_batch is given, nodes one ply above the leaves score all their children in a single call.
+    When a book is given, positions it knows are answered from it without searching.
+    """
+    def __init__(self, table_megabytes: float = 64,
+                 evaluate: Callable[[Board, int], float] = evaluate,
+                 evaluate_batch: Optional[Callable[[np.ndarray, int], np.ndarray]] = evaluate_states,
+                 book: Optional[OpeningBook] = None) -> None:
+        self.table: TranspositionTable = TranspositionTable.from_megabytes(table_megabytes)
+        self.evaluate: Callable[[Board, int], float] = evaluate
+        self.evaluate_batch: Optional[Callable[[np.ndarray, int], np.ndarray]] = evaluate_batch
+        self.book: Optional[OpeningBook] = book
+        # history heuristic scores for (start, end) and (end, burn) pairs that caused cutoffs
+        self._move_history: np.ndarray = np.zeros((0, 0), dtype=np.int64)
+        self._burn_history: np.ndarray = np.zeros((0, 0), dtype=np.int64)
+        self._nodes: int = 0
+        self._deadline: Optional[float] = None
+        self._node_limit: Optional[int] = None
+        self._stop: Optional[Callable[[], bool]] = None
+        self._side_key: int = 0
+        self._pv: List[List[Tuple[int, int, int]]] = []
+        self._root_best: Optional[Tuple[int, int, int]] = None
+
+    def search(self, board: Board, color: int, max_depth: int = 64, time_limit: Optional[float] = None,
+               node_limit: Optional[int] = None,
+               callback: Optional[Callable[[SearchResult], None]] = None,
+               stop: Optional[Callable[[], bool]] = None) -> SearchResult:
+        """Find the best move for one side, searching one ply deeper at a time until the budget runs out
+        :param board: position to search, it is restored before returning
+        :param color: side to move, WHITE_AMAZON or BLACK_AMAZON
+        :param max_depth: deepest iteration to run
+        :param time_limit: seconds the search may take, or None for no limit
+        :param node_limit: nodes the search may visit, or None for no limit
+        :param callback: called with the result of every completed iteration
+        :param stop: polled at every node, the search ends as if out of budget once it returns True
+        :return: the book move if the book has one, else the result of the deepest completed iteration, or the
+            best move of the first iteration so far if even that could not complete, or the first legal move in
+            search order with a static score if no move was scored at all; the move is None only if there is no
+            legal move
+        """
+        started = time.perf_counter()
+        if self.book is not None:
+            move = self.book.best_move(board, color)
+            if move is not None:
+                return SearchResult(move, self.evaluate(board, color), [move], from_book=True,
+                                    elapsed=time.perf_counter() - started)
+        self._nodes = 0
+        self._deadline = None if time_limit is None else started + time_limit
+        self._node_limit = node_limit
+        self._stop = stop
+        self._side_key = zobrist_keys(board.width, board.height).side
+        self._root_best = None
+        squares = board.width * board.height
+        if self._move_history.shape != (squares, squares):
+            self._move_history = np.zeros((squares, squares), dtype=np.int64)
+            self._burn_history = np.zeros((squares, squares), dtype=np.int64)
+        else:
+            # age the history so this position's cutoffs soon outweigh those of older searches
+            self._move_history >>= 1
+            self._burn_history >>= 1
+
+        result = SearchResult(None, -WIN_SCORE)
+        for depth in range(1, max_depth + 1):
+            self._pv = [[] for _ in range(depth + 1)]
+            try:
+                score = self._negamax(board, color, depth, -np.inf, np.inf, 0)
+            except _OutOfBudget:
+                if result.move is None and self._root_best is not None:
+                    result.move = self._root_best
+                    result.principal_variation = [self._root_best]
+                break
+            result = SearchResult(self._pv[0][0] if self._pv[0] else None, score, self._pv[0], depth)
+            result.nodes, result.elapsed = self._nodes, time.perf_counter() - started
+            if callback is not None:
+                callback(result)
+            # stop once there are no moves or the game is decided within the search horizon
+            if result.move is None or abs(score) > WIN_SCORE / 2:
+                break
+        if result.move is None:
+            # the budget ran out before any root move was scored, so play the first move in search order
+            moves = board.legal_moves(color)
+            if len(moves):
+                result.move = tuple(self._order(moves, None)[0].tolist())
+                result.principal_variation = [result.move]
+                result.score = self.evaluate(board, color)
+        result.nodes, result.elapsed = self._nodes, time.perf_counter() - started
+        return result
+
+    def _check_budget(self, upcoming: int = 0) -> None:
+        """Stop the search once the time is up, the next nodes would go over the node budget or it is stopped
+        :param upcoming: nodes about to be visited in addition to those already counted
+        """
+        if self._node_limit is not None and self._nodes + upcoming > self._node_limit:
+            raise _OutOfBudget()
+        if self._deadline is not None and time.perf_counter() > self._deadline:
+            raise _OutOfBudget()
+        if self._stop is not None and self._stop():
+            raise _OutOfBudget()
+
+    def _order(self, moves: np.ndarray, first: Optional[Tuple[int, int, int]]) -> np.ndarray:
+        """Order moves by the history heuristic, optionally putting one move first
+        :param moves: (N, 3) array of moves
+        :param first: move to search first, normally the transposition table move
+        :return: the reordered (N, 3) array, most promising first
+        """
+        scores = self._move_history[moves[:, 0], moves[:, 1]] + self._burn_history[moves[:, 1], moves[:, 2]]
+        ordered = moves[np.argsort(-scores, kind="stable")]
+        if first is not None:
+            match = np.flatnonzero((ordered == first).all(axis=1))
+            if match.size:
+                ordered = np.concatenate([ordered[match], np.delete(ordered, match, axis=0)])
+        return ordered
+
+    def _evaluate_children(self, board: Board, color: int, moves: np.ndarray, beta: float,
+                           ply: int) -> Tuple[float, Tuple[int, int, int]]:
+        """Score the children of a node one ply above the leaves with batched evaluations
+        Children are scored in ordered chunks that double in size, so a good early move still cuts off the rest.
+        :param board: the position
+        :param color: side to move
+        :param moves: ordered legal moves of the position
+        :param beta: score the opponent is already guaranteed, as seen by the side to move
+        :param ply: distance from the root
+        :return: the best score found for the side to move and its move
+        """
+        best_score, best_move = -np.inf, NO_MOVE
+        start, size = 0, FIRST_LEAF_BATCH
+        while start < len(moves):
+            batch = moves[start:start + size]
+            self._check_budget(len(batch))
+            self._nodes += len(batch)
+            children = np.repeat(board._state.reshape(1, -1), len(batch), axis=0)
+            rows = np.arange(len(batch))
+            children[rows, batch[:, 0]] = EMPTY
+            children[rows, batch[:, 1]] = color
+            children[rows, batch[:, 2]] = BURNT
+            scores = -self.evaluate_batch(children.reshape(-1, board.height, board.width), OPPONENT[color])
+            best = int(np.argmax(scores))
+            if scores[best] > best_score:
+                best_score, best_move = float(scores[best]), tuple(batch[best].tolist())
+                self._pv[ply] = [best_move]
+                if ply == 0:
+                    self._root_best = best_move
+            if best_score >= beta:
+                self._move_history[best_move[0], best_move[1]] += 1
+                self._burn_history[best_move[1], best_move[2]] += 1
+                break
+            start += size
+            size *= 2
+        return best_score, best_move
+
+    def _negamax(self, board: Board, color: int, depth: int, alpha: float, beta: float, ply: int) -> float:
+        """Search a position with alpha-beta pruning
+        :param board: the position, pushed moves are always popped again
+        :param color: side to move
+        :param depth: remaining plies to search
+        :param alpha: score the side to move is already guaranteed
+        :param beta: score the opponent is already guaranteed, as seen by the side to move
+        :param ply: distance from the root
+        :return: the score for the side to move
+        """
+        self._nodes += 1
+        self._check_budget()
+        self._pv[ply] = []
+        if depth == 0:
+            return self.evaluate(board, color)
+
+        key = board.zobrist_hash ^ (self._side_key if color == BLACK_AMAZON else 0)
+        original_alpha = alpha
+        tt_move = None
+        entry = self.table.probe(key)
+        if entry is not None:
+            score, stored_depth, flag, move = entry
+            tt_move = move if move != NO_MOVE else None
+            if stored_depth >= depth and ply > 0:
+                if flag == EXACT:
+                    return score
+                if flag == LOWER_BOUND:
+                    alpha = max(alpha, score)
+                elif flag == UPPER_BOUND:
+                    beta = min(beta, score)
+                if alpha >= beta:
+                    return score
+
+        if ply > 0 and depth >= 2 and np.count_nonzero(board._state == EMPTY) <= SOLVE_MAX_EMPTY:
+            exact = solved_score(board, color)
+            if exact is not None:
+                self.table.store(key, depth, exact, EXACT, NO_MOVE)
+                return exact
+
+        moves = board.legal_moves(color)
+        if len(moves) == 0:
+            return -WIN_SCORE + ply
+        moves = self._order(moves, tt_move)
+        if depth == 1 and self.evaluate_batch is not None:
+            best_score, best_move = self._evaluate_children(board, color, moves, beta, ply)
+            self.table.store(key, depth, best_score, self._bound(best_score, original_alpha, beta), best_move)
+            return best_score
+
+        best_score, best_move = -np.inf, NO_MOVE
+        for move in map(tuple, moves.tolist()):
+            board.push(move)
+            try:
+                score = -self._negamax(board, OPPONENT[color], depth - 1, -beta, -alpha, ply + 1)
+            finally:
+                board.pop()
+            if score > best_score:
+                best_score, best_move = score, move
+                self._pv[ply] = [move] + self._pv[ply + 1]
+                if ply == 0:
+                    self._root_best = move
+            if score > alpha:
+                alpha = score
+            if alpha >= beta:
+                self._move_history[move[0], move[1]] += depth * depth
+                self._burn_history[move[1], move[2]] += depth * depth
+                break
+
+        self.table.store(key, depth, best_score, self._bound(best_score, original_alpha, beta), best_move)
+        return best_score
+
+    @staticmethod
+    def _bound(score: float, alpha: float, beta: float) -> int:
+        """Classify a score found with an (alpha, beta) window for the transposition table
+        :return: UPPER_BOUND if it failed low, LOWER_BOUND if it failed high, otherwise EXACT
+        """
+        if score <= alpha:
+            return UPPER_BOUND
+        if score >= beta:
+            return LOWER_BOUND
+        return EXACT
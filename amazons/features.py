@@ -0,0 +1,63 @@
+"""Feature planes for neural networks
+
+encode turns one board or a stack of states into a (B, C, H, W) float32 array of planes, all from the point of
+view of the side to move, so a network sees its own amazons in the same plane whichever color it plays. The
+four base planes one-hot encode every square. The optional planes reuse the distance searches of
+amazons.evaluation, batched over the whole stack.
+"""
+from __future__ import annotations
+import numpy as np
+from typing import List, Set, Dict, Tuple, Optional, Union
+from amazons.base import Board
+from amazons.constants import *
+from amazons.evaluation import distances, _as_states
+
+BASE_PLANES: List[str] = ["empty", "burnt", "own", "opponent"]
+# 1 on the squares each side reaches in one queen move
+MOBILITY_PLANES: List[str] = ["own mobility", "opponent mobility"]
+# 1 on empty squares the side to move reaches first by queen moves, -1 where the opponent does, 0 otherwise
+TERRITORY_PLANES: List[str] = ["territory"]
+
+
+def plane_names(mobility: bool = False, territory: bool = False) -> List[str]:
+    """Name the planes encode produces
+    :param mobility: whether the mobility planes are included
+    :param territory: whether the territory plane is included
+    :return: one name per plane, in order
+    """
+    return BASE_PLANES + (MOBILITY_PLANES if mobility else []) + (TERRITORY_PLANES if territory else [])
+
+
+def encode(position: Union[Board, np.ndarray], color: Union[int, np.ndarray], mobility: bool = False,
+           territory: bool = False) -> np.ndarray:
+    """Encode positions as stacked feature planes
+    :param position: a Board, a (H, W) state or a (B, H, W) stack of states of the same size
+    :param color: the side to move, either one color for every position or a (B,) array of colors
+    :param mobility: add the MOBILITY_PLANES
+    :param territory: add the TERRITORY_PLANES
+    :return: (B, C, H, W) float32 planes, C being len(plane_names(mobility, territory))
+    """
+    states = _as_states(position)
+    boards, height, width = states.shape
+    own = np.broadcast_to(np.asarray(color, dtype=np.uint8), (boards,))
+    opponent = np.where(own == WHITE_AMAZON, BLACK_AMAZON, WHITE_AMAZON).astype(np.uint8)
+    # (B, 4) value of each base plane, compared against every square at once
+    values = np.stack([np.full(boards, EMPTY, dtype=np.uint8), np.full(boards, BURNT, dtype=np.uint8),
+                       own, opponent], axis=1)
+    planes = np.empty((boards, len(plane_names(mobility, territory)), height, width), dtype=np.float32)
+    np.equal(states[:, None], values[:, :, None, None], out=planes[:, :len(BASE_PLANES)], casting="unsafe")
+    if mobility or territory:
+        # search for both sides at once, the first B boards from the side to move and the last B from its opponent
+        both = np.concatenate([states, states])
+        sources = np.concatenate([planes[:, 2], planes[:, 3]]).astype(bool)
+        # mobility alone only needs the squares one move away
+        queen = distances(both, sources, queen=True, limit=None if territory else 1)
+        own_queen, other_queen = queen[:boards], queen[boards:]
+        plane = len(BASE_PLANES)
+        if mobility:
+            planes[:, plane] = own_queen == 1
+            planes[:, plane + 1] = other_queen == 1
+            plane += len(MOBILITY_PLANES)
+        if territory:
+            planes[:, plane] = np.sign(other_queen.astype(np.int16) - own_queen.astype(np.int16)) * planes[:, 0]
+    return planes
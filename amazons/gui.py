@@ -3,29 +3,51 @@ import pygame
 from pygame.locals import *
 from amazons.constants import *
 from amazons.base import Coordinate
+from amazons.worker import EngineWorker
 import numpy as np
 import sys
 
+# seconds the engine may think when asked for a hint the opening book cannot give
+HINT_SECONDS = 1.0
+# seconds the engine thinks about each of its own moves
+THINK_SECONDS = 5.0
+
 
 class GUI:
-    def __init__(self, board, display_surface):
+    def __init__(self, board, display_surface, book=None, engine_color=None, think_seconds=THINK_SECONDS):
         # save the board and display surface
         self.display_surface = display_surface
         self.board = board
+        # the side whose amazons may be moved
+        self.to_move = WHITE_AMAZON
 
-        # calculate the grid size based on the board size and display size
-        self.grid_size = int(np.min([self.display_surface.get_size()[0] / self.board.width,
-                                     self.display_surface.get_size()[1] / self.board.height]))
+        # the engine searches in its own process, so the event loop never waits for it; it plays engine_color,
+        # or nobody if that is None, gives the hints and consults the opening book first
+        self.engine = EngineWorker(book_path=None if book is None else book.path)
+        self.engine_color = engine_color
+        self.think_seconds = think_seconds
+        # what the engine's current job is for: None, "hint", "move" or "ponder"
+        self._engine_task = None
+        # the suggested (start, end, burn) move that is highlighted, if any
+        self.hint_move = None
 
-        # load the amazon images
+        # load the amazon images, they are only ever scaled from these originals
         assets_root = Path.cwd() / "assets"
-        self.white_amazon_image = pygame.image.load(assets_root / "icons8-queen-100_white.png")
-        self.black_amazon_image = pygame.image.load(assets_root / "icons8-queen-100_black.png")
+        self.white_amazon_original = pygame.image.load(assets_root / "icons8-queen-100_white.png")
+        self.black_amazon_original = pygame.image.load(assets_root / "icons8-queen-100_black.png")
+        # scaled (white, black) images keyed by grid size
+        self._sprites = {}
+
+        # the squares without pieces, redrawn only when the window is resized and patched when a square burns
+        self._background = None
+        # the display size the background and grid size were made for
+        self._display_size = None
+        # screen areas that changed since the last frame
+        self._dirty = []
 
         # keep track of the rectangles the represent the amazons on the board so that we can drag them
         self.white_amazon_rects = []
         self.black_amazon_rects = []
-        self._initialize_pieces()
 
         # dragging is the state you're in when a piece has been selected but not yet placed on its end position
         self.dragging = False
@@ -45,49 +67,90 @@ class GUI:
         # the selected burn square
         self.burn = None
 
+        # size the board to the display, which also places the pieces
+        self._update_grid_size()
+        self._start_turn()
+
+    def _square_rect(self, square) -> pygame.Rect:
+        """Get the screen area of a square
+        :param square: an (x, y) square position
+        :return: the rectangle the square covers
+        """
+        return pygame.Rect(self.grid_size * square[0], self.grid_size * square[1], self.grid_size, self.grid_size)
+
+    def _draw_square(self, square) -> None:
+        """Draw one square of the board onto the background
+        :param square: an (x, y) square position
+        """
+        x, y = square
+        pygame.draw.rect(self._background,
+                         DARK_RED if self.board._state[y, x] == BURNT else (LIGHT_GREY if x % 2 == y % 2 else WHITE),
+                         self._square_rect(square))
+
     def _draw_board(self) -> None:
-        """Draw the board """
-        # simply iterates over the coordinates and draws rectangle of grid_size by grid_size with the appropriate color
-        for i in np.arange(0, self.board.width):
-            for j in np.arange(0, self.board.height):
-                x = self.grid_size * i
-                y = self.grid_size * j
-                pygame.draw.rect(self.display_surface,
-                                 DARK_RED if self.board.get_square_value(Coordinate(i, j)) == BURNT
-                                 else (LIGHT_GREY if i % 2 == j % 2 else WHITE),
-                                 (x, y, self.grid_size, self.grid_size))
+        """Draw the whole board onto a fresh background """
+        self._background = pygame.Surface(self.display_surface.get_size())
+        self._background.fill(BLACK)
+        for y in range(self.board.height):
+            for x in range(self.board.width):
+                self._draw_square((x, y))
 
     def _initialize_pieces(self):
-        """Initially draw the pieces on the board"""
-        self.white_amazon_rects = []
-        self.black_amazon_rects = []
+        """Place the rectangles of the pieces on their squares"""
+        self.white_amazon_rects = [self._square_rect((x, y))
+                                   for y, x in zip(*self.board.get_white_amazon_positions())]
+        self.black_amazon_rects = [self._square_rect((x, y))
+                                   for y, x in zip(*self.board.get_black_amazon_positions())]
 
-        # iterate over the white amazon positions and blit their images
-        for i, j in zip(*self.board.get_white_amazon_positions()):
-            x = self.grid_size * i
-            y = self.grid_size * j
-            self.white_amazon_rects.append(self.display_surface.blit(self.white_amazon_image, (y, x)))
+    @property
+    def white_amazon_image(self):
+        """The white amazon image scaled to the current grid size"""
+        return self._sprites[self.grid_size][0]
 
-        # iterate over the black amazon positions and blit their images
-        for i, j in zip(*self.board.get_black_amazon_positions()):
-            x = self.grid_size * i
-            y = self.grid_size * j
-            self.black_amazon_rects.append(self.display_surface.blit(self.black_amazon_image, (y, x)))
+    @property
+    def black_amazon_image(self):
+        """The black amazon image scaled to the current grid size"""
+        return self._sprites[self.grid_size][1]
 
-    def _draw_pieces(self):
-        """Called on any piece update, draw the pieces based on their current rectangle coordinates"""
-        for rect in self.white_amazon_rects:
-            self.display_surface.blit(self.white_amazon_image, rect)
+    def _update_grid_size(self):
+        """Update the grid size, background and pieces if the display has been resized"""
+        size = self.display_surface.get_size()
+        if size == self._display_size:
+            return
+        self._display_size = size
+        self.grid_size = int(np.min([size[0] / self.board.width, size[1] / self.board.height]))
+        if self.grid_size not in self._sprites:
+            self._sprites[self.grid_size] = tuple(
+                pygame.transform.smoothscale(image, (self.grid_size, self.grid_size)).convert_alpha()
+                for image in (self.white_amazon_original, self.black_amazon_original))
+        self._draw_board()
+        # a resize drops a half made drag, the board still has every piece on its square
+        if self.dragging:
+            self.dragging, self.selected, self.start = False, None, None
+        self._initialize_pieces()
+        self._dirty = [self.display_surface.get_rect()]
 
-        for rect in self.black_amazon_rects:
-            self.display_surface.blit(self.black_amazon_image, rect)
+    def _mark_dirty(self, area) -> None:
+        """Remember that part of the screen has to be redrawn
+        :param area: a rectangle, or an (x, y) square position
+        """
+        self._dirty.append(area.copy() if isinstance(area, pygame.Rect) else self._square_rect(area))
 
-    def _update_grid_size(self):
-        """Update the grid size if the display has been resized"""
-        self.grid_size = int(np.min([self.display_surface.get_size()[0] / self.board.width,
-                                     self.display_surface.get_size()[1] / self.board.height]))
-        self.white_amazon_image = pygame.transform.scale(self.white_amazon_image, (self.grid_size, self.grid_size))
-        self.black_amazon_image = pygame.transform.scale(self.black_amazon_image, (self.grid_size, self.grid_size))
+    def _draw_pieces(self, area):
+        """Draw the pieces that overlap an area, the dragged piece last so it stays on top
+        :param area: the rectangle being redrawn
+        """
+        self.display_surface.set_clip(area)
+        for rects, image in ((self.white_amazon_rects, self.white_amazon_image),
+                             (self.black_amazon_rects, self.black_amazon_image)):
+            for rect in rects:
+                if rect is not self.selected and rect.colliderect(area):
+                    self.display_surface.blit(image, rect)
+        if self.selected is not None and self.selected.colliderect(area):
+            image = (self.white_amazon_image if any(rect is self.selected for rect in self.white_amazon_rects)
+                     else self.black_amazon_image)
+            self.display_surface.blit(image, self.selected)
+        self.display_surface.set_clip(None)
 
     def _calculate_closest_square(self, position):
         """Determine the closest square coordinate on the board given a mouse position
@@ -100,30 +163,129 @@ class GUI:
         """ Centers the selected rectangle to the center of the specified square
         :param square: a coordinate for a square position
         """
+        self._mark_dirty(self.selected)
         x = self.grid_size * square[0]
         y = self.grid_size * square[1]
         self.selected.x = x
         self.selected.y = y
+        self._mark_dirty(self.selected)
+
+    def _draw_hint(self, area):
+        """Outline the start, end and burn squares of the suggested move that overlap an area
+        :param area: the rectangle being redrawn
+        """
+        if self.hint_move is None:
+            return
+        self.display_surface.set_clip(area)
+        for index, color in zip(self.hint_move, (BLUE, GREEN, RED)):
+            y, x = divmod(index, self.board.width)
+            pygame.draw.rect(self.display_surface, color, self._square_rect((x, y)), width=4)
+        self.display_surface.set_clip(None)
+
+    def _set_hint(self, move) -> None:
+        """Replace the highlighted move
+        :param move: the new (start, end, burn) move or None to clear it
+        """
+        for hint in (self.hint_move, move):
+            if hint is not None:
+                for index in hint:
+                    self._mark_dirty(divmod(index, self.board.width)[::-1])
+        self.hint_move = move
+
+    def hint(self) -> None:
+        """Start looking for a move for the side to move, the best move so far is highlighted as it improves"""
+        self.engine.search(self.board, self.to_move, time_limit=HINT_SECONDS)
+        self._engine_task = "hint"
+
+    def _start_turn(self) -> None:
+        """Set the engine to work for the side to move: thinking about its own move or pondering the human's"""
+        if self.engine_color is None:
+            self.engine.cancel()
+            self._engine_task = None
+        elif self.to_move == self.engine_color:
+            self.engine.search(self.board, self.to_move, time_limit=self.think_seconds)
+            self._engine_task = "move"
+            pygame.display.set_caption("Game of the Amazons - thinking")
+        else:
+            self.engine.ponder(self.board, self.to_move)
+            self._engine_task = "ponder"
+            pygame.display.set_caption("Game of the Amazons - your move")
+
+    def _play_engine_move(self, move) -> None:
+        """Play the engine's move on the board and the display
+        :param move: (start, end, burn) square indices, or None if the engine has no move
+        """
+        self._set_hint(None)
+        if move is None:
+            pygame.display.set_caption("Game of the Amazons - game over")
+            self._engine_task = None
+            return
+        self.board.push(move)
+        for index in move:
+            square = divmod(index, self.board.width)[::-1]
+            self._draw_square(square)
+            self._mark_dirty(square)
+        self._initialize_pieces()
+        self.to_move = OPPONENT[self.to_move]
+        print(self.board)
+        self._start_turn()
+
+    def _poll_engine(self) -> None:
+        """Take whatever the engine has found since the last frame, without waiting for it"""
+        for update in self.engine.poll():
+            if self._engine_task in ("hint", "move") and update.result.move is not None:
+                self._set_hint(update.result.move)
+                pygame.display.set_caption(f"Game of the Amazons - depth {update.result.depth}, "
+                                           f"score {update.result.score:.1f}")
+            if update.done and self._engine_task == "move":
+                self._play_engine_move(update.result.move)
+            elif update.done and self._engine_task == "hint":
+                print(f"hint: {self.hint_move}")
+                self._engine_task = None
 
     def update(self):
-        """ Called each tick to update the gui display"""
+        """ Called each tick to redraw and show only the parts of the display that changed"""
+        self._poll_engine()
         self._update_grid_size()
-        self._draw_board()
-        self._draw_pieces()
-        pygame.display.flip()
+        if not self._dirty:
+            return
+        for area in self._dirty:
+            self.display_surface.blit(self._background, area, area)
+            self._draw_pieces(area)
+            self._draw_hint(area)
+        pygame.display.update(self._dirty)
+        self._dirty = []
 
     def event_handler(self):
         """ Handles the control of the board """
         for event in pygame.event.get():
             # for the quit event, exit and close
             if event.type == QUIT:
+                self.engine.close()
                 pygame.quit()
                 sys.exit()
+            # the display surface has its new size by now, update redraws everything for it
+            elif event.type == VIDEORESIZE:
+                self._display_size = None
+            # after being covered or restored the whole window has to be shown again
+            elif event.type == VIDEOEXPOSE:
+                self._mark_dirty(self.display_surface.get_rect())
+            # pressing h asks for a hint, unless a move is half made or it is the engine's turn
+            elif event.type == KEYDOWN and event.key == K_h:
+                if not self.dragging and not self.burning and self.to_move != self.engine_color:
+                    self.hint()
+            # the human's turn waits while the engine is thinking about its own move
+            elif event.type == MOUSEBUTTONDOWN and event.button == 1 and self.to_move == self.engine_color:
+                pass
             # for a left click event
             elif event.type == MOUSEBUTTONDOWN and event.button == 1:
+                # starting a move cancels a hint that is still being looked for
+                if self._engine_task == "hint":
+                    self._start_turn()
                 if not self.burning:  # an amazon is being selected
-                    # find the appropriate amazon that ios being selected
-                    for amazon_rect in self.white_amazon_rects + self.black_amazon_rects:
+                    # find the appropriate amazon that ios being selected, only the side to move may move
+                    for amazon_rect in (self.white_amazon_rects if self.to_move == WHITE_AMAZON
+                                        else self.black_amazon_rects):
                         if amazon_rect.collidepoint(event.pos):
                             # save the state information about which amazon is being selected and the mouse offsets
                             self.dragging = True
@@ -139,9 +301,14 @@ class GUI:
                     if self.board.empty_between_squares(Coordinate(*self.end), Coordinate(*self.burn),
                                                         include_end=True):
                         self.board.burn(Coordinate(*self.burn))
+                        self._draw_square(self.burn)
+                        self._mark_dirty(self.burn)
                         self.start, self.end, self.burn = None, None, None
                         self.burning = False
+                        self.to_move = OPPONENT[self.to_move]
+                        self._set_hint(None)
                         print(self.board)
+                        self._start_turn()
                     else:  # wasn't a valid burn square so just reset the burn and wait for another selection
                         self.burn = None
             # for a left mouse up event
@@ -167,5 +334,7 @@ class GUI:
             # for a dragging event
             elif event.type == MOUSEMOTION:
                 if self.dragging:  # someone is determining where to place an amazon
+                    self._mark_dirty(self.selected)
                     self.selected.x = event.pos[0] + self.offset_x
                     self.selected.y = event.pos[1] + self.offset_y
+                    self._mark_dirty(self.selected)
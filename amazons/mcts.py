@@ -0,0 +1,362 @@
+from __future__ import annotations
+import math
+import multiprocessing
+import threading
+import time
+import numpy as np
+from dataclasses import dataclass, field
+from typing import List, Set, Dict, Tuple, Optional
+from amazons.base import Board
+from amazons.constants import *
+from amazons.evaluation import evaluate
+from amazons.regions import SOLVED_SCORE
+
+# evaluation score that a rollout turns into a 73% chance of winning, see _win_probability
+ROLLOUT_SCORE_SCALE: float = 10.0
+
+
+def random_move(board: Board, color: int, rng: np.random.Generator) -> Optional[Tuple[int, int, int]]:
+    """Pick a random legal move without generating every move: a random amazon, end square and burn square
+    :param board: the position
+    :param color: side to move
+    :param rng: source of randomness
+    :return: a (start, end, burn) move, or None if the side to move has no legal move
+    """
+    padded = board._padded_state()
+    amazons = np.flatnonzero(padded == color)
+    for start in amazons[rng.permutation(len(amazons))]:
+        rays, reachable = board._open_rays(start, padded)
+        ends = rays[reachable]
+        if ends.size:
+            end = ends[rng.integers(ends.size)]
+            # the start square is always a legal burn, so there is at least one
+            padded[start] = EMPTY
+            rays, reachable = board._open_rays(end, padded)
+            burns = rays[reachable]
+            return int(start), int(end), int(burns[rng.integers(burns.size)])
+    return None
+
+
+def _win_probability(score: float) -> float:
+    if abs(score) >= SOLVED_SCORE:
+        # the regions are solved, so the result is known
+        return 1.0 if score > 0 else 0.0
+    return 1.0 / (1.0 + math.exp(-score / ROLLOUT_SCORE_SCALE))
+
+
+class NodeStore:
+    """ Class for the nodes of a search tree kept in flat arrays that double in size when full
+
+    Node 0 is the root. The value of a node is the total result of its playouts for the side that moved into it.
+    The children of a node are the child_ids entries first_child[node] to first_child[node] + child_count[node];
+    a full block of child ids is moved to the end of child_ids with twice the room. Legal moves are not kept:
+    the i-th child of a node plays legal move (move_offset + i * move_step) % legal_count of the regenerated
+    legal moves, with a step coprime to legal_count, so every move is tried once in a random looking order.
+    """
+    def __init__(self, capacity: int = 1024) -> None:
+        self.size: int = 0
+        self.parent: np.ndarray = np.zeros(capacity, dtype=np.int32)
+        self.move: np.ndarray = np.zeros((capacity, 3), dtype=np.int16)
+        self.to_move: np.ndarray = np.zeros(capacity, dtype=np.uint8)
+        self.visits: np.ndarray = np.zeros(capacity, dtype=np.int32)
+        self.value: np.ndarray = np.zeros(capacity, dtype=np.float64)
+        self.virtual_loss: np.ndarray = np.zeros(capacity, dtype=np.int32)
+        # -1 until the node's legal moves have been counted
+        self.legal_count: np.ndarray = np.zeros(capacity, dtype=np.int32)
+        self.move_offset: np.ndarray = np.zeros(capacity, dtype=np.int32)
+        self.move_step: np.ndarray = np.zeros(capacity, dtype=np.int32)
+        self.first_child: np.ndarray = np.zeros(capacity, dtype=np.int32)
+        self.child_count: np.ndarray = np.zeros(capacity, dtype=np.int32)
+        self.child_room: np.ndarray = np.zeros(capacity, dtype=np.int32)
+        self.child_ids: np.ndarray = np.zeros(capacity, dtype=np.int32)
+        self.child_ids_used: int = 0
+
+    _NODE_ARRAYS: List[str] = ["parent", "move", "to_move", "visits", "value", "virtual_loss", "legal_count",
+                               "move_offset", "move_step", "first_child", "child_count", "child_room"]
+
+    @staticmethod
+    def _grown(array: np.ndarray, length: int) -> np.ndarray:
+        grown = np.zeros((max(length, 2 * len(array)),) + array.shape[1:], dtype=array.dtype)
+        grown[:len(array)] = array
+        return grown
+
+    def add(self, parent: int, move: Tuple[int, int, int], to_move: int) -> int:
+        """Add a node
+        :param parent: id of the parent node, -1 for the root
+        :param move: move leading from the parent to the node
+        :param to_move: side to move at the node
+        :return: the id of the new node
+        """
+        if self.size == len(self.parent):
+            for name in self._NODE_ARRAYS:
+                setattr(self, name, self._grown(getattr(self, name), self.size + 1))
+        node = self.size
+        self.size += 1
+        self.parent[node] = parent
+        self.move[node] = move
+        self.to_move[node] = to_move
+        self.visits[node] = 0
+        self.value[node] = 0.0
+        self.virtual_loss[node] = 0
+        self.legal_count[node] = -1
+        self.child_count[node] = 0
+        self.child_room[node] = 0
+        if parent >= 0:
+            self._append_child(parent, node)
+        return node
+
+    def _append_child(self, parent: int, node: int) -> None:
+        count = int(self.child_count[parent])
+        if count == self.child_room[parent]:
+            room = max(2, 2 * count)
+            if self.child_ids_used + room > len(self.child_ids):
+                self.child_ids = self._grown(self.child_ids, self.child_ids_used + room)
+            first = int(self.first_child[parent])
+            self.child_ids[self.child_ids_used:self.child_ids_used + count] = self.child_ids[first:first + count]
+            self.first_child[parent] = self.child_ids_used
+            self.child_room[parent] = room
+            self.child_ids_used += room
+        self.child_ids[self.first_child[parent] + count] = node
+        self.child_count[parent] = count + 1
+
+    def children(self, node: int) -> np.ndarray:
+        """Get the ids of a node's children
+        :param node: the node
+        :return: a view of the child ids, in the order they were added
+        """
+        first = self.first_child[node]
+        return self.child_ids[first:first + self.child_count[node]]
+
+    def count_moves(self, node: int, legal_count: int, rng: np.random.Generator) -> None:
+        """Record how many legal moves a node has and pick the order they become children in
+        :param node: the node
+        :param legal_count: number of legal moves of the side to move at the node
+        :param rng: source of randomness for the order
+        """
+        self.legal_count[node] = legal_count
+        if legal_count:
+            step = int(rng.integers(1, legal_count + 1))
+            while math.gcd(step, legal_count) != 1:
+                step -= 1
+            self.move_offset[node] = rng.integers(legal_count)
+            self.move_step[node] = step
+
+    def move_index(self, node: int, child: int) -> int:
+        """Find which legal move a node's child plays
+        :param node: the node
+        :param child: number of the child, 0 for the first one added
+        :return: index into the node's legal moves
+        """
+        return (int(self.move_offset[node]) + child * int(self.move_step[node])) % int(self.legal_count[node])
+
+    @property
+    def nbytes(self) -> int:
+        """Memory held by the tree in bytes"""
+        return sum(getattr(self, name).nbytes for name in self._NODE_ARRAYS) + self.child_ids.nbytes
+
+
+@dataclass
+class MCTSResult:
+    """ Class for reporting what a tree search found"""
+    move: Optional[Tuple[int, int, int]]
+    win_rate: float
+    playouts: int
+    elapsed: float
+    nodes: int
+    bytes_per_node: float
+    root_moves: np.ndarray = field(default_factory=lambda: np.zeros((0, 3), dtype=np.int16))
+    root_visits: np.ndarray = field(default_factory=lambda: np.zeros(0, dtype=np.int32))
+    root_values: np.ndarray = field(default_factory=lambda: np.zeros(0, dtype=np.float64))
+
+    @property
+    def playouts_per_second(self) -> float:
+        return self.playouts / self.elapsed if self.elapsed > 0 else 0.0
+
+
+class MCTS:
+    """ Monte Carlo tree search with UCT selection and progressive widening
+
+    A node with n visits may have at most ceil(widening_constant * n ** widening_exponent) children, taken from
+    its legal moves in a random order, so the tree deepens despite thousands of legal moves per position.
+    Each playout plays rollout_plies random moves and then turns the evaluation of the position into a result.
+    """
+    def __init__(self, exploration: float = 0.5, widening_constant: float = 2.0, widening_exponent: float = 0.5,
+                 rollout_plies: int = 4, seed: Optional[int] = None) -> None:
+        self.exploration: float = exploration
+        self.widening_constant: float = widening_constant
+        self.widening_exponent: float = widening_exponent
+        self.rollout_plies: int = rollout_plies
+        self.rng: np.random.Generator = np.random.default_rng(seed)
+        self.nodes: NodeStore = NodeStore()
+        self._lock = threading.Lock()
+
+    def search(self, board: Board, color: int, playouts: Optional[int] = None, time_limit: Optional[float] = None,
+               threads: int = 1) -> MCTSResult:
+        """Grow a new tree from a position until the playout or time budget runs out
+        :param board: the position, left unchanged
+        :param color: side to move
+        :param playouts: playouts to run in total, or None for no limit
+        :param time_limit: seconds to search, or None for no limit
+        :param threads: threads that share the tree, using virtual loss to spread out over it
+        :return: the most visited root move with the statistics of the search
+        """
+        assert playouts is not None or time_limit is not None
+        started = time.perf_counter()
+        self.nodes = NodeStore()
+        self.nodes.add(-1, (-1, -1, -1), color)
+        deadline = None if time_limit is None else started + time_limit
+        budget = [0 if playouts is None else playouts]
+
+        def work(rng: np.random.Generator) -> None:
+            local = board.copy()
+            while deadline is None or time.perf_counter() < deadline:
+                with self._lock:
+                    if playouts is not None:
+                        if budget[0] <= 0:
+                            return
+                        budget[0] -= 1
+                self._playout(local, rng)
+
+        if threads == 1:
+            work(self.rng)
+        else:
+            workers = [threading.Thread(target=work, args=(rng,)) for rng in
+                       map(np.random.default_rng, self.rng.integers(2 ** 63, size=threads))]
+            for worker in workers:
+                worker.start()
+            for worker in workers:
+                worker.join()
+        return self._result(time.perf_counter() - started)
+
+    def _result(self, elapsed: float) -> MCTSResult:
+        nodes = self.nodes
+        children = nodes.children(0)
+        result = MCTSResult(None, 0.0, int(nodes.visits[0]), elapsed, nodes.size, nodes.nbytes / nodes.size,
+                            nodes.move[children].copy(), nodes.visits[children].copy(), nodes.value[children].copy())
+        if children.size:
+            best = children[np.argmax(nodes.visits[children])]
+            result.move = tuple(nodes.move[best].tolist())
+            result.win_rate = float(nodes.value[best] / max(1, nodes.visits[best]))
+        return result
+
+    def _select_child(self, node: int) -> int:
+        """Pick the child with the highest upper confidence bound, counting virtual losses as lost playouts"""
+        nodes = self.nodes
+        children = nodes.children(node)
+        visits = nodes.visits[children] + nodes.virtual_loss[children]
+        parent_visits = nodes.visits[node] + nodes.virtual_loss[node]
+        bounds = nodes.value[children] / visits + self.exploration * np.sqrt(np.log(parent_visits) / visits)
+        return int(children[np.argmax(bounds)])
+
+    def _descend(self, board: Board, rng: np.random.Generator) -> Tuple[List[int], bool]:
+        """Walk from the root to a new leaf, pushing the moves on the board and adding the leaf to the tree
+        :return: the visited node ids and whether the last one is a finished game
+        """
+        nodes = self.nodes
+        path = [0]
+        node = 0
+        while True:
+            nodes.virtual_loss[node] += 1
+            to_move = int(nodes.to_move[node])
+            legal = None
+            if nodes.legal_count[node] < 0:
+                legal = board.legal_moves(to_move)
+                nodes.count_moves(node, len(legal), rng)
+            legal_count = int(nodes.legal_count[node])
+            if not legal_count:
+                return path, True
+            tried = int(nodes.child_count[node])
+            allowed = math.ceil(self.widening_constant * (nodes.visits[node] + 1) ** self.widening_exponent)
+            if tried < min(allowed, legal_count):
+                if legal is None:
+                    legal = board.legal_moves(to_move)
+                move = tuple(legal[nodes.move_index(node, tried)].tolist())
+                node = nodes.add(node, move, OPPONENT[to_move])
+                nodes.virtual_loss[node] += 1
+                board.push(move)
+                path.append(node)
+                return path, False
+            node = self._select_child(node)
+            board.push(tuple(nodes.move[node].tolist()))
+            path.append(node)
+
+    def _rollout(self, board: Board, color: int, rng: np.random.Generator) -> float:
+        """Play random moves from a position and score the result
+        :param board: the position, restored before returning
+        :param color: side to move
+        :return: chance that the side that moved last before the rollout wins
+        """
+        plies = 0
+        to_move = color
+        try:
+            for plies in range(self.rollout_plies):
+                move = random_move(board, to_move, rng)
+                if move is None:
+                    # the side to move has lost
+                    return 1.0 if to_move == color else 0.0
+                board.push(move)
+                to_move = OPPONENT[to_move]
+            else:
+                plies = self.rollout_plies
+            win = _win_probability(evaluate(board, to_move))
+            return 1.0 - win if to_move == color else win
+        finally:
+            for _ in range(plies):
+                board.pop()
+
+    def _playout(self, board: Board, rng: np.random.Generator) -> None:
+        """Run one playout on a private board: select, expand, roll out and back up"""
+        nodes = self.nodes
+        with self._lock:
+            path, finished = self._descend(board, rng)
+        leaf = path[-1]
+        result = 1.0 if finished else self._rollout(board, int(nodes.to_move[leaf]), rng)
+        for _ in path[1:]:
+            board.pop()
+        with self._lock:
+            for node in reversed(path):
+                nodes.virtual_loss[node] -= 1
+                nodes.visits[node] += 1
+                nodes.value[node] += result
+                result = 1.0 - result
+
+
+def _root_worker(state: np.ndarray, color: int, playouts: Optional[int], time_limit: Optional[float],
+                 seed: int) -> MCTSResult:
+    return MCTS(seed=seed).search(Board.from_state(state), color, playouts, time_limit)
+
+
+def root_parallel_search(board: Board, color: int, processes: int, playouts: Optional[int] = None,
+                         time_limit: Optional[float] = None, seed: int = 0) -> MCTSResult:
+    """Grow independent trees in several processes and add up their root statistics
+    :param board: the position
+    :param color: side to move
+    :param processes: number of worker processes, each with its own tree
+    :param playouts: playouts per process, or None for no limit
+    :param time_limit: seconds to search, or None for no limit
+    :param seed: base seed, process i searches with seed + i
+    :return: the root move with the most visits over all trees, with playouts and nodes summed over all trees
+    """
+    started = time.perf_counter()
+    with multiprocessing.Pool(processes) as pool:
+        results = pool.starmap(_root_worker, [(board._state, color, playouts, time_limit, seed + worker)
+                                              for worker in range(processes)])
+    totals: Dict[Tuple[int, int, int], List[float]] = {}
+    for result in results:
+        for move, visits, value in zip(map(tuple, result.root_moves.tolist()), result.root_visits,
+                                       result.root_values):
+            total = totals.setdefault(move, [0, 0.0])
+            total[0] += visits
+            total[1] += value
+    merged = MCTSResult(None, 0.0, sum(result.playouts for result in results), time.perf_counter() - started,
+                        sum(result.nodes for result in results),
+                        float(np.mean([result.bytes_per_node for result in results])))
+    if totals:
+        moves = list(totals)
+        merged.root_moves = np.array(moves, dtype=np.int16)
+        merged.root_visits = np.array([totals[move][0] for move in moves], dtype=np.int32)
+        merged.root_values = np.array([totals[move][1] for move in moves])
+        best = int(np.argmax(merged.root_visits))
+        merged.move = moves[best]
+        merged.win_rate = float(merged.root_values[best] / max(1, merged.root_visits[best]))
+    return merged
@@ -0,0 +1,49 @@
+"""Fixed positions shared by the tests and the benchmarks"""
+from __future__ import annotations
+import numpy as np
+from amazons.base import Board, Coordinate
+from amazons.constants import *
+
+
+def random_position(plies: int, size: int = 10, seed: int = 0) -> Board:
+    """Play random legal moves from the starting position
+    :param plies: how many moves to play, white moving first
+    :param size: board size
+    :param seed: random seed, the same seed always gives the same position
+    :return: the resulting board
+    """
+    rng = np.random.default_rng(seed)
+    board = Board.starting_position(size)
+    color = WHITE_AMAZON
+    for _ in range(plies):
+        moves = board.legal_moves(color)
+        if len(moves) == 0:
+            break
+        board.push(moves[rng.integers(len(moves))])
+        color = OPPONENT[color]
+    return board
+
+
+def trapped_position() -> Board:
+    """A 3x3 board where black is boxed into the top left corner apart from (1, 1), which white can burn to win
+    :return: a new board
+    """
+    board = Board(3, 3)
+    board.set_square_value(Coordinate(0, 0), BLACK_AMAZON)
+    board.set_square_value(Coordinate(1, 0), BURNT)
+    board.set_square_value(Coordinate(0, 1), BURNT)
+    board.set_square_value(Coordinate(2, 2), WHITE_AMAZON)
+    return board
+
+
+def split_position() -> Board:
+    """A 5x3 board whose burnt middle row splits it into a top region holding a white amazon in its left corner
+    and a bottom region holding a black amazon in its left corner
+    :return: a new board
+    """
+    board = Board(5, 3)
+    for x in range(5):
+        board.set_square_value(Coordinate(x, 1), BURNT)
+    board.set_square_value(Coordinate(0, 0), WHITE_AMAZON)
+    board.set_square_value(Coordinate(0, 2), BLACK_AMAZON)
+    return board
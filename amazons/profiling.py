@@ -0,0 +1,210 @@
+"""Opt-in call counts and timings for the board primitives and searches
+
+Nothing is instrumented until a Profile is enabled: enabling swaps timing wrappers in for the functions listed in
+PRIMITIVES and disabling puts the originals back, so a disabled profile costs nothing at all. While enabled it
+records per primitive the calls and the inclusive time, per call stack the time spent in each primitive itself
+(ready for flame graph tools as collapsed stacks), and per search its nodes and transposition table hits.
+
+    with instrumented() as profile:
+        Engine().search(board, WHITE_AMAZON, time_limit=5)
+    profile.dump_json("profile.json")
+    profile.dump_collapsed("profile.folded")  # flamegraph.pl profile.folded > profile.svg
+
+Setting the PROFILE_VARIABLE environment variable to a path prefix profiles whatever runs inside
+profile_from_environment, which every self-play worker does, and writes <prefix>.<pid>.json and
+<prefix>.<pid>.folded when it ends.
+"""
+from __future__ import annotations
+import contextlib
+import functools
+import importlib
+import json
+import os
+import threading
+import time
+from collections import defaultdict
+from typing import List, Set, Dict, Tuple, Optional, Iterator
+
+PROFILE_VARIABLE: str = "AMAZONS_PROFILE"
+# (module, attribute path, name) of every function that is timed; a function imported by name into another
+# module is listed once per module, since each module holds its own reference
+PRIMITIVES: List[Tuple[str, str, str]] = [
+    ("amazons.base", "Board.move", "move"),
+    ("amazons.base", "Board.burn", "burn"),
+    ("amazons.base", "Board.move_and_burn", "move_and_burn"),
+    ("amazons.base", "Board.push", "push"),
+    ("amazons.base", "Board.pop", "pop"),
+    ("amazons.base", "Board.set_square_value", "set_square_value"),
+    ("amazons.base", "Board.get_square_value", "get_square_value"),
+    ("amazons.base", "Board.empty_between_squares", "empty_between_squares"),
+    ("amazons.base", "Board.move_square", "move_square"),
+    ("amazons.base", "Board.burn_square", "burn_square"),
+    ("amazons.base", "Board.set_square", "set_square"),
+    ("amazons.base", "Board.get_square", "get_square"),
+    ("amazons.base", "Board.empty_between", "line_of_sight"),
+    ("amazons.base", "Board.legal_moves", "legal_moves"),
+    ("amazons.base", "Board.count_legal_moves", "count_legal_moves"),
+    ("amazons.evaluation", "analyze", "evaluation"),
+    ("amazons.engine", "solved_score", "solved_score"),
+    ("amazons.evaluation", "solved_score", "solved_score"),
+    ("amazons.engine", "Engine.search", "Engine.search"),
+    ("amazons.mcts", "MCTS.search", "MCTS.search"),
+]
+
+_active: Optional[Profile] = None
+
+
+class Profile:
+    """ Class for collecting call counts, timings and search statistics while enabled"""
+    def __init__(self) -> None:
+        self.calls: Dict[str, int] = defaultdict(int)
+        # inclusive seconds per primitive, a recursive call is counted at every level
+        self.seconds: Dict[str, float] = defaultdict(float)
+        # seconds spent in the innermost primitive of each ";" joined call stack
+        self.stacks: Dict[str, float] = defaultdict(float)
+        self.searches: List[Dict[str, float]] = []
+        self._originals: List[Tuple[object, str, object]] = []
+        self._local: threading.local = threading.local()
+
+    @property
+    def enabled(self) -> bool:
+        """Whether the timing wrappers are in place"""
+        return bool(self._originals)
+
+    def _frames(self) -> List[list]:
+        """The [name, started, seconds in children] frames of the calling thread's open primitives"""
+        frames = getattr(self._local, "frames", None)
+        if frames is None:
+            frames = self._local.frames = []
+        return frames
+
+    def _timed(self, name: str, function):
+        """Wrap a function so that its calls are counted and timed"""
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            frames = self._frames()
+            frame = [name, time.perf_counter(), 0.0]
+            frames.append(frame)
+            try:
+                return function(*args, **kwargs)
+            finally:
+                elapsed = time.perf_counter() - frame[1]
+                self.calls[name] += 1
+                self.seconds[name] += elapsed
+                self.stacks[";".join(open_frame[0] for open_frame in frames)] += elapsed - frame[2]
+                frames.pop()
+                if frames:
+                    frames[-1][2] += elapsed
+        return wrapper
+
+    def _searched(self, function):
+        """Wrap Engine.search so that every search records its nodes and transposition table use"""
+        @functools.wraps(function)
+        def wrapper(engine, *args, **kwargs):
+            hits, misses = engine.table.hits, engine.table.misses
+            result = function(engine, *args, **kwargs)
+            probes = engine.table.hits + engine.table.misses - hits - misses
+            self.searches.append({"search": "alphabeta", "nodes": result.nodes, "depth": result.depth,
+                                  "seconds": result.elapsed, "table_probes": probes,
+                                  "table_hits": engine.table.hits - hits})
+            return result
+        return wrapper
+
+    def _mcts_searched(self, function):
+        """Wrap MCTS.search so that every search records its playouts and tree size"""
+        @functools.wraps(function)
+        def wrapper(mcts, *args, **kwargs):
+            result = function(mcts, *args, **kwargs)
+            self.searches.append({"search": "mcts", "nodes": result.nodes, "playouts": result.playouts,
+                                  "seconds": result.elapsed})
+            return result
+        return wrapper
+
+    def enable(self) -> None:
+        """Swap the timing wrappers in, only one profile can be enabled at a time"""
+        global _active
+        if _active is not None:
+            raise RuntimeError("another profile is already enabled")
+        _active = self
+        for module_name, path, name in PRIMITIVES:
+            *owners, attribute = path.split(".")
+            owner = importlib.import_module(module_name)
+            for owner_name in owners:
+                owner = getattr(owner, owner_name)
+            original = owner.__dict__[attribute]
+            if path == "Engine.search":
+                wrapped = self._timed(name, self._searched(original))
+            elif path == "MCTS.search":
+                wrapped = self._timed(name, self._mcts_searched(original))
+            else:
+                wrapped = self._timed(name, original)
+            self._originals.append((owner, attribute, original))
+            setattr(owner, attribute, wrapped)
+
+    def disable(self) -> None:
+        """Put the original functions back"""
+        global _active
+        for owner, attribute, original in reversed(self._originals):
+            setattr(owner, attribute, original)
+        self._originals = []
+        if _active is self:
+            _active = None
+
+    def to_dict(self) -> dict:
+        """Summarize the profile
+        :return: per primitive calls, total and mean seconds, and the searches, ready to be written as JSON
+        """
+        primitives = {name: {"calls": self.calls[name], "seconds": self.seconds[name],
+                             "mean_seconds": self.seconds[name] / self.calls[name]}
+                      for name in sorted(self.calls, key=lambda name: -self.seconds[name])}
+        return {"primitives": primitives, "searches": self.searches,
+                "search_totals": {"searches": len(self.searches),
+                                  "nodes": sum(search["nodes"] for search in self.searches),
+                                  "table_hits": sum(search.get("table_hits", 0) for search in self.searches),
+                                  "table_probes": sum(search.get("table_probes", 0) for search in self.searches)}}
+
+    def dump_json(self, path: str) -> None:
+        """Write the summary of to_dict as JSON
+        :param path: file to write
+        """
+        with open(path, "w") as file:
+            json.dump(self.to_dict(), file, indent=2)
+
+    def dump_collapsed(self, path: str) -> None:
+        """Write the call stacks in the collapsed format of flamegraph.pl and speedscope, one "a;b;c count" line
+        per stack where the count is microseconds spent in c itself
+        :param path: file to write
+        """
+        with open(path, "w") as file:
+            for stack, seconds in sorted(self.stacks.items()):
+                file.write(f"{stack} {int(round(seconds * 1e6))}\n")
+
+
+@contextlib.contextmanager
+def instrumented() -> Iterator[Profile]:
+    """Profile everything that runs inside the block
+    :return: the profile, which keeps its results after the block
+    """
+    profile = Profile()
+    profile.enable()
+    try:
+        yield profile
+    finally:
+        profile.disable()
+
+
+@contextlib.contextmanager
+def profile_from_environment() -> Iterator[Optional[Profile]]:
+    """Profile the block only if PROFILE_VARIABLE is set, then write its results next to the prefix it names
+    :return: the profile, or None if the variable is not set
+    """
+    prefix = os.environ.get(PROFILE_VARIABLE)
+    if not prefix:
+        yield None
+        return
+    with instrumented() as profile:
+        try:
+            yield profile
+        finally:
+            profile.dump_json(f"{prefix}.{os.getpid()}.json")
+            profile.dump_collapsed(f"{prefix}.{os.getpid()}.folded")
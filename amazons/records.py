@@ -0,0 +1,228 @@
+"""Compact binary game records
+
+A record file is a sequence of games, each laid out as
+
+- a 16 byte GAME_HEADER giving the board size, the number of initial amazons and burnt squares, the number of
+  moves and the winner
+- the initial white amazon, black amazon and burnt squares as little-endian uint16 square indices, zero padded
+  to a multiple of 4 bytes
+- one little-endian uint32 per move holding start | end << bits | burn << 2 * bits, where bits is the number of
+  bits needed for a square index (7 on 10x10)
+
+A sidecar file with the same name plus ".idx" holds the uint64 byte offset of every game, so any game can be
+found without reading the ones before it.
+"""
+from __future__ import annotations
+import os
+import numpy as np
+from dataclasses import dataclass
+from typing import List, Set, Dict, Tuple, Optional
+from amazons.base import Board
+from amazons.constants import *
+
+MAGIC: bytes = b"AG"
+VERSION: int = 1
+GAME_HEADER: np.dtype = np.dtype([("magic", "S2"),
+                                  ("version", "u1"),
+                                  ("bits", "u1"),
+                                  ("width", "u1"),
+                                  ("height", "u1"),
+                                  ("winner", "u1"),
+                                  ("reserved", "u1"),
+                                  ("white", "<u2"),
+                                  ("black", "<u2"),
+                                  ("burnt", "<u2"),
+                                  ("moves", "<u2")])
+# game offsets collected before they are written out while rebuilding an index
+INDEX_CHUNK: int = 65536
+
+
+def square_bits(width: int, height: int) -> int:
+    """Number of bits needed to store any square index of a board size
+    :param width: board width
+    :param height: board height
+    :return: bits per square index
+    """
+    return max(1, (width * height - 1).bit_length())
+
+
+def pack_moves(moves: np.ndarray, bits: int) -> np.ndarray:
+    """Pack (start, end, burn) moves into one integer each
+    :param moves: (N, 3) array of square indices
+    :param bits: bits per square index, at most 10
+    :return: (N,) uint32 array
+    """
+    moves = np.asarray(moves, dtype=np.uint32).reshape(-1, 3)
+    return moves[:, 0] | (moves[:, 1] << bits) | (moves[:, 2] << (2 * bits))
+
+
+def unpack_moves(packed: np.ndarray, bits: int) -> np.ndarray:
+    """Reverse pack_moves
+    :param packed: (N,) packed moves
+    :param bits: bits per square index
+    :return: (N, 3) int16 array of (start, end, burn) square indices
+    """
+    packed = np.asarray(packed, dtype=np.uint32)
+    mask = (1 << bits) - 1
+    return np.stack([packed & mask, (packed >> bits) & mask, packed >> (2 * bits)], axis=1).astype(np.int16)
+
+
+@dataclass
+class GameRecord:
+    """ Class for one stored game"""
+    initial: Board
+    moves: np.ndarray
+    winner: int
+
+    def board_at(self, ply: int) -> Board:
+        """Replay the game up to a ply
+        :param ply: number of moves to play, 0 for the initial position
+        :return: a new board after that many moves
+        """
+        state = self.initial._state.copy()
+        flat = state.reshape(-1)
+        for start, end, burn in self.moves[:ply].tolist():
+            flat[end] = flat[start]
+            flat[start] = EMPTY
+            flat[burn] = BURNT
+        return Board.from_state(state, copy=False)
+
+
+class GameWriter:
+    """ Class for appending games to a record file and its index"""
+    def __init__(self, path: str, append: bool = False) -> None:
+        mode = "ab" if append else "wb"
+        self.path: str = path
+        self._file = open(path, mode)
+        self._index = open(path + ".idx", mode)
+
+    def __enter__(self) -> GameWriter:
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def write(self, initial: Board, moves: np.ndarray, winner: int = EMPTY) -> None:
+        """Append one game
+        :param initial: position the game started from
+        :param moves: (N, 3) array of (start, end, burn) square indices
+        :param winner: WHITE_AMAZON, BLACK_AMAZON or EMPTY if the game is unfinished
+        """
+        bits = square_bits(initial.width, initial.height)
+        assert 3 * bits <= 32 and max(initial.width, initial.height) < 256
+        moves = np.asarray(moves).reshape(-1, 3)
+        flat = initial._state.reshape(-1)
+        squares = [np.flatnonzero(flat == value).astype("<u2") for value in (WHITE_AMAZON, BLACK_AMAZON, BURNT)]
+        header = np.array([(MAGIC, VERSION, bits, initial.width, initial.height, winner, 0,
+                            len(squares[0]), len(squares[1]), len(squares[2]), len(moves))], dtype=GAME_HEADER)
+        placement = np.concatenate(squares)
+        padding = bytes(-placement.nbytes % 4)
+
+        offset = self._file.tell()
+        self._file.write(header.tobytes() + placement.tobytes() + padding +
+                         pack_moves(moves, bits).astype("<u4").tobytes())
+        # the offset is only indexed after the game, so a crash never leaves an entry past the end of the data
+        np.array([offset], dtype="<u8").tofile(self._index)
+
+    def flush(self) -> None:
+        self._file.flush()
+        self._index.flush()
+
+    def close(self) -> None:
+        self._file.close()
+        self._index.close()
+
+
+class GameReader:
+    """ Class for random access to the games of a record file through memory maps
+
+    Only the bytes of the games actually read are loaded from disk.
+    """
+    def __init__(self, path: str) -> None:
+        self.path: str = path
+        size = os.path.getsize(path)
+        self._data: np.ndarray = np.memmap(path, dtype=np.uint8, mode="r") if size else np.zeros(0, dtype=np.uint8)
+        if not os.path.exists(path + ".idx"):
+            self.rebuild_index(path)
+        if os.path.getsize(path + ".idx"):
+            self._offsets: np.ndarray = np.memmap(path + ".idx", dtype="<u8", mode="r")
+        else:
+            self._offsets = np.zeros(0, dtype="<u8")
+
+    @staticmethod
+    def rebuild_index(path: str) -> None:
+        """Recreate a missing index by walking the game headers through a memory map, writing the offsets out in
+        chunks, so neither the record file nor the index is ever held in memory
+        :param path: the record file
+        """
+        data = np.memmap(path, dtype=np.uint8, mode="r") if os.path.getsize(path) else np.zeros(0, dtype=np.uint8)
+        offsets = []
+        offset = 0
+        with open(path + ".idx", "wb") as index:
+            while offset < data.size:
+                header = data[offset:offset + GAME_HEADER.itemsize].view(GAME_HEADER)[0]
+                assert header["magic"] == MAGIC
+                offsets.append(offset)
+                offset += GameReader._game_size(header)
+                if len(offsets) == INDEX_CHUNK:
+                    np.array(offsets, dtype="<u8").tofile(index)
+                    offsets = []
+            np.array(offsets, dtype="<u8").tofile(index)
+        del data
+
+    @staticmethod
+    def _game_size(header: np.void) -> int:
+        placement = 2 * (int(header["white"]) + int(header["black"]) + int(header["burnt"]))
+        return GAME_HEADER.itemsize + placement + (-placement % 4) + 4 * int(header["moves"])
+
+    def __len__(self) -> int:
+        return len(self._offsets)
+
+    def header(self, game: int) -> np.void:
+        """Read the header of a game
+        :param game: game number in the file
+        :return: a GAME_HEADER record
+        """
+        offset = int(self._offsets[game])
+        return self._data[offset:offset + GAME_HEADER.itemsize].view(GAME_HEADER)[0]
+
+    def initial_board(self, game: int) -> Board:
+        """Rebuild the position a game started from
+        :param game: game number in the file
+        :return: a new board
+        """
+        header = self.header(game)
+        start = int(self._offsets[game]) + GAME_HEADER.itemsize
+        white, black, burnt = int(header["white"]), int(header["black"]), int(header["burnt"])
+        squares = self._data[start:start + 2 * (white + black + burnt)].view("<u2")
+        state = np.zeros((header["height"], header["width"]), dtype=np.uint8)
+        flat = state.reshape(-1)
+        flat[squares[:white]] = WHITE_AMAZON
+        flat[squares[white:white + black]] = BLACK_AMAZON
+        flat[squares[white + black:]] = BURNT
+        return Board.from_state(state, copy=False)
+
+    def moves(self, game: int) -> np.ndarray:
+        """Read the moves of a game
+        :param game: game number in the file
+        :return: (N, 3) int16 array of (start, end, burn) square indices
+        """
+        header = self.header(game)
+        placement = 2 * (int(header["white"]) + int(header["black"]) + int(header["burnt"]))
+        start = int(self._offsets[game]) + GAME_HEADER.itemsize + placement + (-placement % 4)
+        return unpack_moves(self._data[start:start + 4 * int(header["moves"])].view("<u4"), int(header["bits"]))
+
+    def game(self, game: int) -> GameRecord:
+        """Read a whole game
+        :param game: game number in the file
+        :return: the game's record
+        """
+        return GameRecord(self.initial_board(game), self.moves(game), int(self.header(game)["winner"]))
+
+    def board_at(self, game: int, ply: int) -> Board:
+        """Jump to a position of a game
+        :param game: game number in the file
+        :param ply: number of moves to play, 0 for the initial position
+        :return: a new board after that many moves
+        """
+        return self.game(game).board_at(ply)
@@ -0,0 +1,283 @@
+"""Exact endgame values for boards that burnt squares have split into independent regions
+
+A region is a set of non-burnt squares connected through queen steps, that is with 8-connectivity. Amazons can
+never leave their region, so once every region holds amazons of at most one color the game is a race: each side
+can make exactly as many more moves as the longest fill of its regions, and the side to move wins if it has
+more moves left than its opponent. A single small region holding both colors is solved by a memoized search
+for the winner, in which a side may also pass by spending a move left in its own regions.
+
+Solved positions are scored by move balance, the moves the side to move makes before the game ends minus those
+its opponent makes, so the side to move wins exactly when the balance is positive.
+"""
+from __future__ import annotations
+import numpy as np
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import List, Set, Dict, Tuple, Optional, Iterator
+from amazons.base import Board
+from amazons.constants import *
+from amazons.symmetry import canonical_state
+from amazons.tables import ray_tables
+
+# score of a solved win is SOLVED_SCORE plus the move balance and a solved loss -SOLVED_SCORE plus the balance,
+# more than any territory score but less than engine.WIN_SCORE, so a forced win found by search still ranks first
+SOLVED_SCORE: float = 60000.0
+# the largest mixed region, counted in empty squares, that is searched exactly
+MIXED_MAX_EMPTY: int = 10
+# positions a single solver call may visit before giving up on an exact answer
+SOLVER_NODE_LIMIT: int = 5000
+# swaps the two amazon colors of a region's bytes, so every memoized position has white to move
+_SWAP_COLORS: bytes = bytes.maketrans(bytes([WHITE_AMAZON, BLACK_AMAZON]), bytes([BLACK_AMAZON, WHITE_AMAZON]))
+
+
+@dataclass
+class Region:
+    """ Class for one region of a board
+
+    state is the region cropped to its bounding box, with every square outside the region marked BURNT.
+    """
+    squares: np.ndarray
+    state: np.ndarray
+    white: int
+    black: int
+    empty: int
+
+    @property
+    def mixed(self) -> bool:
+        """Whether amazons of both colors share the region"""
+        return self.white > 0 and self.black > 0
+
+
+def label_regions(state: np.ndarray) -> Tuple[np.ndarray, int]:
+    """Label the regions of a state with 8-connectivity on non-burnt squares
+    Every square starts with its own index as label and repeatedly takes the smallest label among itself and its
+    neighbours, jumping along labels as pointers in between, until no label changes.
+    :param state: (H, W) state
+    :return: (H, W) int32 labels numbered from 0 in order of each region's first square, -1 on burnt squares,
+        and the number of regions
+    """
+    height, width = state.shape
+    squares = height * width
+    neighbours = ray_tables(width, height).rays[:, :, 0]
+    open_squares = state.reshape(-1) != BURNT
+    # burnt squares and the padding square keep the largest label, so they never spread
+    labels = np.where(np.append(open_squares, False), np.arange(squares + 1), squares)
+    while True:
+        updated = labels.copy()
+        updated[:-1] = np.where(open_squares, np.minimum(labels[:-1], labels[neighbours].min(axis=1)), squares)
+        updated = updated[updated]
+        if np.array_equal(updated, labels):
+            break
+        labels = updated
+    roots, numbered = np.unique(labels[:-1][open_squares], return_inverse=True)
+    result = np.full(squares, -1, dtype=np.int32)
+    result[open_squares] = numbered
+    return result.reshape(height, width), len(roots)
+
+
+def find_regions(board: Board, with_amazons: bool = False) -> List[Region]:
+    """Split a board into its regions
+    :param board: the position
+    :param with_amazons: if True only return the regions that hold amazons
+    :return: the regions, in order of their first square
+    """
+    labels, count = label_regions(board._state)
+    flat_labels = labels.reshape(-1)
+    flat = board._state.reshape(-1)
+    open_squares = np.flatnonzero(flat_labels >= 0)
+    # squares of each region next to each other, in square order within a region
+    order = open_squares[np.argsort(flat_labels[open_squares], kind="stable")]
+    bounds = np.searchsorted(flat_labels[order], np.arange(count + 1))
+    counts = {value: np.bincount(flat_labels[open_squares], weights=flat[open_squares] == value,
+                                 minlength=count).astype(int) for value in (WHITE_AMAZON, BLACK_AMAZON, EMPTY)}
+    regions = []
+    for label in range(count):
+        white, black = counts[WHITE_AMAZON][label], counts[BLACK_AMAZON][label]
+        if with_amazons and not white and not black:
+            continue
+        squares = order[bounds[label]:bounds[label + 1]]
+        ys, xs = np.divmod(squares, board.width)
+        crop = (slice(ys[0], ys[-1] + 1), slice(xs.min(), xs.max() + 1))
+        state = np.where(labels[crop] == label, board._state[crop], BURNT).astype(np.uint8)
+        regions.append(Region(squares, state, int(white), int(black), int(counts[EMPTY][label])))
+    return regions
+
+
+@lru_cache(maxsize=64)
+def _rays(width: int, height: int) -> List[List[List[int]]]:
+    """Queen rays of a small board as nested lists, nearest square first, for the pure Python solvers"""
+    rays = []
+    for y in range(height):
+        for x in range(width):
+            square_rays = []
+            for dx, dy in DIRECTIONS:
+                ray = []
+                step = 1
+                while 0 <= x + step * dx < width and 0 <= y + step * dy < height:
+                    ray.append((y + step * dy) * width + x + step * dx)
+                    step += 1
+                if ray:
+                    square_rays.append(ray)
+            rays.append(square_rays)
+    return rays
+
+
+def _children(cells: bytes, rays: List[List[List[int]]], color: int) -> Iterator[bytes]:
+    """Generate the position after every legal move of one side in a small region
+    :param cells: flat region state
+    :param rays: _rays of the region's size
+    :param color: side to move
+    :return: an iterator over the new flat states
+    """
+    empty = EMPTY
+    for start in [square for square, value in enumerate(cells) if value == color]:
+        vacated = bytearray(cells)
+        vacated[start] = empty
+        for ray in rays[start]:
+            for end in ray:
+                if vacated[end] != empty:
+                    break
+                moved = bytearray(vacated)
+                moved[end] = color
+                for burn_ray in rays[end]:
+                    for burn in burn_ray:
+                        if moved[burn] != empty:
+                            break
+                        moved[burn] = BURNT
+                        yield bytes(moved)
+                        moved[burn] = empty
+
+
+class _OutOfNodes(Exception):
+    """Raised inside a solver once it has visited SOLVER_NODE_LIMIT positions"""
+
+
+def _key(state: np.ndarray, color: int) -> Tuple[bytes, int, int]:
+    """Canonical memo key of a region: the bytes of its smallest symmetric variant with color's amazons shown as
+    white, so mirrored and rotated copies of a region share one solution"""
+    state, _ = canonical_state(state)
+    cells = state.tobytes()
+    if color == BLACK_AMAZON:
+        cells = cells.translate(_SWAP_COLORS)
+    return cells, state.shape[1], state.shape[0]
+
+
+def fill_count(state: np.ndarray, color: int, node_limit: int = SOLVER_NODE_LIMIT) -> Optional[int]:
+    """Find how many moves one side can make in a region where only it has amazons
+    :param state: (H, W) region state, see Region.state
+    :param color: the side whose amazons are in the region
+    :param node_limit: positions the solver may visit
+    :return: the most moves the side can make before it is stuck, or None if the solver ran out of nodes
+    """
+    return _fill(*_key(state, color), node_limit)
+
+
+@lru_cache(maxsize=4096)
+def _fill(cells: bytes, width: int, height: int, node_limit: int) -> Optional[int]:
+    rays = _rays(width, height)
+    neighbours = [[ray[0] for ray in square_rays] for square_rays in rays]
+    memo: Dict[bytes, int] = {}
+
+    def longest(position: bytes) -> int:
+        if position in memo:
+            return memo[position]
+        if len(memo) >= node_limit:
+            raise _OutOfNodes()
+        # every move uses up one empty square, and an empty square surrounded by burnt squares can never be
+        # reached or burnt, so no fill is longer than the number of the other empty squares
+        bound = sum(1 for square, value in enumerate(position) if value == EMPTY and
+                    any(position[neighbour] != BURNT for neighbour in neighbours[square]))
+        best = 0
+        for child in _children(position, rays, WHITE_AMAZON):
+            best = max(best, 1 + longest(child))
+            if best == bound:
+                break
+        memo[position] = best
+        return best
+
+    try:
+        return longest(cells)
+    except _OutOfNodes:
+        return None
+
+
+def mixed_wins(state: np.ndarray, color: int, own_spare: int, other_spare: int,
+               node_limit: int = SOLVER_NODE_LIMIT) -> Optional[bool]:
+    """Solve a region holding both colors, with both sides able to pass by moving in their own regions
+    :param state: (H, W) region state, see Region.state
+    :param color: side to move
+    :param own_spare: moves the side to move can make elsewhere
+    :param other_spare: moves its opponent can make elsewhere
+    :param node_limit: positions the solver may visit
+    :return: whether the side to move wins, or None if the solver ran out of nodes
+    """
+    return _mixed(*_key(state, color), own_spare, other_spare, node_limit)
+
+
+@lru_cache(maxsize=4096)
+def _mixed(cells: bytes, width: int, height: int, own_spare: int, other_spare: int,
+           node_limit: int) -> Optional[bool]:
+    rays = _rays(width, height)
+    memo: Dict[Tuple[bytes, int, int], bool] = {}
+
+    def wins(position: bytes, own: int, other: int) -> bool:
+        # white is always to move, the colors are swapped after every move
+        key = (position, own, other)
+        if key in memo:
+            return memo[key]
+        if len(memo) >= node_limit:
+            raise _OutOfNodes()
+        result = any(not wins(child.translate(_SWAP_COLORS), other, own)
+                     for child in _children(position, rays, WHITE_AMAZON))
+        if not result and own:
+            result = not wins(position.translate(_SWAP_COLORS), other, own - 1)
+        memo[key] = result
+        return result
+
+    try:
+        return wins(cells, own_spare, other_spare)
+    except _OutOfNodes:
+        return None
+
+
+def solved_balance(board: Board, color: int, node_limit: int = SOLVER_NODE_LIMIT) -> Optional[int]:
+    """Solve a board exactly if its regions allow it
+    :param board: the position
+    :param color: side to move
+    :param node_limit: positions each region's solver may visit
+    :return: the move balance for the side to move, or None unless every region holds at most one color apart
+        from a single mixed region of at most MIXED_MAX_EMPTY empty squares, and every solver finished; with a
+        mixed region only the winner is searched for, so the balance is 1 for a win and 0 for a loss
+    """
+    spare = {WHITE_AMAZON: 0, BLACK_AMAZON: 0}
+    mixed = None
+    for region in find_regions(board, with_amazons=True):
+        if region.mixed:
+            if mixed is not None or region.empty > MIXED_MAX_EMPTY:
+                return None
+            mixed = region
+        else:
+            owner = WHITE_AMAZON if region.white else BLACK_AMAZON
+            moves = fill_count(region.state, owner, node_limit)
+            if moves is None:
+                return None
+            spare[owner] += moves
+    if mixed is None:
+        return spare[color] - spare[OPPONENT[color]]
+    wins = mixed_wins(mixed.state, color, spare[color], spare[OPPONENT[color]], node_limit)
+    if wins is None:
+        return None
+    return int(wins)
+
+
+def solved_score(board: Board, color: int, node_limit: int = SOLVER_NODE_LIMIT) -> Optional[float]:
+    """Score a board exactly if its regions can be solved, see solved_balance
+    :param board: the position
+    :param color: side to move
+    :param node_limit: positions each region's solver may visit
+    :return: SOLVED_SCORE plus the balance for a win, -SOLVED_SCORE plus the balance for a loss, or None
+    """
+    balance = solved_balance(board, color, node_limit)
+    if balance is None:
+        return None
+    return (SOLVED_SCORE if balance > 0 else -SOLVED_SCORE) + balance
@@ -0,0 +1,198 @@
+"""Play many games without the GUI across several worker processes
+
+Run with ``python -m amazons.selfplay --games 1000 --workers 8 --output games.amz``.
+"""
+from __future__ import annotations
+import argparse
+import multiprocessing
+import queue
+import time
+import traceback
+import numpy as np
+from dataclasses import dataclass
+from multiprocessing import shared_memory
+from typing import List, Set, Dict, Tuple, Optional
+from amazons.base import Board
+from amazons.constants import *
+from amazons.engine import Engine
+from amazons.profiling import profile_from_environment
+from amazons.records import GameWriter
+
+PLAYERS: List[str] = ["random", "engine"]
+# random moves that start every engine game, so games differ even though the engine itself is deterministic
+ENGINE_OPENING_PLIES: int = 4
+# how often the main process checks that the workers are still alive while it waits for a game
+RESULT_POLL_SECONDS: float = 1.0
+
+
+@dataclass
+class SelfPlayStats:
+    """ Class for summarizing a self-play run"""
+    games: int
+    moves: int
+    seconds: float
+
+    @property
+    def games_per_second(self) -> float:
+        return self.games / self.seconds if self.seconds > 0 else 0.0
+
+    @property
+    def moves_per_second(self) -> float:
+        return self.moves / self.seconds if self.seconds > 0 else 0.0
+
+
+def play_game(board: Board, rng: np.random.Generator, player: str = "random",
+              node_limit: int = 2000) -> Tuple[List[Tuple[int, int, int]], int]:
+    """Play one game to the end, white moving first
+    :param board: starting position, played on in place
+    :param rng: source of randomness, the only one used so equal seeds give equal games
+    :param player: "random" for uniformly random legal moves, "engine" for an engine search per move after
+        ENGINE_OPENING_PLIES random moves
+    :param node_limit: nodes the engine may search per move
+    :return: the (start, end, burn) moves played and the winning color
+    """
+    engine = Engine(table_megabytes=16) if player == "engine" else None
+    color = WHITE_AMAZON
+    moves = []
+    while True:
+        legal = board.legal_moves(color)
+        if len(legal) == 0:
+            return moves, OPPONENT[color]
+        if engine is None or len(moves) < ENGINE_OPENING_PLIES:
+            move = tuple(legal[rng.integers(len(legal))].tolist())
+        else:
+            move = engine.search(board, color, node_limit=node_limit).move
+        board.push(move)
+        moves.append(move)
+        color = OPPONENT[color]
+
+
+def _worker(slot: int, memory_name: str, size: int, seed: int, player: str, node_limit: int,
+            tasks: multiprocessing.Queue, results: multiprocessing.Queue) -> None:
+    """Play games from the task queue on this worker's board in shared memory until told to stop
+    :param slot: index of this worker's board in the shared block
+    :param memory_name: name of the shared memory block holding every worker's board
+    :param size: board size
+    :param seed: base seed of the run
+    :param player: see play_game
+    :param node_limit: see play_game
+    :param tasks: game indices to play, None means stop
+    :param results: receives (game index, moves, winner) for every finished game, or (None, traceback, None)
+        if the worker failed
+    """
+    memory = shared_memory.SharedMemory(name=memory_name)
+    boards = None
+    try:
+        boards = np.ndarray((memory.size // (size * size), size, size), dtype=np.uint8, buffer=memory.buf)
+        # AMAZONS_PROFILE=<prefix> makes every worker write a profile of its games, see amazons.profiling
+        with profile_from_environment():
+            _play_tasks(boards[slot], seed, player, node_limit, tasks, results)
+    except Exception:
+        results.put((None, traceback.format_exc(), None))
+    finally:
+        # the block can only be closed once no array points into it
+        del boards
+        memory.close()
+
+
+def _play_tasks(state: np.ndarray, seed: int, player: str, node_limit: int,
+                tasks: multiprocessing.Queue, results: multiprocessing.Queue) -> None:
+    """Play games from the task queue on one board until told to stop, see _worker"""
+    start = Board.starting_position(state.shape[0])._state
+    for game in iter(tasks.get, None):
+        state[...] = start
+        moves, winner = play_game(Board.from_state(state, copy=False), np.random.default_rng([seed, game]),
+                                  player, node_limit)
+        results.put((game, moves, winner))
+
+
+def _next_result(results: multiprocessing.Queue,
+                 processes: List[multiprocessing.Process]) -> Tuple[int, List[Tuple[int, int, int]], int]:
+    """Wait for the next finished game, raising instead of waiting forever if a worker failed or died
+    :param results: the workers' result queue
+    :param processes: the workers
+    :return: (game index, moves, winner)
+    """
+    while True:
+        try:
+            game, moves, winner = results.get(timeout=RESULT_POLL_SECONDS)
+        except queue.Empty:
+            dead = [process for process in processes if process.exitcode not in (None, 0)]
+            if dead:
+                raise RuntimeError(f"self-play worker exited with code {dead[0].exitcode}")
+            continue
+        if game is None:
+            raise RuntimeError(f"self-play worker failed:\n{moves}")
+        return game, moves, winner
+
+
+def run_selfplay(games: int, workers: int, output: str, size: int = 10, seed: int = 0, player: str = "random",
+                 node_limit: int = 2000) -> SelfPlayStats:
+    """Play games across worker processes, writing each game to disk as soon as it finishes
+    :param games: number of games to play
+    :param workers: number of worker processes
+    :param output: path of the game record file to write, see amazons.records
+    :param size: board size, must be a key of STARTING_POSITIONS
+    :param seed: base seed, game i always plays the same moves for the same seed whichever worker plays it
+    :param player: see play_game
+    :param node_limit: see play_game
+    :return: totals and throughput of the run
+    """
+    assert player in PLAYERS
+    started = time.perf_counter()
+    memory = shared_memory.SharedMemory(create=True, size=workers * size * size)
+    tasks, results = multiprocessing.Queue(), multiprocessing.Queue()
+    processes = [multiprocessing.Process(target=_worker, args=(slot, memory.name, size, seed, player, node_limit,
+                                                               tasks, results), daemon=True)
+                 for slot in range(workers)]
+    try:
+        for process in processes:
+            process.start()
+        for game in range(games):
+            tasks.put(game)
+        for _ in processes:
+            tasks.put(None)
+
+        total_moves = 0
+        initial = Board.starting_position(size)
+        # games are written in order as soon as every earlier game is done, so the file does not depend on
+        # how games were spread over the workers
+        finished: Dict[int, Tuple[List[Tuple[int, int, int]], int]] = {}
+        with GameWriter(output) as writer:
+            for next_game in range(games):
+                while next_game not in finished:
+                    game, moves, winner = _next_result(results, processes)
+                    finished[game] = (moves, winner)
+                    total_moves += len(moves)
+                moves, winner = finished.pop(next_game)
+                writer.write(initial, np.array(moves, dtype=np.int16).reshape(-1, 3), winner)
+                writer.flush()
+        for process in processes:
+            process.join()
+    finally:
+        for process in processes:
+            if process.is_alive():
+                process.terminate()
+        memory.close()
+        memory.unlink()
+    return SelfPlayStats(games, total_moves, time.perf_counter() - started)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Play Game of the Amazons games without the GUI")
+    parser.add_argument("--games", type=int, default=100, help="number of games to play")
+    parser.add_argument("--workers", type=int, default=multiprocessing.cpu_count(), help="worker processes")
+    parser.add_argument("--output", default="selfplay.amz", help="file to write the games to")
+    parser.add_argument("--size", type=int, default=10, choices=sorted(STARTING_POSITIONS), help="board size")
+    parser.add_argument("--seed", type=int, default=0, help="base random seed")
+    parser.add_argument("--player", default="random", choices=PLAYERS, help="how moves are chosen")
+    parser.add_argument("--nodes", type=int, default=2000, help="engine nodes per move")
+    args = parser.parse_args()
+
+    stats = run_selfplay(args.games, args.workers, args.output, args.size, args.seed, args.player, args.nodes)
+    print(f"{stats.games} games, {stats.moves} moves in {stats.seconds:.2f} s: "
+          f"{stats.games_per_second:.2f} games/s, {stats.moves_per_second:.1f} moves/s")
+
+
+if __name__ == "__main__":
+    main()
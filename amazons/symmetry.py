@@ -0,0 +1,114 @@
+"""Rotations and reflections of boards
+
+A transform is numbered 0 to 7 by three bits: bit 2 transposes the board (swaps x and y) first, then bit 0
+mirrors x and bit 1 mirrors y. Transform 0 is the identity. A square board has all 8, a board with width !=
+height only the 4 without a transpose, since the others would change its shape.
+"""
+from __future__ import annotations
+import numpy as np
+from functools import lru_cache
+from typing import List, Set, Dict, Tuple, Optional
+from amazons.base import Board
+from amazons.constants import *
+from amazons.zobrist import zobrist_keys
+
+IDENTITY: int = 0
+
+
+class SymmetryTables:
+    """ Class for the square permutations of the symmetries of one board size"""
+    def __init__(self, width: int, height: int) -> None:
+        self.width: int = width
+        self.height: int = height
+        self.transforms: List[int] = list(range(8 if width == height else 4))
+        ys, xs = np.divmod(np.arange(width * height), width)
+        # forward[t, square] is the square that square moves to under transform t
+        self.forward: np.ndarray = np.zeros((len(self.transforms), width * height), dtype=np.intp)
+        for transform in self.transforms:
+            x, y = (ys, xs) if transform & 4 else (xs, ys)
+            if transform & 1:
+                x = width - 1 - x
+            if transform & 2:
+                y = height - 1 - y
+            self.forward[transform] = y * width + x
+        # a variant's flat state is the original flat state gathered through gather[t]
+        self.gather: np.ndarray = np.argsort(self.forward, axis=1)
+        # inverse[t] undoes transform t
+        self.inverse: List[int] = [next(other for other in self.transforms
+                                        if np.array_equal(self.forward[other][self.forward[transform]],
+                                                          np.arange(width * height)))
+                                   for transform in self.transforms]
+
+
+@lru_cache(maxsize=8)
+def symmetry_tables(width: int, height: int) -> SymmetryTables:
+    """Get the shared symmetry tables for a board size
+    :param width: board width
+    :param height: board height
+    :return: the tables for that size
+    """
+    return SymmetryTables(width, height)
+
+
+def variants(state: np.ndarray) -> np.ndarray:
+    """Apply every symmetry of a state's size at once
+    :param state: (H, W) state
+    :return: (T, H, W) array where variant t is the state under transform t
+    """
+    tables = symmetry_tables(state.shape[1], state.shape[0])
+    return state.reshape(-1)[tables.gather].reshape((-1,) + state.shape)
+
+
+def canonical_state(state: np.ndarray) -> Tuple[np.ndarray, int]:
+    """Find the lexicographically smallest variant of a state
+    :param state: (H, W) state
+    :return: the smallest variant's state and the lowest numbered transform that gives it
+    """
+    stack = variants(state)
+    best = min(range(len(stack)), key=lambda transform: stack[transform].tobytes())
+    return stack[best], best
+
+
+def canonicalize(board: Board) -> Tuple[Board, int]:
+    """Map a board to the representative that all its symmetric variants share
+    :param board: the position
+    :return: a new board holding the lexicographically smallest variant and the transform that gives it from
+        board, see transform_move for mapping moves between the two
+    """
+    state, transform = canonical_state(board._state)
+    return Board.from_state(state), transform
+
+
+def variant_hashes(board: Board) -> np.ndarray:
+    """Compute the Zobrist hash of every variant of a board with one gather
+    :param board: the position
+    :return: uint64 array where entry t is the hash of the board under transform t
+    """
+    tables = symmetry_tables(board.width, board.height)
+    keys = zobrist_keys(board.width, board.height).keys
+    return np.bitwise_xor.reduce(keys[tables.forward, board._state.reshape(-1)], axis=1)
+
+
+def canonical_hash(board: Board) -> int:
+    """Hash a board so that all its symmetric variants hash alike
+    :param board: the position
+    :return: the smallest Zobrist hash among the variants
+    """
+    return int(variant_hashes(board).min())
+
+
+def transform_move(move: Tuple[int, int, int], transform: int, width: int, height: int,
+                   inverse: bool = False) -> Tuple[int, int, int]:
+    """Map a move onto a transformed board
+    :param move: (start, end, burn) square indices
+    :param transform: the transform, as returned by canonicalize
+    :param width: board width
+    :param height: board height
+    :param inverse: if True map a move of the transformed board back onto the original board
+    :return: the mapped (start, end, burn) move
+    """
+    tables = symmetry_tables(width, height)
+    if inverse:
+        transform = tables.inverse[transform]
+    forward = tables.forward[transform]
+    return int(forward[move[0]]), int(forward[move[1]]), int(forward[move[2]])
@@ -0,0 +1,123 @@
+from __future__ import annotations
+import sys
+import numpy as np
+from collections import OrderedDict
+from typing import List, Set, Dict, Tuple, Optional
+from amazons.constants import *
+
+# how many board sizes keep their tables in memory at once, the least recently used size is dropped first
+MAX_CACHED_SIZES: int = 8
+
+
+class RayTables:
+    """ Precomputed queen rays and line-of-sight lookups for one board size
+
+    Squares are flat indices y * width + x. Index width * height is an off-board padding square, so a state
+    array padded with one extra BURNT value can be gathered through any ray without bounds checks.
+    """
+    def __init__(self, width: int, height: int) -> None:
+        self.width: int = width
+        self.height: int = height
+        squares = width * height
+        index_type = np.int16 if squares < np.iinfo(np.int16).max else np.int32
+
+        # rays[square, direction] lists the squares along the ray in DIRECTIONS order, nearest first
+        self.rays: np.ndarray = np.full((squares, len(DIRECTIONS), max(width, height, 2) - 1), squares,
+                                        dtype=index_type)
+        # for each pair of squares, which direction leads from the first to the second (-1 if they are not aligned)
+        # and how many steps it takes, so the squares strictly between them are rays[a, direction, :distance - 1]
+        self.direction: np.ndarray = np.full((squares, squares), -1, dtype=np.int8)
+        self.distance: np.ndarray = np.zeros((squares, squares), dtype=index_type)
+        for y in range(height):
+            for x in range(width):
+                origin = y * width + x
+                for direction, (dx, dy) in enumerate(DIRECTIONS):
+                    step = 1
+                    while 0 <= x + step * dx < width and 0 <= y + step * dy < height:
+                        target = (y + step * dy) * width + x + step * dx
+                        self.rays[origin, direction, step - 1] = target
+                        self.direction[origin, target] = direction
+                        self.distance[origin, target] = step
+                        step += 1
+        self._between_paths: Optional[List[List[Optional[Tuple[int, ...]]]]] = None
+        self._between_bytes: int = 0
+
+    @property
+    def nbytes(self) -> int:
+        """Memory held by the tables in bytes, including between_paths once it is built"""
+        return self.rays.nbytes + self.direction.nbytes + self.distance.nbytes + self._between_bytes
+
+    def between(self, start: int, end: int) -> Optional[np.ndarray]:
+        """Find the squares strictly between two squares
+        :param start: square index to start from
+        :param end: square index to end at
+        :return: square indices between the two, or None if they are not on a common queen line
+        """
+        direction = self.direction[start, end]
+        if direction < 0:
+            return None
+        return self.rays[start, direction, :self.distance[start, end] - 1]
+
+    @property
+    def between_paths(self) -> List[List[Optional[Tuple[int, ...]]]]:
+        """The result of between for every pair as plain tuples, built on first use, for callers checking a
+        single pair where NumPy's per-call overhead would dominate
+        :return: between_paths[start][end] is the tuple of square indices strictly between the two, or None if
+            they are not on a common queen line
+        """
+        if self._between_paths is None:
+            squares = self.width * self.height
+            self._between_paths = []
+            for start, rays in enumerate(self.rays.tolist()):
+                row: List[Optional[Tuple[int, ...]]] = [None] * squares
+                for ray in rays:
+                    for step, target in enumerate(ray):
+                        if target == squares:
+                            break
+                        row[target] = tuple(ray[:step])
+                self._between_paths.append(row)
+            self._between_bytes = _object_bytes(self._between_paths)
+        return self._between_paths
+
+
+def _object_bytes(paths: List[List[Optional[Tuple[int, ...]]]]) -> int:
+    """Count the bytes of the lists, tuples and integers making up between_paths, each object once"""
+    seen = {id(None)}
+    total = 0
+    pending: list = [paths]
+    while pending:
+        item = pending.pop()
+        if id(item) in seen:
+            continue
+        seen.add(id(item))
+        total += sys.getsizeof(item)
+        if isinstance(item, (list, tuple)):
+            pending.extend(item)
+    return total
+
+
+_cache: OrderedDict[Tuple[int, int], RayTables] = OrderedDict()
+
+
+def ray_tables(width: int, height: int) -> RayTables:
+    """Get the shared tables for a board size, building them on first use
+    :param width: board width
+    :param height: board height
+    :return: the tables for that size
+    """
+    key = (width, height)
+    tables = _cache.get(key)
+    if tables is None:
+        tables = _cache[key] = RayTables(width, height)
+        if len(_cache) > MAX_CACHED_SIZES:
+            _cache.popitem(last=False)
+    else:
+        _cache.move_to_end(key)
+    return tables
+
+
+def cached_table_bytes() -> Dict[Tuple[int, int], int]:
+    """Report how much memory the cached tables use
+    :return: bytes held for each (width, height) currently in the cache
+    """
+    return {key: tables.nbytes for key, tables in _cache.items()}
@@ -1,6 +1,10 @@
+import dataclasses
 from unittest import TestCase
-from amazons.base import Board, Coordinate
+import numpy as np
+from amazons.base import Board, Coordinate, Distance
+from amazons.bitboard import BitBoard
 from amazons.constants import *
+from amazons.zobrist import zobrist_keys
 
 
 class TestBoard(TestCase):
@@ -23,6 +27,98 @@ class TestBoard(TestCase):
         self.assertFalse(b.empty_between_squares(Coordinate(6, 6), Coordinate(9, 9),
                                                  include_start=True, include_end=True))
 
+    def test_legal_moves(self):
+        b = Board.starting_position()
+        moves = b.legal_moves(WHITE_AMAZON)
+        self.assertEqual(moves.shape, (2176, 3))
+        self.assertEqual(moves.dtype, np.int16)
+        self.assertEqual(b.count_legal_moves(BLACK_AMAZON), 2176)
+
+        b.set_square_value(Coordinate(4, 4), BURNT)
+        b.set_square_value(Coordinate(5, 6), BLACK_AMAZON)
+        for color in [WHITE_AMAZON, BLACK_AMAZON]:
+            expected = sorted(BitBoard.from_board(b).legal_moves(color))
+            self.assertEqual(sorted(map(tuple, b.legal_moves(color).tolist())), expected)
+            self.assertEqual(b.count_legal_moves(color), len(expected))
+
+    def test_legal_moves_burn_vacated_square(self):
+        b = Board(3, 1)
+        b.set_square_value(Coordinate(0, 0), WHITE_AMAZON)
+        b.set_square_value(Coordinate(2, 0), BURNT)
+        self.assertEqual(b.legal_moves(WHITE_AMAZON).tolist(), [[0, 1, 0]])
+        self.assertEqual(b.legal_moves(BLACK_AMAZON).shape, (0, 3))
+
+    def test_push_pop(self):
+        b = Board.starting_position()
+        before = str(b)
+        moves = b.legal_moves(WHITE_AMAZON)
+        b.push(moves[0])
+        b.push(b.legal_moves(BLACK_AMAZON)[-1])
+        self.assertNotEqual(str(b), before)
+        b.pop()
+        self.assertEqual(b.pop(), tuple(moves[0].tolist()))
+        self.assertEqual(str(b), before)
+
+        # burning the square the amazon just left
+        b.push((60, 50, 60))
+        self.assertEqual(b.get_square_value(Coordinate(0, 6)), BURNT)
+        self.assertEqual(b.get_square_value(Coordinate(0, 5)), WHITE_AMAZON)
+        b.pop()
+        self.assertEqual(str(b), before)
+
+    def test_copy(self):
+        b = Board.starting_position()
+        c = b.copy()
+        self.assertIs(c._state, b._state)
+        c.push((60, 50, 40))
+        self.assertTrue(b.square_is_empty(Coordinate(0, 5)))
+        self.assertFalse(c.square_is_empty(Coordinate(0, 5)))
+        d = b.copy()
+        b.burn(Coordinate(5, 5))
+        self.assertTrue(d.square_is_empty(Coordinate(5, 5)))
+
+    def test_zobrist_hash(self):
+        b = Board.starting_position()
+        start_hash = hash(b)
+        self.assertEqual(b.zobrist_hash, zobrist_keys(10, 10).hash_state(b._state))
+
+        # the same position reached by two move orders hashes and compares equal
+        c = Board.starting_position()
+        b.push((60, 50, 40))
+        b.push((3, 13, 23))
+        c.move_and_burn(Coordinate(3, 0), Coordinate(3, 1), Coordinate(3, 2))
+        c.move_and_burn(Coordinate(0, 6), Coordinate(0, 5), Coordinate(0, 4))
+        self.assertEqual(hash(b), hash(c))
+        self.assertEqual(b, c)
+        self.assertEqual(b.zobrist_hash, zobrist_keys(10, 10).hash_state(b._state))
+
+        b.pop()
+        b.pop()
+        self.assertEqual(hash(b), start_hash)
+        self.assertEqual(b, Board.starting_position())
+        self.assertNotEqual(b, c)
+
+    def test_index_api(self):
+        b = Board.starting_position()
+        c = Board.starting_position()
+        self.assertEqual(b.get_square(93), WHITE_AMAZON)
+        self.assertEqual(b.get_square(93), b.get_square_value(Coordinate.from_index(93, 10)))
+        b.move_square(93, 33)
+        b.burn_square(36)
+        c.move_and_burn(Coordinate(3, 9), Coordinate(3, 3), Coordinate(6, 3))
+        self.assertEqual(b, c)
+        self.assertEqual(b.zobrist_hash, zobrist_keys(10, 10).hash_state(b._state))
+        b.set_square(36, EMPTY)
+        self.assertTrue(b.square_is_empty(Coordinate(6, 3)))
+
+        rng = np.random.default_rng(0)
+        for start, end in rng.integers(100, size=(200, 2)).tolist():
+            for include_start, include_end in [(False, False), (True, True)]:
+                self.assertEqual(b.empty_between(start, end, include_start, include_end),
+                                 b.empty_between_squares(Coordinate.from_index(start, 10),
+                                                         Coordinate.from_index(end, 10),
+                                                         include_start, include_end))
+
 
 class TestCoordinate(TestCase):
     def test_is_on_board(self):
@@ -34,3 +130,34 @@ class TestCoordinate(TestCase):
 
     def test_sub(self):
         c = Coordinate(1, 2)
+
+    def test_frozen(self):
+        c = Coordinate(1, 2)
+        with self.assertRaises(dataclasses.FrozenInstanceError):
+            c.x = 3
+        self.assertFalse(hasattr(c, "__dict__"))
+        self.assertEqual(len({Coordinate(1, 2), Coordinate(1, 2), Coordinate(2, 1)}), 2)
+        self.assertEqual(dataclasses.replace(c, x=3), Coordinate(3, 2))
+        self.assertEqual(c.index(10), 21)
+        self.assertEqual(Coordinate.from_index(21, 10), c)
+
+    def test_unit_step(self):
+        self.assertEqual(Distance(0, -4).unit_step, Distance(0, -1))
+        self.assertEqual(Distance(-3, 3).unit_step, Distance(-1, 1))
+        self.assertIs(type(Distance(5, 0).unit_step.x), int)
+        self.assertEqual(Coordinate(1, 1) + Distance(-3, 3).unit_step, Coordinate(0, 2))
+        self.assertTrue(Distance(-2, 2).is_diagonal())
+        self.assertFalse(Distance(1, 2).is_diagonal())
+        with self.assertRaises(RuntimeError):
+            Distance(1, 2).unit_step
+
+    def test_numpy_coordinates(self):
+        # coordinates built from np.where hold numpy integers
+        b = Board.starting_position()
+        rows, columns = b.get_white_amazon_positions()
+        start, end = Coordinate(columns[0], rows[0]), Coordinate(np.int64(3), np.int64(3))
+        self.assertEqual((end - start).unit_step, Distance(1, -1))
+        self.assertIs(type((end - start).unit_step.x), int)
+        self.assertEqual(Distance(np.int64(0), np.int64(-4)).unit_step, Distance(0, -1))
+        self.assertTrue(b.empty_between_squares(start, end))
+        self.assertFalse(b.empty_between_squares(start, Coordinate(np.int64(9), rows[0]), include_end=True))
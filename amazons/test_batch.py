@@ -0,0 +1,89 @@
+from unittest import TestCase
+import numpy as np
+from amazons.base import Board, Coordinate
+from amazons.batch import BoardBatch
+from amazons.constants import *
+from amazons.positions import trapped_position
+
+
+class TestBoardBatch(TestCase):
+    def test_views(self):
+        batch = BoardBatch(3, 10, 10)
+        view = batch[1]
+        self.assertEqual(view, Board.starting_position())
+        view.move_and_burn(Coordinate(0, 6), Coordinate(0, 5), Coordinate(0, 6))
+        self.assertEqual(batch.states[1, 6, 0], BURNT)
+        self.assertEqual(batch.states[0, 6, 0], WHITE_AMAZON)
+        self.assertTrue(view.square_is_empty(Coordinate(5, 5)))
+
+        batch.reset(1)
+        self.assertEqual(batch[1], Board.starting_position())
+
+    def test_views_follow_batched_moves(self):
+        batch = BoardBatch(2, 10, 10)
+        views = [batch[0], batch[1]]
+        batch.move_and_burn(np.array([[60, 50, 60]]), games=[0])
+        expected = Board.starting_position()
+        expected.push((60, 50, 60))
+        self.assertEqual(views[0], expected)
+        self.assertEqual(views[0].zobrist_hash, expected.zobrist_hash)
+        self.assertEqual(hash(views[1]), hash(Board.starting_position()))
+        # the view keeps hashing incrementally from the fresh hash
+        views[0].push((50, 40, 50))
+        expected.push((50, 40, 50))
+        self.assertEqual(views[0].zobrist_hash, expected.zobrist_hash)
+        copy = views[0].copy()
+        batch.reset()
+        self.assertEqual(views[0], Board.starting_position())
+        self.assertEqual(views[0].zobrist_hash, Board.starting_position().zobrist_hash)
+        self.assertEqual(copy, expected)
+        self.assertEqual(copy.zobrist_hash, expected.zobrist_hash)
+
+    def test_copy_of_view(self):
+        batch = BoardBatch(2, 10, 10)
+        view = batch[0]
+        copy = view.copy()
+        view.burn(Coordinate(5, 5))
+        copy.burn(Coordinate(4, 4))
+        self.assertEqual(batch.states[0, 5, 5], BURNT)
+        self.assertEqual(batch.states[0, 4, 4], EMPTY)
+        self.assertTrue(copy.square_is_empty(Coordinate(5, 5)))
+
+    def test_move_and_burn(self):
+        batch = BoardBatch(2, 10, 10)
+        batch.move_and_burn(np.array([[60, 50, 60], [3, 13, 23]]))
+        expected = Board.starting_position()
+        expected.push((60, 50, 60))
+        self.assertEqual(batch[0], expected)
+        self.assertEqual(batch.states[1, 1, 3], BLACK_AMAZON)
+
+        batch.move_and_burn(np.array([[50, 40, 50]]), games=[0])
+        self.assertEqual(batch.states[0, 4, 0], WHITE_AMAZON)
+        self.assertEqual(batch.states[1, 1, 3], BLACK_AMAZON)
+
+    def test_legal_move_counts(self):
+        boards = [Board.starting_position()]
+        rng = np.random.default_rng(1)
+        color = WHITE_AMAZON
+        for _ in range(40):
+            board = boards[-1].copy()
+            moves = board.legal_moves(color)
+            board.push(moves[rng.integers(len(moves))])
+            boards.append(board)
+            color = OPPONENT[color]
+        batch = BoardBatch.from_boards(boards)
+        for side in [WHITE_AMAZON, BLACK_AMAZON]:
+            expected = [board.count_legal_moves(side) for board in boards]
+            self.assertEqual(batch.legal_move_counts(side).tolist(), expected)
+        colors = np.array([WHITE_AMAZON, BLACK_AMAZON] * 3)
+        self.assertEqual(batch.legal_move_counts(colors, games=np.arange(6)).tolist(),
+                         [boards[i].count_legal_moves(colors[i]) for i in range(6)])
+
+    def test_is_terminal(self):
+        b = trapped_position()
+        batch = BoardBatch.from_boards([b, b])
+        self.assertEqual(batch.is_terminal(BLACK_AMAZON).tolist(), [False, False])
+        batch.move_and_burn([[8, 5, 4]], games=1)
+        self.assertEqual(batch.is_terminal(BLACK_AMAZON).tolist(), [False, True])
+        self.assertEqual(batch.is_terminal(WHITE_AMAZON).tolist(), [False, False])
+        self.assertEqual(batch.legal_move_counts(BLACK_AMAZON)[1], 0)
@@ -0,0 +1,53 @@
+from unittest import TestCase
+from amazons.base import Board, Coordinate
+from amazons.bitboard import BitBoard
+from amazons.constants import *
+
+
+class TestBitBoard(TestCase):
+    def test_square_is_empty(self):
+        b = BitBoard(10, 10)
+        self.assertTrue(b.square_is_empty(Coordinate(1, 1)))
+
+    def test_empty_between_squares(self):
+        b = BitBoard(10, 10)
+        b.set_square_value(Coordinate(1, 1), BURNT)
+        b.set_square_value(Coordinate(5, 5), BURNT)
+        b.set_square_value(Coordinate(9, 9), WHITE_AMAZON)
+
+        self.assertTrue(b.empty_between_squares(Coordinate(2, 2), Coordinate(2, 4)))
+        self.assertFalse(b.empty_between_squares(Coordinate(5, 4), Coordinate(5, 6)))
+        self.assertFalse(b.empty_between_squares(Coordinate(5, 5), Coordinate(5, 8), include_start=True))
+        self.assertFalse(b.empty_between_squares(Coordinate(5, 1), Coordinate(5, 5), include_end=True))
+        self.assertTrue(b.empty_between_squares(Coordinate(6, 6), Coordinate(8, 8),
+                                                include_start=True, include_end=True))
+        self.assertFalse(b.empty_between_squares(Coordinate(6, 6), Coordinate(9, 9),
+                                                 include_start=True, include_end=True))
+
+    def test_round_trip(self):
+        board = Board.starting_position()
+        board.set_square_value(Coordinate(4, 4), BURNT)
+        bitboard = BitBoard.from_board(board)
+        self.assertEqual(bitboard.get_square_value(Coordinate(0, 6)), WHITE_AMAZON)
+        self.assertEqual(bitboard.get_square_value(Coordinate(3, 0)), BLACK_AMAZON)
+        self.assertEqual(str(bitboard), str(board))
+        self.assertEqual(str(bitboard.to_board()), str(board))
+
+    def test_move_and_burn(self):
+        b = BitBoard.from_board(Board.starting_position())
+        b.move_and_burn(Coordinate(0, 6), Coordinate(0, 5), Coordinate(0, 6))
+        self.assertEqual(b.get_square_value(Coordinate(0, 5)), WHITE_AMAZON)
+        self.assertEqual(b.get_square_value(Coordinate(0, 6)), BURNT)
+
+    def test_legal_moves_do_not_wrap(self):
+        b = BitBoard(3, 3)
+        b.set_square_value(Coordinate(2, 0), WHITE_AMAZON)
+        b.set_square_value(Coordinate(0, 1), BURNT)
+        ends = {end for _, end, _ in b.legal_moves(WHITE_AMAZON)}
+        self.assertEqual(ends, {0, 1, 4, 5, 6, 8})
+
+    def test_count_legal_moves(self):
+        b = BitBoard.from_board(Board.starting_position())
+        self.assertEqual(b.count_legal_moves(WHITE_AMAZON), 2176)
+        self.assertEqual(b.count_legal_moves(BLACK_AMAZON), 2176)
+        self.assertEqual(len(b.legal_moves(WHITE_AMAZON)), 2176)
@@ -0,0 +1,85 @@
+import os
+import tempfile
+from unittest import TestCase
+import numpy as np
+from amazons.base import Board
+from amazons.book import OpeningBook, build_book, position_key, BOOK_ENTRY
+from amazons.constants import *
+from amazons.engine import Engine
+from amazons.records import GameWriter
+from amazons.symmetry import variants, transform_move
+
+
+class TestBook(TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.records = os.path.join(self.directory.name, "games.amz")
+        self.path = os.path.join(self.directory.name, "book.amb")
+        self.first = (93, 33, 36)
+        # five games open with the same move and white wins four of them, then they go their own ways
+        with GameWriter(self.records) as writer:
+            for seed in range(6):
+                rng = np.random.default_rng(seed)
+                board = Board.starting_position()
+                initial = board.copy()
+                color = WHITE_AMAZON
+                moves = []
+                for ply in range(6):
+                    legal = board.legal_moves(color)
+                    move = self.first if ply == 0 and seed < 5 else tuple(legal[rng.integers(len(legal))].tolist())
+                    board.push(move)
+                    moves.append(move)
+                    color = OPPONENT[color]
+                writer.write(initial, np.array(moves), winner=WHITE_AMAZON if seed < 4 else BLACK_AMAZON)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_build_and_lookup(self):
+        entries = build_book([self.records], self.path, plies=4)
+        book = OpeningBook(self.path)
+        self.assertEqual(len(book), entries)
+        keys = np.asarray(book._entries["key"])
+        self.assertTrue(np.all(keys[:-1] <= keys[1:]))
+
+        start = Board.starting_position()
+        moves = book.lookup(start, WHITE_AMAZON)
+        self.assertEqual(sum(book_move.visits for book_move in moves), 6)
+        self.assertEqual(moves[0].move, self.first)
+        self.assertEqual(moves[0].visits, 5)
+        self.assertAlmostEqual(moves[0].win_rate, 0.8)
+        self.assertEqual(book.best_move(start, WHITE_AMAZON), self.first)
+        # the same position with black to move is a different position
+        self.assertEqual(book.lookup(start, BLACK_AMAZON), [])
+        self.assertEqual(book.lookup(Board(8, 8), WHITE_AMAZON), [])
+
+    def test_symmetric_lookup(self):
+        build_book([self.records], self.path, plies=4)
+        book = OpeningBook(self.path)
+        start = Board.starting_position()
+        start.push(self.first)
+        reply = book.lookup(start, BLACK_AMAZON)
+        self.assertEqual(len(reply), 5)
+        for transform in range(8):
+            mirrored = Board.from_state(variants(start._state)[transform])
+            self.assertEqual(position_key(mirrored, BLACK_AMAZON)[0], position_key(start, BLACK_AMAZON)[0])
+            legal = mirrored.legal_moves(BLACK_AMAZON).tolist()
+            found = book.lookup(mirrored, BLACK_AMAZON)
+            self.assertEqual(len(found), len(reply))
+            for book_move in found:
+                self.assertIn(list(book_move.move), legal)
+            self.assertEqual(sorted(book_move.move for book_move in found),
+                             sorted(transform_move(book_move.move, transform, 10, 10) for book_move in reply))
+
+    def test_engine_uses_book(self):
+        build_book([self.records], self.path)
+        self.assertEqual(os.path.getsize(self.path) % BOOK_ENTRY.itemsize, 16 % BOOK_ENTRY.itemsize)
+        engine = Engine(table_megabytes=1, book=OpeningBook(self.path))
+        result = engine.search(Board.starting_position(), WHITE_AMAZON, node_limit=100)
+        self.assertTrue(result.from_book)
+        self.assertEqual(result.move, self.first)
+        b = Board.starting_position()
+        b.push(self.first)
+        result = engine.search(b, BLACK_AMAZON, node_limit=100)
+        self.assertFalse(result.from_book)
+        self.assertIn(list(result.move), b.legal_moves(BLACK_AMAZON).tolist())
@@ -0,0 +1,73 @@
+import os
+import tempfile
+import threading
+from unittest import TestCase
+import numpy as np
+from amazons.base import Board
+from amazons.constants import *
+from amazons.dataset import training_batches, game_positions
+from amazons.records import GameWriter, GameReader
+from amazons.selfplay import play_game
+
+
+class TestDataset(TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.paths = [os.path.join(self.directory.name, f"games{number}.amz") for number in range(2)]
+        self.positions = 0
+        for number, path in enumerate(self.paths):
+            with GameWriter(path) as writer:
+                for seed in range(3):
+                    initial = Board.starting_position(6)
+                    moves, winner = play_game(initial.copy(), np.random.default_rng(10 * number + seed))
+                    writer.write(initial, np.array(moves, dtype=np.int16), winner)
+                    self.positions += len(moves)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_game_positions(self):
+        reader = GameReader(self.paths[0])
+        states, colors, moves, values = game_positions(reader, 1)
+        record = reader.game(1)
+        self.assertEqual(len(states), len(record.moves))
+        for ply in [0, 1, len(states) - 1]:
+            np.testing.assert_array_equal(states[ply], record.board_at(ply)._state)
+            self.assertEqual(colors[ply], WHITE_AMAZON if ply % 2 == 0 else BLACK_AMAZON)
+            self.assertEqual(values[ply], 1 if colors[ply] == record.winner else -1)
+        np.testing.assert_array_equal(moves, record.moves)
+
+    def test_batches(self):
+        batches = list(training_batches(self.paths, 16, mobility=True, shuffle_positions=40, seed=1))
+        self.assertEqual(len(batches), self.positions // 16)
+        for batch in batches:
+            self.assertEqual(batch.planes.shape, (16, 6, 6, 6))
+            self.assertEqual(batch.planes.dtype, np.float32)
+            self.assertEqual(batch.moves.shape, (16, 3))
+            self.assertTrue(np.all(np.abs(batch.values) == 1))
+        # every position appears at most once, with the move played from it
+        seen = set()
+        for batch in batches:
+            for planes, move in zip(batch.planes, batch.moves):
+                key = (planes.tobytes(), tuple(move.tolist()))
+                self.assertNotIn(key, seen)
+                seen.add(key)
+                self.assertEqual(planes[2].reshape(-1)[move[0]], 1)
+                self.assertEqual(planes[0].reshape(-1)[move[1]], 1)
+        again = list(training_batches(self.paths, 16, mobility=True, shuffle_positions=40, seed=1))
+        for batch, repeated in zip(batches, again):
+            np.testing.assert_array_equal(batch.planes, repeated.planes)
+            np.testing.assert_array_equal(batch.moves, repeated.moves)
+
+    def test_close_and_errors(self):
+        threads = threading.active_count()
+        batches = training_batches(self.paths, 4, shuffle_positions=8, prefetch=1)
+        next(batches)
+        batches.close()
+        self.assertEqual(threading.active_count(), threads)
+        with self.assertRaises(ValueError):
+            next(training_batches(self.paths, 16, shuffle_positions=8))
+        with GameWriter(self.paths[1], append=True) as writer:
+            writer.write(Board.starting_position(), np.zeros((1, 3), dtype=np.int16))
+        with self.assertRaises(ValueError):
+            list(training_batches(self.paths, 16))
@@ -0,0 +1,47 @@
+from unittest import TestCase
+from amazons.base import Board, Coordinate
+from amazons.constants import *
+from amazons.engine import Engine, WIN_SCORE
+from amazons.positions import trapped_position
+
+
+class TestEngine(TestCase):
+    def test_finds_winning_move(self):
+        b = trapped_position()
+        before = str(b)
+
+        result = Engine(table_megabytes=1).search(b, WHITE_AMAZON, max_depth=4)
+        self.assertEqual(str(b), before)
+        self.assertGreater(result.score, WIN_SCORE / 2)
+        self.assertEqual(result.move, result.principal_variation[0])
+        b.push(result.move)
+        self.assertEqual(b.count_legal_moves(BLACK_AMAZON), 0)
+
+    def test_no_legal_moves(self):
+        b = Board(2, 1)
+        b.set_square_value(Coordinate(0, 0), WHITE_AMAZON)
+        b.set_square_value(Coordinate(1, 0), BURNT)
+        result = Engine(table_megabytes=1).search(b, WHITE_AMAZON)
+        self.assertIsNone(result.move)
+        self.assertEqual(result.score, -WIN_SCORE)
+
+    def test_node_budget(self):
+        b = Board.starting_position()
+        before = str(b)
+        depths = []
+        result = Engine(table_megabytes=1).search(b, WHITE_AMAZON, node_limit=3000,
+                                                  callback=lambda r: depths.append(r.depth))
+        self.assertEqual(str(b), before)
+        self.assertEqual(depths, [1])
+        self.assertEqual(result.depth, 1)
+        self.assertLessEqual(result.nodes, 3001)
+        self.assertIn(list(result.move), b.legal_moves(WHITE_AMAZON).tolist())
+
+    def test_budget_spent_before_any_move(self):
+        b = Board.starting_position()
+        for result in [Engine(table_megabytes=1).search(b, WHITE_AMAZON, node_limit=20),
+                       Engine(table_megabytes=1).search(b, WHITE_AMAZON, time_limit=0)]:
+            self.assertIn(list(result.move), b.legal_moves(WHITE_AMAZON).tolist())
+            self.assertEqual(result.principal_variation, [result.move])
+            self.assertEqual(result.depth, 0)
+            self.assertGreater(result.score, -WIN_SCORE / 2)
@@ -0,0 +1,56 @@
+from unittest import TestCase
+import numpy as np
+from amazons.base import Board, Coordinate
+from amazons.constants import *
+from amazons.evaluation import analyze, evaluate, distances, _gather_distances, _sweep_distances, UNREACHED
+
+
+class TestEvaluation(TestCase):
+    def test_distances(self):
+        b = Board(4, 4)
+        b.set_square_value(Coordinate(0, 0), WHITE_AMAZON)
+        b.set_square_value(Coordinate(1, 0), BURNT)
+        b.set_square_value(Coordinate(0, 1), BURNT)
+        b.set_square_value(Coordinate(1, 1), BURNT)
+        states = b._state[None]
+        white = states == WHITE_AMAZON
+        self.assertEqual(distances(states, white)[0, 3, 3], UNREACHED)
+
+        b.set_square_value(Coordinate(1, 1), EMPTY)
+        queen = distances(b._state[None], white, queen=True)[0]
+        king = distances(b._state[None], white, queen=False)[0]
+        self.assertEqual(queen[0, 0], 0)
+        self.assertEqual(queen[3, 3], 1)
+        self.assertEqual(king[3, 3], 3)
+        self.assertEqual(queen[0, 3], 2)
+        self.assertEqual(king[1, 0], UNREACHED)
+
+    def test_kernels_agree(self):
+        rng = np.random.default_rng(0)
+        states = rng.choice([EMPTY, EMPTY, EMPTY, BURNT, WHITE_AMAZON, BLACK_AMAZON], size=(16, 7, 9)).astype(np.uint8)
+        for queen in [True, False]:
+            sources = states == WHITE_AMAZON
+            np.testing.assert_array_equal(_gather_distances(states, sources, queen),
+                                          _sweep_distances(states, sources, queen))
+            full = _gather_distances(states, sources, queen)
+            limited = np.where(full <= 2, full, UNREACHED)
+            np.testing.assert_array_equal(_gather_distances(states, sources, queen, limit=2), limited)
+            np.testing.assert_array_equal(_sweep_distances(states, sources, queen, limit=2), limited)
+
+    def test_analyze(self):
+        b = Board.starting_position()
+        start = analyze(b, WHITE_AMAZON)
+        # the start position is symmetric, so only the tempo bonus for shared squares separates the sides
+        self.assertEqual(start.mobility[0], 0)
+        self.assertGreater(start.score[0], 0)
+        self.assertEqual(evaluate(b, WHITE_AMAZON), evaluate(b, BLACK_AMAZON))
+
+        b.set_square_value(Coordinate(3, 1), BURNT)
+        b.set_square_value(Coordinate(6, 1), BURNT)
+        self.assertLess(evaluate(b, BLACK_AMAZON), evaluate(b, WHITE_AMAZON))
+
+        states = np.stack([Board.starting_position()._state, b._state] * 20)
+        batch = analyze(states, BLACK_AMAZON)
+        self.assertEqual(batch.score.shape, (40,))
+        self.assertAlmostEqual(batch.score[1], evaluate(b, BLACK_AMAZON))
+        self.assertAlmostEqual(batch.score[0], start.score[0])
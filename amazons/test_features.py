@@ -0,0 +1,47 @@
+from unittest import TestCase
+import numpy as np
+from amazons.base import Board
+from amazons.constants import *
+from amazons.evaluation import analyze, TEMPO_BONUS
+from amazons.features import encode, plane_names
+from amazons.positions import random_position
+
+
+class TestFeatures(TestCase):
+    def test_base_planes(self):
+        b = random_position(30)
+        for color in [WHITE_AMAZON, BLACK_AMAZON]:
+            planes = encode(b, color)
+            self.assertEqual(planes.shape, (1, 4, 10, 10))
+            self.assertEqual(planes.dtype, np.float32)
+            np.testing.assert_array_equal(planes.sum(axis=1), 1)
+            np.testing.assert_array_equal(planes[0, 1], b._state == BURNT)
+            np.testing.assert_array_equal(planes[0, 2], b._state == color)
+            np.testing.assert_array_equal(planes[0, 3], b._state == OPPONENT[color])
+
+    def test_batch_matches_single_boards(self):
+        boards = [random_position(plies, seed=plies) for plies in range(40)]
+        states = np.stack([board._state for board in boards])
+        colors = np.where(np.arange(len(boards)) % 2 == 0, WHITE_AMAZON, BLACK_AMAZON)
+        planes = encode(states, colors, mobility=True, territory=True)
+        self.assertEqual(planes.shape, (40, len(plane_names(True, True)), 10, 10))
+        for board, color, expected in zip(boards, colors, planes):
+            np.testing.assert_array_equal(encode(board, color, mobility=True, territory=True)[0], expected)
+
+    def test_optional_planes(self):
+        b = random_position(30)
+        planes = encode(b, WHITE_AMAZON, mobility=True, territory=True)[0]
+        self.assertEqual(planes.shape[0], 7)
+        self.assertEqual(encode(b, WHITE_AMAZON, mobility=True).shape[1], 6)
+        # every move of an amazon ends on a square of its side's mobility plane
+        ends = np.zeros(100, dtype=bool)
+        ends[b.legal_moves(WHITE_AMAZON)[:, 1]] = True
+        np.testing.assert_array_equal(planes[4].reshape(-1).astype(bool), ends)
+        mobility = encode(b, WHITE_AMAZON, mobility=True)[0]
+        np.testing.assert_array_equal(mobility[4:], planes[4:6])
+        np.testing.assert_array_equal(planes[6][planes[0] == 0], 0)
+        # the territory plane is the queen territory of the evaluation without its bonus for tied squares
+        bonus = (analyze(b, WHITE_AMAZON, solve_regions=False).queen_territory[0] - planes[6].sum()) / TEMPO_BONUS
+        self.assertAlmostEqual(bonus, round(bonus), places=4)
+        self.assertTrue(0 <= round(bonus) <= ((planes[6] == 0) & (planes[0] == 1)).sum())
+        self.assertEqual(encode(Board.starting_position(), BLACK_AMAZON, territory=True)[0, 4].sum(), 0)
@@ -0,0 +1,66 @@
+from unittest import TestCase
+import numpy as np
+from amazons.base import Board, Coordinate
+from amazons.constants import *
+from amazons.mcts import MCTS, NodeStore, random_move, root_parallel_search
+from amazons.positions import trapped_position
+
+
+class TestMCTS(TestCase):
+    def test_random_move_is_legal(self):
+        b = Board.starting_position()
+        legal = b.legal_moves(WHITE_AMAZON).tolist()
+        rng = np.random.default_rng(0)
+        for _ in range(20):
+            self.assertIn(list(random_move(b, WHITE_AMAZON, rng)), legal)
+        b = trapped_position()
+        b.set_square_value(Coordinate(1, 1), BURNT)
+        self.assertIsNone(random_move(b, BLACK_AMAZON, rng))
+
+    def test_node_store_grows(self):
+        nodes = NodeStore(capacity=2)
+        nodes.add(-1, (-1, -1, -1), WHITE_AMAZON)
+        for burn in range(5):
+            child = nodes.add(0, (0, 1, burn), BLACK_AMAZON)
+            nodes.add(child, (1, 2, burn), WHITE_AMAZON)
+        self.assertEqual(nodes.size, 11)
+        self.assertEqual(nodes.children(0).tolist(), [1, 3, 5, 7, 9])
+        self.assertEqual(nodes.children(9).tolist(), [10])
+        self.assertEqual(nodes.move[9].tolist(), [0, 1, 4])
+        self.assertEqual(nodes.parent[10], 9)
+
+    def test_move_order(self):
+        nodes = NodeStore()
+        nodes.add(-1, (-1, -1, -1), WHITE_AMAZON)
+        rng = np.random.default_rng(0)
+        for count in [1, 2, 12, 97, 2176]:
+            nodes.count_moves(0, count, rng)
+            self.assertEqual(sorted(nodes.move_index(0, child) for child in range(count)), list(range(count)))
+
+    def test_finds_winning_move(self):
+        b = trapped_position()
+        before = str(b)
+        result = MCTS(seed=0).search(b, WHITE_AMAZON, playouts=300)
+        self.assertEqual(str(b), before)
+        self.assertEqual(result.playouts, 300)
+        self.assertGreater(result.win_rate, 0.9)
+        b.push(result.move)
+        self.assertEqual(b.count_legal_moves(BLACK_AMAZON), 0)
+
+    def test_threads(self):
+        b = Board.starting_position()
+        before = str(b)
+        result = MCTS(seed=1).search(b, WHITE_AMAZON, playouts=60, threads=3)
+        self.assertEqual(str(b), before)
+        self.assertEqual(result.playouts, 60)
+        self.assertEqual(int(result.root_visits.sum()), 60)
+        self.assertIn(list(result.move), b.legal_moves(WHITE_AMAZON).tolist())
+        self.assertGreater(result.bytes_per_node, 0)
+
+    def test_root_parallel(self):
+        result = root_parallel_search(trapped_position(), WHITE_AMAZON, processes=2, playouts=200)
+        self.assertEqual(result.playouts, 400)
+        self.assertEqual(int(result.root_visits.sum()), 400)
+        b = trapped_position()
+        b.push(result.move)
+        self.assertEqual(b.count_legal_moves(BLACK_AMAZON), 0)
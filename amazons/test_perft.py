@@ -0,0 +1,32 @@
+from unittest import TestCase
+from amazons.base import Board
+from amazons.bitboard import BitBoard
+from amazons.constants import *
+from benchmarks.perft import perft
+from benchmarks.suite import PERFT_CASES, compare
+
+
+class TestPerft(TestCase):
+    def test_starting_positions(self):
+        for size, moves in [(6, 496), (8, 1232), (10, 2176)]:
+            b = Board.starting_position(size)
+            self.assertEqual(perft(b, WHITE_AMAZON, 1), moves)
+            # the placements are symmetric, so black has as many moves as white
+            self.assertEqual(perft(b, BLACK_AMAZON, 1), moves)
+            self.assertEqual(BitBoard.from_board(b).count_legal_moves(WHITE_AMAZON), moves)
+
+    def test_suite_counts(self):
+        for name, (position, color, depth, expected) in PERFT_CASES.items():
+            b = position()
+            before = str(b)
+            self.assertEqual(perft(b, color, depth), expected, msg=name)
+            self.assertEqual(str(b), before)
+
+    def test_compare(self):
+        old = {"perft": {"start": {"nodes": 5, "expected": 5, "per_second": 100.0}},
+               "micro": {"str": {"per_second": 100.0}}}
+        new = {"perft": {"start": {"nodes": 5, "expected": 5, "per_second": 95.0}},
+               "micro": {"str": {"per_second": 50.0}, "new case": {"per_second": 1.0}}}
+        self.assertEqual(len(compare(old, new)), 1)
+        new["perft"]["start"]["nodes"] = 6
+        self.assertEqual(len(compare(old, new)), 2)
@@ -0,0 +1,56 @@
+import json
+import os
+import tempfile
+from unittest import TestCase, mock
+from amazons.base import Board, Coordinate
+from amazons.constants import *
+from amazons.engine import Engine
+from amazons.positions import split_position
+from amazons.profiling import instrumented, profile_from_environment, PROFILE_VARIABLE
+
+
+class TestProfiling(TestCase):
+    def test_instrumented(self):
+        push = Board.push
+        with instrumented() as profile:
+            self.assertIsNot(Board.push, push)
+            b = split_position()
+            b.move_and_burn(Coordinate(0, 0), Coordinate(1, 0), Coordinate(2, 0))
+            result = Engine(table_megabytes=1).search(b, BLACK_AMAZON, max_depth=2)
+        self.assertIs(Board.push, push)
+        self.assertEqual(profile.calls["move_and_burn"], 1)
+        self.assertEqual(profile.calls["set_square_value"], 7)
+        self.assertEqual(profile.calls["move_square"], 1)
+        self.assertEqual(profile.calls["Engine.search"], 1)
+        self.assertEqual(profile.searches[0]["nodes"], result.nodes)
+        self.assertGreater(profile.calls["legal_moves"], 0)
+        # nested calls are charged to their own stack
+        self.assertIn("move_and_burn;move_square", profile.stacks)
+        self.assertIn("Engine.search;legal_moves", profile.stacks)
+        self.assertLessEqual(profile.stacks["move_and_burn"], profile.seconds["move_and_burn"])
+
+        summary = profile.to_dict()
+        self.assertEqual(summary["search_totals"]["nodes"], result.nodes)
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "profile")
+            profile.dump_json(path + ".json")
+            profile.dump_collapsed(path + ".folded")
+            with open(path + ".json") as file:
+                self.assertEqual(json.load(file)["primitives"]["Engine.search"]["calls"], 1)
+            with open(path + ".folded") as file:
+                for line in file:
+                    stack, microseconds = line.rsplit(" ", 1)
+                    self.assertGreaterEqual(int(microseconds), 0)
+
+    def test_from_environment(self):
+        with mock.patch.dict(os.environ, {PROFILE_VARIABLE: ""}):
+            with profile_from_environment() as profile:
+                self.assertIsNone(profile)
+        with tempfile.TemporaryDirectory() as directory:
+            prefix = os.path.join(directory, "run")
+            with mock.patch.dict(os.environ, {PROFILE_VARIABLE: prefix}):
+                with profile_from_environment() as profile:
+                    Board.starting_position().legal_moves(WHITE_AMAZON)
+            self.assertEqual(profile.calls["legal_moves"], 1)
+            self.assertEqual(sorted(os.listdir(directory)),
+                             [f"run.{os.getpid()}.folded", f"run.{os.getpid()}.json"])
@@ -0,0 +1,54 @@
+import os
+import tempfile
+from unittest import TestCase, mock
+import numpy as np
+from amazons.base import Board, Coordinate
+from amazons.constants import *
+from amazons.records import GameWriter, GameReader, pack_moves, unpack_moves, square_bits
+
+
+class TestRecords(TestCase):
+    def test_pack_moves(self):
+        moves = np.array([[0, 99, 50], [99, 0, 1]])
+        self.assertEqual(square_bits(10, 10), 7)
+        self.assertEqual(unpack_moves(pack_moves(moves, 7), 7).tolist(), moves.tolist())
+        self.assertLess(int(pack_moves(moves, 7).max()), 2 ** 21)
+
+    def test_write_and_read(self):
+        games = []
+        for seed in range(3):
+            rng = np.random.default_rng(seed)
+            board = Board.starting_position()
+            if seed == 1:
+                board.set_square_value(Coordinate(5, 5), BURNT)
+            initial = board.copy()
+            color = WHITE_AMAZON
+            for _ in range(10 * seed):
+                moves = board.legal_moves(color)
+                board.push(moves[rng.integers(len(moves))])
+                color = OPPONENT[color]
+            games.append((initial, board))
+
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "games.amz")
+            with GameWriter(path) as writer:
+                for initial, board in games:
+                    writer.write(initial, np.array([entry[:3] for entry in board._history]).reshape(-1, 3),
+                                 winner=BLACK_AMAZON)
+            reader = GameReader(path)
+            self.assertEqual(len(reader), 3)
+            for game, (initial, board) in enumerate(games):
+                self.assertEqual(reader.initial_board(game), initial)
+                self.assertEqual(reader.game(game).winner, BLACK_AMAZON)
+                self.assertEqual(reader.board_at(game, len(board._history)), board)
+            self.assertEqual(len(reader.moves(2)), 20)
+            ply_five = reader.board_at(2, 5)
+
+            # the index can be rebuilt from the headers alone, in chunks
+            del reader
+            os.remove(path + ".idx")
+            with mock.patch("amazons.records.INDEX_CHUNK", 2):
+                reader = GameReader(path)
+            self.assertEqual(len(reader), 3)
+            self.assertEqual(reader.board_at(2, 5), ply_five)
+            del reader
@@ -0,0 +1,116 @@
+from unittest import TestCase
+import numpy as np
+from amazons.base import Board, Coordinate
+from amazons.constants import *
+from amazons.evaluation import analyze
+from amazons.positions import split_position
+from amazons.regions import label_regions, find_regions, fill_count, solved_balance, solved_score, SOLVED_SCORE
+
+
+def longest_fill(board: Board, color: int, memo: dict) -> int:
+    """Exhaustive search of a tiny board"""
+    if board.zobrist_hash not in memo:
+        best = 0
+        for move in board.legal_moves(color).tolist():
+            board.push(tuple(move))
+            best = max(best, 1 + longest_fill(board, color, memo))
+            board.pop()
+        memo[board.zobrist_hash] = best
+    return memo[board.zobrist_hash]
+
+
+def side_wins(board: Board, color: int, memo: dict) -> bool:
+    """Exhaustive search of a tiny board"""
+    key = (board.zobrist_hash, color)
+    if key not in memo:
+        memo[key] = False
+        for move in board.legal_moves(color).tolist():
+            board.push(tuple(move))
+            lost = not side_wins(board, OPPONENT[color], memo)
+            board.pop()
+            if lost:
+                memo[key] = True
+                break
+    return memo[key]
+
+
+class TestRegions(TestCase):
+    def test_label_regions(self):
+        state = np.array([[0, 1, 0, 0],
+                          [1, 0, 1, 1],
+                          [1, 1, 1, 0],
+                          [0, 0, 1, 2]], dtype=np.uint8)
+        labels, count = label_regions(state)
+        self.assertEqual(count, 3)
+        # diagonal steps connect squares
+        self.assertEqual(labels[0, 0], labels[1, 1])
+        self.assertEqual(labels[0, 0], labels[0, 2])
+        self.assertEqual(labels[2, 3], labels[3, 3])
+        self.assertEqual(labels[3, 0], labels[3, 1])
+        self.assertEqual(len({labels[0, 0], labels[2, 3], labels[3, 0]}), 3)
+        self.assertEqual(labels[0, 1], -1)
+
+    def test_find_regions(self):
+        b = split_position()
+        b.set_square_value(Coordinate(3, 2), WHITE_AMAZON)
+        regions = find_regions(b)
+        self.assertEqual([(r.white, r.black, r.empty) for r in regions], [(1, 0, 4), (1, 1, 3)])
+        self.assertEqual(regions[0].state.shape, (1, 5))
+        self.assertTrue(regions[1].mixed)
+        b.set_square_value(Coordinate(0, 2), EMPTY)
+        b.set_square_value(Coordinate(3, 2), EMPTY)
+        self.assertEqual(len(find_regions(b)), 2)
+        self.assertEqual(len(find_regions(b, with_amazons=True)), 1)
+
+    def test_fill_count(self):
+        # the amazon can burn the far square but then it is stuck
+        state = np.array([[2, 1],
+                          [1, 0]], dtype=np.uint8)
+        self.assertEqual(fill_count(state, WHITE_AMAZON), 1)
+        self.assertEqual(fill_count(np.array([[3, 1], [1, 0]], dtype=np.uint8), BLACK_AMAZON), 1)
+
+        rng = np.random.default_rng(1)
+        for _ in range(12):
+            state = np.where(rng.random((3, 3)) < 0.3, BURNT, EMPTY).astype(np.uint8)
+            state[1, 1] = WHITE_AMAZON
+            for region in find_regions(Board.from_state(state)):
+                if region.white:
+                    self.assertEqual(fill_count(region.state, WHITE_AMAZON),
+                                     longest_fill(Board.from_state(region.state), WHITE_AMAZON, {}))
+
+    def test_race(self):
+        b = split_position()
+        self.assertEqual(solved_balance(b, WHITE_AMAZON), 0)
+        self.assertEqual(solved_balance(b, BLACK_AMAZON), 0)
+        b.set_square_value(Coordinate(4, 2), BURNT)
+        self.assertEqual(solved_balance(b, WHITE_AMAZON), 1)
+        self.assertEqual(solved_score(b, WHITE_AMAZON), SOLVED_SCORE + 1)
+        self.assertEqual(solved_score(b, BLACK_AMAZON), -SOLVED_SCORE - 1)
+        self.assertIsNone(solved_balance(Board.starting_position(), WHITE_AMAZON))
+
+    def test_matches_exhaustive_search(self):
+        rng = np.random.default_rng(0)
+        checked = 0
+        while checked < 30:
+            state = np.where(rng.random((3, 3)) < 0.2, BURNT, EMPTY).astype(np.uint8)
+            free = np.flatnonzero(state.reshape(-1) == EMPTY)
+            if len(free) < 3:
+                continue
+            amazons = rng.choice(free, size=rng.integers(2, 4), replace=False)
+            state.reshape(-1)[amazons[:1]] = WHITE_AMAZON
+            state.reshape(-1)[amazons[1:]] = BLACK_AMAZON
+            b = Board.from_state(state)
+            for color in (WHITE_AMAZON, BLACK_AMAZON):
+                balance = solved_balance(b, color)
+                self.assertIsNotNone(balance)
+                self.assertEqual(balance > 0, side_wins(b, color, {}), msg=f"{b}\n{color}")
+                checked += 1
+
+    def test_evaluation_uses_solution(self):
+        b = split_position()
+        b.set_square_value(Coordinate(4, 2), BURNT)
+        result = analyze(b, WHITE_AMAZON)
+        self.assertTrue(result.solved[0])
+        self.assertEqual(result.score[0], SOLVED_SCORE + 1)
+        self.assertFalse(analyze(b, WHITE_AMAZON, solve_regions=False).solved[0])
+        self.assertFalse(analyze(Board.starting_position(), WHITE_AMAZON).solved[0])
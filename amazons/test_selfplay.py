@@ -0,0 +1,48 @@
+import os
+import tempfile
+from unittest import TestCase, mock
+import numpy as np
+from amazons.base import Board, Coordinate
+from amazons.constants import *
+from amazons.records import GameReader
+from amazons.selfplay import run_selfplay, play_game
+
+
+class TestSelfPlay(TestCase):
+    def test_run_selfplay(self):
+        with tempfile.TemporaryDirectory() as directory:
+            first, second = os.path.join(directory, "first.amz"), os.path.join(directory, "second.amz")
+            stats = run_selfplay(4, 2, first, seed=3)
+            run_selfplay(4, 1, second, seed=3)
+            with open(first, "rb") as file_one, open(second, "rb") as file_two:
+                self.assertEqual(file_one.read(), file_two.read())
+
+            reader = GameReader(first)
+            self.assertEqual(len(reader), 4)
+            self.assertEqual(stats.moves, sum(len(reader.moves(game)) for game in range(4)))
+            for game in range(4):
+                record = reader.game(game)
+                board = record.initial.copy()
+                color = WHITE_AMAZON
+                for move in record.moves.tolist():
+                    self.assertIn(move, board.legal_moves(color).tolist())
+                    board.push(move)
+                    color = OPPONENT[color]
+                self.assertEqual(board.count_legal_moves(color), 0)
+                self.assertEqual(record.winner, OPPONENT[color])
+            del reader, record
+
+    def test_engine_games_differ(self):
+        games = []
+        for seed in range(2):
+            b = Board(5, 5)
+            b.set_square_value(Coordinate(0, 0), WHITE_AMAZON)
+            b.set_square_value(Coordinate(4, 4), BLACK_AMAZON)
+            games.append(play_game(b, np.random.default_rng(seed), player="engine", node_limit=50)[0])
+        self.assertNotEqual(games[0], games[1])
+
+    def test_worker_failure(self):
+        with tempfile.TemporaryDirectory() as directory, \
+                mock.patch("amazons.selfplay.play_game", side_effect=ValueError("broken player")):
+            with self.assertRaisesRegex(RuntimeError, "broken player"):
+                run_selfplay(2, 1, os.path.join(directory, "games.amz"))
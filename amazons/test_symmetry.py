@@ -0,0 +1,58 @@
+from unittest import TestCase
+import numpy as np
+from amazons.base import Board
+from amazons.constants import *
+from amazons.positions import random_position
+from amazons.symmetry import canonicalize, canonical_hash, variants, variant_hashes, transform_move, \
+    symmetry_tables
+from amazons.zobrist import zobrist_keys
+
+
+class TestSymmetry(TestCase):
+    def test_variants_share_canonical_form(self):
+        b = random_position(7)
+        canonical, transform = canonicalize(b)
+        self.assertEqual(canonical._state.tobytes(), variants(b._state)[transform].tobytes())
+        for state in variants(b._state):
+            other, _ = canonicalize(Board.from_state(state))
+            self.assertEqual(other, canonical)
+            self.assertEqual(canonical_hash(Board.from_state(state)), canonical_hash(b))
+        self.assertLessEqual(canonical._state.tobytes(), b._state.tobytes())
+
+    def test_starting_position(self):
+        b = Board.starting_position()
+        hashes = variant_hashes(b)
+        # only the left-right mirror keeps the start position, so its 8 variants come in 4 distinct pairs
+        self.assertEqual(hashes[1], hashes[0])
+        self.assertEqual(len(set(hashes.tolist())), 4)
+
+    def test_variant_hashes(self):
+        b = random_position(5)
+        keys = zobrist_keys(10, 10)
+        self.assertEqual(variant_hashes(b).tolist(), [keys.hash_state(state) for state in variants(b._state)])
+
+    def test_moves_map_back(self):
+        b = random_position(3)
+        canonical, transform = canonicalize(b)
+        legal = canonical.legal_moves(BLACK_AMAZON).tolist()
+        for move in b.legal_moves(BLACK_AMAZON)[::50].tolist():
+            mapped = transform_move(move, transform, 10, 10)
+            self.assertIn(list(mapped), legal)
+            self.assertEqual(transform_move(mapped, transform, 10, 10, inverse=True), tuple(move))
+            b.push(move)
+            canonical.push(mapped)
+            self.assertEqual(canonical._state.tobytes(), variants(b._state)[transform].tobytes())
+            b.pop()
+            canonical.pop()
+
+    def test_non_square(self):
+        tables = symmetry_tables(5, 3)
+        self.assertEqual(tables.transforms, [0, 1, 2, 3])
+        self.assertEqual(tables.inverse, [0, 1, 2, 3])
+        self.assertEqual(symmetry_tables(4, 4).inverse[5:7], [6, 5])
+        state = np.zeros((3, 5), dtype=np.uint8)
+        state[0, 0] = WHITE_AMAZON
+        state[2, 4] = BURNT
+        self.assertEqual(variants(state).shape, (4, 3, 5))
+        canonical, _ = canonicalize(Board.from_state(state))
+        self.assertEqual((canonical.width, canonical.height), (5, 3))
@@ -0,0 +1,50 @@
+import sys
+from unittest import TestCase
+from amazons.base import Board
+from amazons.constants import *
+from amazons.tables import RayTables, ray_tables, cached_table_bytes, MAX_CACHED_SIZES
+
+
+class TestRayTables(TestCase):
+    def test_rays(self):
+        tables = ray_tables(4, 3)
+        # east from (1, 1) then north-west from (3, 2), padded with the off-board square 12
+        self.assertEqual(tables.rays[5, DIRECTIONS.index((1, 0))].tolist(), [6, 7, 12])
+        self.assertEqual(tables.rays[11, DIRECTIONS.index((-1, -1))].tolist(), [6, 1, 12])
+
+    def test_between(self):
+        tables = ray_tables(10, 10)
+        self.assertEqual(tables.between(0, 99).tolist(), [11, 22, 33, 44, 55, 66, 77, 88])
+        self.assertEqual(tables.between(0, 1).tolist(), [])
+        self.assertIsNone(tables.between(0, 12))
+        self.assertIsNone(tables.between(5, 5))
+        for start in range(100):
+            for end in range(100):
+                path = tables.between(start, end)
+                self.assertEqual(tables.between_paths[start][end], None if path is None else tuple(path.tolist()))
+
+    def test_nbytes_counts_between_paths(self):
+        tables = RayTables(10, 10)
+        arrays = tables.rays.nbytes + tables.direction.nbytes + tables.distance.nbytes
+        self.assertEqual(tables.nbytes, arrays)
+        paths = tables.between_paths
+        rows = sys.getsizeof(paths) + sum(sys.getsizeof(row) for row in paths)
+        # adjacent squares all share the empty tuple
+        tuples = sum(sys.getsizeof(path) for path in {id(path): path for row in paths for path in row
+                                                       if path is not None}.values())
+        self.assertGreaterEqual(tables.nbytes, arrays + rows + tuples)
+        # besides the lists and tuples only the square index integers are counted, once each
+        integers = sum(sys.getsizeof(square) for square in range(100))
+        self.assertLessEqual(tables.nbytes, arrays + rows + tuples + integers)
+        self.assertEqual(ray_tables(10, 10).between_paths, paths)
+        self.assertEqual(cached_table_bytes()[(10, 10)], ray_tables(10, 10).nbytes)
+        self.assertGreater(cached_table_bytes()[(10, 10)], arrays + rows)
+
+    def test_cache_is_shared_and_bounded(self):
+        self.assertIs(ray_tables(10, 10), ray_tables(10, 10))
+        Board(10, 10).legal_moves(WHITE_AMAZON)
+        self.assertIn((10, 10), cached_table_bytes())
+        for size in range(2, 3 + MAX_CACHED_SIZES):
+            ray_tables(size, 1)
+        self.assertEqual(len(cached_table_bytes()), MAX_CACHED_SIZES)
+        self.assertNotIn((10, 10), cached_table_bytes())
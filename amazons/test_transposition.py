@@ -0,0 +1,30 @@
+from unittest import TestCase
+from amazons.transposition import TranspositionTable, ENTRY_DTYPE, EXACT, LOWER_BOUND
+
+
+class TestTranspositionTable(TestCase):
+    def test_store_and_probe(self):
+        table = TranspositionTable(16)
+        self.assertIsNone(table.probe(2 ** 64 - 1))
+        self.assertTrue(table.store(2 ** 64 - 1, 3, 1.5, EXACT, (1, 2, 3)))
+        self.assertEqual(table.probe(2 ** 64 - 1), (1.5, 3, EXACT, (1, 2, 3)))
+        self.assertEqual((table.hits, table.misses, table.collisions), (1, 1, 0))
+        self.assertEqual(len(table), 1)
+
+    def test_depth_preferred_replacement(self):
+        table = TranspositionTable(16)
+        table.store(5, 4, 1.0, EXACT, (1, 2, 3))
+        # 21 shares slot 5 but was searched less deeply, so the deeper entry stays
+        self.assertFalse(table.store(21, 2, 2.0, EXACT, (4, 5, 6)))
+        self.assertIsNone(table.probe(21))
+        self.assertEqual(table.collisions, 1)
+        self.assertTrue(table.store(21, 4, 2.0, LOWER_BOUND, (4, 5, 6)))
+        self.assertEqual(table.probe(21)[2], LOWER_BOUND)
+        # the same position is always refreshed
+        self.assertTrue(table.store(21, 1, 3.0, EXACT, (7, 8, 9)))
+        self.assertEqual(table.stats()["rejected"], 1)
+
+    def test_from_megabytes(self):
+        table = TranspositionTable.from_megabytes(1)
+        self.assertLessEqual(table.nbytes, 2 ** 20)
+        self.assertEqual(table.capacity, 2 ** 20 // ENTRY_DTYPE.itemsize)
@@ -0,0 +1,44 @@
+import time
+from unittest import TestCase
+from amazons.base import Board
+from amazons.constants import *
+from amazons.positions import trapped_position
+from amazons.worker import EngineWorker
+
+
+def wait_for(worker: EngineWorker, done: bool = True, seconds: float = 30.0) -> list:
+    """Poll a worker until an update arrives, a final one if done"""
+    updates = []
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        updates += worker.poll()
+        if updates and (updates[-1].done or not done):
+            return updates
+        time.sleep(0.01)
+    raise TimeoutError("no update from the engine worker")
+
+
+class TestWorker(TestCase):
+    def test_search(self):
+        with EngineWorker(table_megabytes=1) as worker:
+            b = trapped_position()
+            job = worker.search(b, WHITE_AMAZON, time_limit=5)
+            updates = wait_for(worker)
+            self.assertTrue(all(update.job == job for update in updates))
+            self.assertFalse(updates[0].done)
+            b.push(updates[-1].result.move)
+            self.assertEqual(b.count_legal_moves(BLACK_AMAZON), 0)
+
+    def test_cancel_on_new_request(self):
+        with EngineWorker(table_megabytes=1) as worker:
+            b = Board.starting_position()
+            pondering = worker.ponder(b, WHITE_AMAZON)
+            self.assertTrue(wait_for(worker, done=False)[0].ponder)
+            # without a time limit the ponder search would run for good, so the new job has to cancel it
+            job = worker.search(b, WHITE_AMAZON, node_limit=200)
+            updates = wait_for(worker)
+            self.assertGreater(job, pondering)
+            self.assertTrue(all(update.job == job and not update.ponder for update in updates))
+            self.assertIn(list(updates[-1].result.move), b.legal_moves(WHITE_AMAZON).tolist())
+            worker.cancel()
+            self.assertEqual(worker.poll(), [])
@@ -0,0 +1,105 @@
+from __future__ import annotations
+import numpy as np
+from typing import List, Set, Dict, Tuple, Optional
+
+# how a stored score relates to the true score of the position
+EXACT: int = 0
+LOWER_BOUND: int = 1
+UPPER_BOUND: int = 2
+
+ENTRY_DTYPE: np.dtype = np.dtype([("key", np.uint64),
+                                  ("score", np.float32),
+                                  ("depth", np.int16),
+                                  ("flag", np.uint8),
+                                  ("move", np.int16, (3,))])
+
+
+class TranspositionTable:
+    """ Fixed capacity table of search results keyed by Zobrist hash
+
+    Each hash maps to one slot. A new result only replaces the slot's current entry if it comes from a search
+    at least as deep, so expensive results survive a flood of shallow ones.
+    """
+    def __init__(self, capacity: int) -> None:
+        assert capacity > 0
+        self.capacity: int = capacity
+        self._entries: np.ndarray = np.zeros(capacity, dtype=ENTRY_DTYPE)
+        self._entries["depth"] = -1  # marks an empty slot
+        self.hits: int = 0
+        self.misses: int = 0
+        self.collisions: int = 0
+        self.stores: int = 0
+        self.rejected: int = 0
+
+    @classmethod
+    def from_megabytes(cls, megabytes: float) -> TranspositionTable:
+        """Make the largest table that fits in a memory budget
+        :param megabytes: memory budget for the entries
+        :return: a new empty table
+        """
+        return cls(max(1, int(megabytes * 2 ** 20) // ENTRY_DTYPE.itemsize))
+
+    @property
+    def nbytes(self) -> int:
+        """Memory held by the entries in bytes"""
+        return self._entries.nbytes
+
+    def __len__(self) -> int:
+        """Number of occupied slots"""
+        return int(np.count_nonzero(self._entries["depth"] >= 0))
+
+    def probe(self, key: int) -> Optional[Tuple[float, int, int, Tuple[int, int, int]]]:
+        """Look up a position
+        :param key: Zobrist hash of the position
+        :return: (score, depth, flag, move) if the position is stored, otherwise None
+        """
+        entry = self._entries[key % self.capacity]
+        if entry["depth"] < 0:
+            self.misses += 1
+            return None
+        if int(entry["key"]) != key:
+            # the slot holds a different position that shares the same slot
+            self.misses += 1
+            self.collisions += 1
+            return None
+        self.hits += 1
+        start, end, burn = entry["move"].tolist()
+        return float(entry["score"]), int(entry["depth"]), int(entry["flag"]), (start, end, burn)
+
+    def store(self, key: int, depth: int, score: float, flag: int, move: Tuple[int, int, int]) -> bool:
+        """Store a search result, unless its slot already holds a deeper result
+        :param key: Zobrist hash of the position
+        :param depth: remaining depth the position was searched to
+        :param score: the score found
+        :param flag: EXACT, LOWER_BOUND or UPPER_BOUND
+        :param move: best (start, end, burn) move found, or (-1, -1, -1) if there is none
+        :return: True if the result was stored
+        """
+        slot = key % self.capacity
+        stored_depth = self._entries["depth"][slot]
+        if stored_depth > depth and int(self._entries["key"][slot]) != key:
+            self.rejected += 1
+            return False
+        self._entries[slot] = (key, score, depth, flag, move)
+        self.stores += 1
+        return True
+
+    def clear(self) -> None:
+        """Empty the table and reset the counters"""
+        self._entries["depth"] = -1
+        self.hits = self.misses = self.collisions = self.stores = self.rejected = 0
+
+    def stats(self) -> Dict[str, float]:
+        """Summarize how the table is being used, for sizing it
+        :return: counters plus the fill and hit rates
+        """
+        probes = self.hits + self.misses
+        return {"capacity": self.capacity,
+                "bytes": self.nbytes,
+                "filled": len(self) / self.capacity,
+                "hits": self.hits,
+                "misses": self.misses,
+                "collisions": self.collisions,
+                "stores": self.stores,
+                "rejected": self.rejected,
+                "hit_rate": self.hits / probes if probes else 0.0}
@@ -0,0 +1,146 @@
+"""Engine searches in a background process
+
+The GUI must draw a frame every 16 ms, which a search on the main thread would make impossible, and a thread
+would share the interpreter lock with the event loop. EngineWorker runs an Engine in its own process instead and
+talks to it through two queues: requests go in with put, progress comes back through get_nowait, so neither side
+ever blocks the other. Every request gets a job number and the number of the newest job is kept in shared
+memory; a search stops at its next node once its job is no longer the newest, which is how a new request
+cancels the one before it. The engine and its transposition table live as long as the process, so a search of
+the opponent's position while they think (pondering) leaves work behind for the reply.
+"""
+from __future__ import annotations
+import multiprocessing
+import os
+import queue
+import traceback
+import numpy as np
+from dataclasses import dataclass
+from typing import List, Set, Dict, Tuple, Optional
+from amazons.base import Board
+from amazons.book import OpeningBook
+from amazons.constants import *
+from amazons.engine import Engine, SearchResult
+
+# seconds close waits for the process to finish before terminating it
+JOIN_SECONDS: float = 5.0
+# added to the engine process's niceness, so that when it has to share a core the GUI gets it first
+ENGINE_NICENESS: int = 10
+
+
+@dataclass
+class WorkerUpdate:
+    """ Class for one message from the engine process"""
+    job: int
+    result: Optional[SearchResult]
+    # True for the final result of a job, False for the result of one completed iteration
+    done: bool
+    ponder: bool = False
+    error: Optional[str] = None
+
+
+def _engine_process(requests: multiprocessing.Queue, updates: multiprocessing.Queue, latest,
+                    book_path: Optional[str], table_megabytes: float) -> None:
+    """Serve search requests until a None request arrives
+    :param requests: queue of (job, state, color, time_limit, node_limit, ponder) requests
+    :param updates: queue the WorkerUpdates are put on
+    :param latest: shared number of the newest job, any other job is cancelled
+    :param book_path: opening book for the engine, or None
+    :param table_megabytes: transposition table size
+    """
+    if hasattr(os, "nice"):
+        os.nice(ENGINE_NICENESS)
+    engine = Engine(table_megabytes, book=None if book_path is None else OpeningBook(book_path))
+    while True:
+        request = requests.get()
+        if request is None:
+            break
+        job, state, color, time_limit, node_limit, ponder = request
+        if job != latest.value:
+            continue
+        try:
+            result = engine.search(Board.from_state(state), color, time_limit=time_limit, node_limit=node_limit,
+                                   callback=lambda partial: updates.put(WorkerUpdate(job, partial, False, ponder)),
+                                   stop=lambda: latest.value != job)
+            updates.put(WorkerUpdate(job, result, True, ponder))
+        except Exception:
+            updates.put(WorkerUpdate(job, None, True, ponder, traceback.format_exc()))
+
+
+class EngineWorker:
+    """ Class for running engine searches in a background process without ever blocking the caller"""
+    def __init__(self, book_path: Optional[str] = None, table_megabytes: float = 64) -> None:
+        # spawn rather than fork so the child does not inherit the GUI's display connection
+        context = multiprocessing.get_context("spawn")
+        self._requests: multiprocessing.Queue = context.Queue()
+        self._updates: multiprocessing.Queue = context.Queue()
+        self._latest = context.RawValue("q", 0)
+        self._job: int = 0
+        self._process = context.Process(target=_engine_process, daemon=True,
+                                        args=(self._requests, self._updates, self._latest, book_path,
+                                              table_megabytes))
+        self._process.start()
+
+    def __enter__(self) -> EngineWorker:
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    @property
+    def job(self) -> int:
+        """Number of the newest job, the only one whose updates poll returns"""
+        return self._job
+
+    def search(self, board: Board, color: int, time_limit: Optional[float] = None,
+               node_limit: Optional[int] = None, ponder: bool = False) -> int:
+        """Start searching a position, cancelling whatever the engine was doing
+        :param board: the position, it is copied so the caller may change it right away
+        :param color: side to move
+        :param time_limit: seconds the search may take, or None to search until cancelled or decided
+        :param node_limit: nodes the search may visit, or None for no limit
+        :param ponder: mark the updates as coming from a search made only to fill the engine's tables
+        :return: the job number of the search
+        """
+        self._job += 1
+        self._latest.value = self._job
+        self._requests.put((self._job, board._state.copy(), color, time_limit, node_limit, ponder))
+        return self._job
+
+    def ponder(self, board: Board, color: int) -> int:
+        """Search a position the opponent is thinking about until the next request cancels it
+        :param board: the position, with the opponent to move
+        :param color: the opponent
+        :return: the job number of the search
+        """
+        return self.search(board, color, ponder=True)
+
+    def cancel(self) -> None:
+        """Stop the current search, its remaining updates are dropped"""
+        self._job += 1
+        self._latest.value = self._job
+
+    def poll(self) -> List[WorkerUpdate]:
+        """Collect the updates of the newest job that arrived since the last poll without waiting
+        :return: the updates, oldest first
+        """
+        updates = []
+        while True:
+            try:
+                update = self._updates.get_nowait()
+            except queue.Empty:
+                break
+            if update.job != self._job:
+                continue
+            if update.error is not None:
+                raise RuntimeError(f"engine search failed:\n{update.error}")
+            updates.append(update)
+        return updates
+
+    def close(self) -> None:
+        """Cancel any search and stop the process"""
+        if self._process.is_alive():
+            self.cancel()
+            self._requests.put(None)
+            self._process.join(JOIN_SECONDS)
+            if self._process.is_alive():
+                self._process.terminate()
@@ -0,0 +1,46 @@
+from __future__ import annotations
+import numpy as np
+from functools import lru_cache
+from typing import List, Set, Dict, Tuple, Optional
+from amazons.constants import *
+
+# fixed so that hashes agree between processes and runs, e.g. for opening books or stored positions
+ZOBRIST_SEED: int = 20200714
+
+
+class ZobristKeys:
+    """ Random 64 bit keys for every (square, value) pair of one board size
+
+    A position hashes to the XOR of the keys of the value on every square, so changing a square only needs
+    two XORs: one to remove the old value's key and one to add the new value's key.
+    """
+    def __init__(self, width: int, height: int) -> None:
+        rng = np.random.default_rng((ZOBRIST_SEED, width, height))
+        self.width: int = width
+        self.height: int = height
+        # keys[square, value] for value in EMPTY, BURNT, WHITE_AMAZON, BLACK_AMAZON
+        self.keys: np.ndarray = rng.integers(0, np.iinfo(np.uint64).max, size=(width * height, 4),
+                                             dtype=np.uint64, endpoint=True)
+        # XORed in by searches when black is to move so the same squares with a different mover hash apart
+        self.side: int = int(rng.integers(0, np.iinfo(np.uint64).max, dtype=np.uint64, endpoint=True))
+        # the same keys as Python ints, which are much faster to XOR one at a time
+        self.squares: List[List[int]] = self.keys.tolist()
+        self.empty_hash: int = int(np.bitwise_xor.reduce(self.keys[:, EMPTY]))
+
+    def hash_state(self, state: np.ndarray) -> int:
+        """Hash a state from scratch
+        :param state: a (height, width) array of square values
+        :return: the Zobrist hash
+        """
+        flat = state.reshape(-1)
+        return int(np.bitwise_xor.reduce(self.keys[np.arange(flat.size), flat]))
+
+
+@lru_cache(maxsize=8)
+def zobrist_keys(width: int, height: int) -> ZobristKeys:
+    """Get the shared Zobrist keys for a board size
+    :param width: board width
+    :param height: board height
+    :return: the keys for that size
+    """
+    return ZobristKeys(width, height)
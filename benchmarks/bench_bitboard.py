@@ -0,0 +1,59 @@
+"""Compare move generation on the NumPy Board against the BitBoard on the standard 10x10 start
+
+Run from the repository root with ``python -m benchmarks.bench_bitboard``.
+"""
+from __future__ import annotations
+import time
+from typing import List, Tuple
+from amazons.base import Board, Coordinate
+from amazons.bitboard import BitBoard
+from amazons.constants import *
+
+
+def numpy_legal_moves(board: Board, color: int) -> List[Tuple[int, int, int]]:
+    """Generate legal moves using only the per-square Board API
+    :param board: board to generate moves for, left unchanged
+    :param color: WHITE_AMAZON or BLACK_AMAZON
+    :return: a list of (start, end, burn) square indices
+    """
+    squares = [Coordinate(x, y) for y in range(board.height) for x in range(board.width)]
+    moves = []
+    for start in squares:
+        if board.get_square_value(start) != color:
+            continue
+        for end in squares:
+            if not board.empty_between_squares(start, end, include_end=True):
+                continue
+            board.move(start, end)
+            for burn in squares:
+                if board.empty_between_squares(end, burn, include_end=True):
+                    moves.append((start.y * board.width + start.x,
+                                  end.y * board.width + end.x,
+                                  burn.y * board.width + burn.x))
+            board.move(end, start)
+    return moves
+
+
+def time_call(function, repeats: int) -> float:
+    """Time a function call
+    :param function: zero argument function to run
+    :param repeats: how many times to run it
+    :return: mean seconds per call
+    """
+    start = time.perf_counter()
+    for _ in range(repeats):
+        function()
+    return (time.perf_counter() - start) / repeats
+
+
+if __name__ == "__main__":
+    board = Board.starting_position(10)
+    bitboard = BitBoard.from_board(board)
+    assert sorted(numpy_legal_moves(board, WHITE_AMAZON)) == sorted(bitboard.legal_moves(WHITE_AMAZON))
+
+    numpy_time = time_call(lambda: numpy_legal_moves(board, WHITE_AMAZON), 3)
+    bitboard_time = time_call(lambda: bitboard.legal_moves(WHITE_AMAZON), 20)
+    count_time = time_call(lambda: bitboard.count_legal_moves(WHITE_AMAZON), 20)
+    print(f"numpy Board legal moves:      {numpy_time * 1e3:10.2f} ms")
+    print(f"BitBoard legal moves:         {bitboard_time * 1e3:10.2f} ms ({numpy_time / bitboard_time:.0f}x)")
+    print(f"BitBoard legal move count:    {count_time * 1e3:10.2f} ms ({numpy_time / count_time:.0f}x)")
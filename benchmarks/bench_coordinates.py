@@ -0,0 +1,49 @@
+"""Time the per-call cost of the Coordinate API and of the square index API of Board
+
+Run from the repository root with ``python -m benchmarks.bench_coordinates``. The index API skips building
+Coordinate objects and checking them, so each index row is the floor for the Coordinate row above it.
+"""
+from __future__ import annotations
+import timeit
+from amazons.base import Board, Coordinate, Distance
+from amazons.constants import *
+
+REPEATS = 5
+NUMBER = 20000
+
+
+def per_call(statement, number: int = NUMBER) -> float:
+    """Time a call
+    :param statement: zero argument function to run
+    :param number: calls per timing round
+    :return: seconds per call in the fastest of REPEATS rounds
+    """
+    return min(timeit.repeat(statement, repeat=REPEATS, number=number)) / number
+
+
+if __name__ == "__main__":
+    board = Board.starting_position()
+    start, end, far = Coordinate(3, 9), Coordinate(3, 3), Coordinate(9, 9)
+    step, long = Distance(1, 1), Distance(6, 0)
+    cases = {
+        "Coordinate(x, y)": lambda: Coordinate(3, 4),
+        "Coordinate + Distance": lambda: start + step,
+        "Coordinate - Coordinate": lambda: end - start,
+        "Distance.unit_step": lambda: long.unit_step,
+        "Distance.is_diagonal": lambda: step.is_diagonal(),
+        "get_square_value": lambda: board.get_square_value(end),
+        "get_square": lambda: board.get_square(33),
+        "set_square_value": lambda: board.set_square_value(end, EMPTY),
+        "set_square": lambda: board.set_square(33, EMPTY),
+        "move + move back": lambda: (board.move(start, end), board.move(end, start)),
+        "move_square + move back": lambda: (board.move_square(93, 33), board.move_square(33, 93)),
+        "burn": lambda: board.burn(Coordinate(5, 5)),
+        "burn_square": lambda: board.burn_square(55),
+        "empty_between_squares": lambda: board.empty_between_squares(Coordinate(0, 0), far),
+        "empty_between": lambda: board.empty_between(0, 99),
+    }
+    for name, statement in cases.items():
+        try:
+            print(f"{name:28s} {per_call(statement) * 1e9:9.0f} ns")
+        except AttributeError:
+            print(f"{name:28s} {'missing':>9s}")
@@ -0,0 +1,40 @@
+"""Measure how fast training batches are encoded and streamed from game records
+
+Run from the repository root with ``python -m benchmarks.bench_dataset``.
+"""
+from __future__ import annotations
+import os
+import tempfile
+import time
+import numpy as np
+from amazons.base import Board
+from amazons.constants import *
+from amazons.dataset import training_batches
+from amazons.features import encode
+from amazons.records import GameWriter
+from amazons.selfplay import play_game
+from benchmarks.bench_bitboard import time_call
+
+GAMES = 200
+BATCH_SIZE = 256
+
+if __name__ == "__main__":
+    initial = Board.starting_position()
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "games.amz")
+        with GameWriter(path) as writer:
+            for seed in range(GAMES):
+                moves, winner = play_game(initial.copy(), np.random.default_rng(seed))
+                writer.write(initial, np.array(moves, dtype=np.int16), winner)
+
+        for mobility, territory in [(False, False), (True, False), (True, True)]:
+            first = next(training_batches([path], BATCH_SIZE, mobility, territory, seed=0))
+            states = (first.planes[:, 1] * BURNT + first.planes[:, 2] * WHITE_AMAZON
+                      + first.planes[:, 3] * BLACK_AMAZON).astype(np.uint8)
+            encoding = time_call(lambda: encode(states, WHITE_AMAZON, mobility, territory), 20)
+            started = time.perf_counter()
+            positions = sum(len(batch.values)
+                            for batch in training_batches([path], BATCH_SIZE, mobility, territory, seed=0))
+            seconds = time.perf_counter() - started
+            print(f"{first.planes.shape[1]} planes: encode {BATCH_SIZE / encoding:10.0f} positions/s, "
+                  f"stream {positions / seconds:10.0f} positions/s over {positions} positions")
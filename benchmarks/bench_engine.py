@@ -0,0 +1,21 @@
+"""Report engine speed and time-to-depth on fixed 10x10 positions
+
+Run from the repository root with ``python -m benchmarks.bench_engine``.
+"""
+from __future__ import annotations
+from amazons.constants import *
+from amazons.engine import Engine
+from amazons.positions import random_position
+
+POSITIONS = {"opening": 0, "middlegame": 30, "endgame": 60}
+TIME_LIMIT = 20.0
+
+if __name__ == "__main__":
+    for name, plies in POSITIONS.items():
+        board = random_position(plies)
+        color = WHITE_AMAZON if plies % 2 == 0 else BLACK_AMAZON
+        print(f"{name} ({plies} plies, {board.count_legal_moves(color)} legal moves)")
+        result = Engine().search(board, color, max_depth=3, time_limit=TIME_LIMIT,
+                                 callback=lambda r: print(f"  depth {r.depth}: {r.elapsed:8.2f} s "
+                                                          f"{r.nodes:9d} nodes {r.nodes_per_second:9.0f} nodes/s"))
+        print(f"  reached depth {result.depth}, {result.nodes_per_second:.0f} nodes/s overall")
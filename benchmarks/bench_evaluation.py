@@ -0,0 +1,36 @@
+"""Time territory and mobility evaluation of single 10x10 boards and of stacks of boards, and of endgame boards
+where the region solver runs
+
+Run from the repository root with ``python -m benchmarks.bench_evaluation``.
+"""
+from __future__ import annotations
+import numpy as np
+from amazons.constants import *
+from amazons import regions
+from amazons.evaluation import analyze, evaluate
+from amazons.positions import random_position
+from benchmarks.bench_bitboard import time_call
+
+BATCH_SIZES = [1, 32, 256, 1024]
+
+if __name__ == "__main__":
+    positions = [random_position(plies, seed=plies) for plies in range(80)]
+    board = positions[30]
+    single = time_call(lambda: evaluate(board, WHITE_AMAZON), 200)
+    print(f"single board evaluate: {single * 1e6:8.1f} us")
+    for size in BATCH_SIZES:
+        states = np.stack([positions[i % len(positions)]._state for i in range(size)])
+        seconds = time_call(lambda: analyze(states, WHITE_AMAZON), max(3, 2000 // size))
+        print(f"batch of {size:5d}:        {seconds / size * 1e6:8.1f} us per board")
+
+    endgames = [random_position(plies, seed=seed) for seed in range(20) for plies in range(60, 92, 4)]
+    cold, unsolved, solved = [], [], 0
+    for board in endgames:
+        regions._fill.cache_clear()
+        regions._mixed.cache_clear()
+        cold.append(time_call(lambda: analyze(board, WHITE_AMAZON), 1))
+        unsolved.append(time_call(lambda: analyze(board, WHITE_AMAZON, solve_regions=False), 1))
+        solved += int(analyze(board, WHITE_AMAZON).solved[0])
+    print(f"endgame boards:        {np.mean(cold) * 1e6:8.1f} us mean, {np.max(cold) * 1e6:8.1f} us worst with an "
+          f"empty solver cache, {np.mean(unsolved) * 1e6:8.1f} us without solving, "
+          f"{solved} of {len(endgames)} solved")
@@ -0,0 +1,32 @@
+"""Report Monte Carlo tree search speed, memory per node and how it scales with more cores
+
+Run from the repository root with ``python -m benchmarks.bench_mcts``.
+"""
+from __future__ import annotations
+import multiprocessing
+from amazons.constants import *
+from amazons.mcts import MCTS, root_parallel_search
+from amazons.positions import random_position
+
+TIME_LIMIT = 5.0
+
+
+def report(name: str, result) -> None:
+    print(f"  {name:12s} {result.playouts:7d} playouts {result.playouts_per_second:8.0f} playouts/s "
+          f"{result.nodes:7d} nodes {result.bytes_per_node:7.0f} bytes/node")
+
+
+if __name__ == "__main__":
+    board = random_position(20)
+    print(f"middlegame (20 plies, {board.count_legal_moves(WHITE_AMAZON)} legal moves), {TIME_LIMIT:.0f} s each")
+    report("1 process", MCTS(seed=0).search(board, WHITE_AMAZON, time_limit=TIME_LIMIT))
+    cores = multiprocessing.cpu_count()
+    workers = sorted({1, 2, 4, 8, cores} & set(range(1, cores + 1)))
+    print("root parallel, one tree per process")
+    for processes in workers:
+        report(f"{processes} processes", root_parallel_search(board, WHITE_AMAZON, processes,
+                                                              time_limit=TIME_LIMIT))
+    print("tree parallel, one shared tree with virtual loss")
+    for threads in workers:
+        report(f"{threads} threads", MCTS(seed=0).search(board, WHITE_AMAZON, time_limit=TIME_LIMIT,
+                                                         threads=threads))
@@ -0,0 +1,48 @@
+"""Measure game record write throughput and random-access read latency
+
+Run from the repository root with ``python -m benchmarks.bench_records``.
+"""
+from __future__ import annotations
+import os
+import tempfile
+import time
+import numpy as np
+from amazons.base import Board
+from amazons.records import GameWriter, GameReader
+from amazons.selfplay import play_game
+
+DISTINCT_GAMES = 50
+GAMES = 20000
+READS = 2000
+
+if __name__ == "__main__":
+    initial = Board.starting_position()
+    games = []
+    for seed in range(DISTINCT_GAMES):
+        moves, winner = play_game(initial.copy(), np.random.default_rng(seed))
+        games.append((np.array(moves, dtype=np.int16), winner))
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "games.amz")
+        started = time.perf_counter()
+        with GameWriter(path) as writer:
+            for game in range(GAMES):
+                writer.write(initial, *games[game % DISTINCT_GAMES])
+        seconds = time.perf_counter() - started
+        size = os.path.getsize(path)
+        moves = sum(len(games[game % DISTINCT_GAMES][0]) for game in range(GAMES))
+        print(f"write: {GAMES / seconds:9.0f} games/s {moves / seconds:10.0f} moves/s "
+              f"{size / seconds / 2 ** 20:7.1f} MB/s, {size / moves:.2f} bytes per move on disk")
+
+        reader = GameReader(path)
+        rng = np.random.default_rng(0)
+        picks = rng.integers(GAMES, size=READS)
+        started = time.perf_counter()
+        for game in picks:
+            reader.moves(game)
+        print(f"random game read:     {(time.perf_counter() - started) / READS * 1e6:8.1f} us")
+        started = time.perf_counter()
+        for game in picks:
+            reader.board_at(game, rng.integers(len(games[game % DISTINCT_GAMES][0]) + 1))
+        print(f"random position read: {(time.perf_counter() - started) / READS * 1e6:8.1f} us")
+        del reader
@@ -0,0 +1,25 @@
+"""Count the leaves of the move tree to a fixed depth
+
+Perft counts depend only on the move generator, so they are known exactly and make a regression check for it as
+well as a throughput benchmark. The last ply is counted with count_legal_moves rather than generated.
+"""
+from __future__ import annotations
+from amazons.base import Board
+from amazons.constants import *
+
+
+def perft(board: Board, color: int, depth: int) -> int:
+    """Count the move sequences of a given length
+    :param board: the position, it is restored before returning
+    :param color: side to move
+    :param depth: plies to play, at least 1
+    :return: the number of distinct sequences of depth legal moves
+    """
+    if depth == 1:
+        return board.count_legal_moves(color)
+    nodes = 0
+    for move in board.legal_moves(color).tolist():
+        board.push(move)
+        nodes += perft(board, OPPONENT[color], depth - 1)
+        board.pop()
+    return nodes
@@ -0,0 +1,128 @@
+"""Run the perft counts and board microbenchmarks and write the results as JSON
+
+Run from the repository root with ``python -m benchmarks.suite --output results.json``. Passing the JSON of an
+earlier run with ``--compare`` prints the speed of every case relative to it and exits with status 1 if a perft
+count changed or any case got slower by more than ``--tolerance``.
+"""
+from __future__ import annotations
+import argparse
+import json
+import platform
+import sys
+import time
+import timeit
+import numpy as np
+from typing import List, Set, Dict, Tuple, Optional, Callable
+from amazons.base import Board, Coordinate
+from amazons.constants import *
+from amazons.positions import random_position
+from benchmarks.perft import perft
+
+# name: (position, side to move, depth, expected leaf count)
+PERFT_CASES: Dict[str, Tuple[Callable[[], Board], int, int, int]] = {
+    "start 6x6": (lambda: Board.starting_position(6), WHITE_AMAZON, 2, 198070),
+    "start 8x8": (lambda: Board.starting_position(8), WHITE_AMAZON, 2, 1331198),
+    "start 10x10": (lambda: Board.starting_position(10), WHITE_AMAZON, 2, 4307152),
+    "middlegame 10x10": (lambda: random_position(30), WHITE_AMAZON, 2, 146639),
+}
+# each microbenchmark is timed REPEATS times over NUMBER calls and the fastest round is kept
+REPEATS: int = 5
+NUMBER: int = 2000
+# fraction a case may slow down by before --compare reports it
+TOLERANCE: float = 0.1
+
+
+def microbenchmarks() -> Dict[str, Callable[[], object]]:
+    """Build the zero argument calls to time
+    :return: the calls keyed by name
+    """
+    board = Board.starting_position()
+    state = board._state.copy()
+    start, end, burn = Coordinate(3, 9), Coordinate(3, 3), Coordinate(6, 3)
+    played = Board.starting_position()
+
+    def move_and_burn() -> None:
+        # moving back to the start burns the same square again, so every call leaves the board alike
+        played.move_and_burn(start, end, burn)
+        played.move_and_burn(end, start, burn)
+
+    return {"empty_between_squares": lambda: board.empty_between_squares(Coordinate(0, 0), Coordinate(9, 9)),
+            "empty_between_squares blocked": lambda: board.empty_between_squares(Coordinate(0, 0),
+                                                                                  Coordinate(0, 9)),
+            "empty_between": lambda: board.empty_between(0, 99),
+            "move_and_burn (2 calls)": move_and_burn,
+            "Board.__str__": lambda: str(board),
+            "Board()": lambda: Board(10, 10),
+            "Board.starting_position": lambda: Board.starting_position(10),
+            "Board.from_state": lambda: Board.from_state(state)}
+
+
+def run() -> dict:
+    """Run every case
+    :return: the results, ready to be written as JSON
+    """
+    results = {"meta": {"python": platform.python_version(), "numpy": np.__version__,
+                        "machine": platform.machine(), "system": platform.system()},
+               "perft": {}, "micro": {}}
+    for name, (position, color, depth, expected) in PERFT_CASES.items():
+        board = position()
+        started = time.perf_counter()
+        nodes = perft(board, color, depth)
+        seconds = time.perf_counter() - started
+        results["perft"][name] = {"depth": depth, "nodes": nodes, "expected": expected, "seconds": seconds,
+                                  "per_second": nodes / seconds}
+    for name, call in microbenchmarks().items():
+        seconds = min(timeit.repeat(call, repeat=REPEATS, number=NUMBER)) / NUMBER
+        results["micro"][name] = {"seconds": seconds, "per_second": 1 / seconds}
+    return results
+
+
+def compare(old: dict, new: dict, tolerance: float = TOLERANCE) -> List[str]:
+    """Compare two runs
+    :param old: results of the earlier run
+    :param new: results of this run
+    :param tolerance: fraction a case may slow down by before it counts as a regression
+    :return: a description of every regression, empty if there are none
+    """
+    regressions = []
+    for section in ["perft", "micro"]:
+        for name, case in new[section].items():
+            if section == "perft" and case["nodes"] != case["expected"]:
+                regressions.append(f"{name}: {case['nodes']} perft nodes, expected {case['expected']}")
+            if name not in old.get(section, {}):
+                continue
+            ratio = case["per_second"] / old[section][name]["per_second"]
+            print(f"{section:6s} {name:32s} {ratio:6.2f}x")
+            if ratio < 1 - tolerance:
+                regressions.append(f"{name}: {ratio:.2f}x the speed of the earlier run")
+    return regressions
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Run the Game of the Amazons benchmark suite")
+    parser.add_argument("--output", default="benchmarks.json", help="file to write the results to")
+    parser.add_argument("--compare", help="results of an earlier run to compare against")
+    parser.add_argument("--tolerance", type=float, default=TOLERANCE, help="allowed fractional slowdown")
+    args = parser.parse_args()
+
+    results = run()
+    for name, case in results["perft"].items():
+        status = "ok" if case["nodes"] == case["expected"] else f"MISMATCH, expected {case['expected']}"
+        print(f"perft {name:20s} depth {case['depth']} {case['nodes']:10d} {case['per_second']:12.0f} nodes/s "
+              f"{status}")
+    for name, case in results["micro"].items():
+        print(f"{name:32s} {case['seconds'] * 1e6:10.2f} us")
+    with open(args.output, "w") as file:
+        json.dump(results, file, indent=2)
+
+    if args.compare is not None:
+        with open(args.compare) as file:
+            regressions = compare(json.load(file), results, args.tolerance)
+        for regression in regressions:
+            print(f"regression: {regression}")
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,21 +1,28 @@
 from amazons.base import Board, Coordinate
+from amazons.book import OpeningBook
 from amazons.gui import GUI
 from amazons.constants import *
 import pygame
 from pygame.locals import *
+import argparse
 import sys
 import numpy as np
 
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Play the Game of the Amazons")
+    parser.add_argument("--book", help="opening book built with python -m amazons.book")
+    parser.add_argument("--engine", choices=["white", "black"], help="let the engine play this side")
+    parser.add_argument("--think", type=float, default=5.0, help="seconds the engine thinks per move")
+    args = parser.parse_args()
+
     pygame.init()
     # Setting up FPS
     FPS = 60
     clock = pygame.time.Clock()
 
     # Create a white screen
-    display_surface = pygame.display.set_mode((800, 800))
-    display_surface.fill(BLACK)
+    display_surface = pygame.display.set_mode((800, 800), RESIZABLE)
     pygame.display.set_caption("Game of the Amazons")
     print(display_surface.get_size())
 
@@ -28,13 +35,15 @@ if __name__ == "__main__":
     b.set_square_value(Coordinate(3, 3), BLACK_AMAZON)
     b.set_square_value(Coordinate(4, 4), BLACK_AMAZON)
 
-    gui = GUI(b, display_surface)
+    # press h for a hint, it comes from the book while the game is in it
+    book = OpeningBook(args.book) if args.book else None
+    engine_color = {"white": WHITE_AMAZON, "black": BLACK_AMAZON}.get(args.engine)
+    gui = GUI(b, display_surface, book, engine_color, args.think)
 
-    # Game Loop
+    # Game Loop, update shows only what changed so an idle window costs next to nothing
     while True:
-        gui.update()
         gui.event_handler()
-        pygame.display.update()
+        gui.update()
         clock.tick(FPS)
 
 